@@ -1 +1,5 @@
 from containers.smile import VolatilitySmile
+from containers.orderbook import OrderBook
+from containers.board import QuoteBoard
+from containers.tape import TradeTape, TradeTapes
+from containers.catalog import InstrumentCatalog
@@ -0,0 +1,213 @@
+import time
+import threading
+
+import numpy as np
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Instruments allocated, doubled when full
+BOARD_CAPACITY = 1024
+
+# Columns of the board (float), as named in the quote notifications
+BID_PRICE = "best_bid_price"
+BID_AMOUNT = "best_bid_amount"
+ASK_PRICE = "best_ask_price"
+ASK_AMOUNT = "best_ask_amount"
+
+PRICE_COLUMNS = (BID_PRICE, BID_AMOUNT, ASK_PRICE, ASK_AMOUNT)
+
+# Attempts at reading rows not being written (the reader
+# yields to the writer between two attempts)
+READ_ATTEMPTS = 100
+
+
+# ####################################################################
+# QUOTE BOARD
+# ####################################################################
+
+class QuoteBoard(object):
+    """
+    Latest best bid/ask (price, amount) and exchange timestamp of many
+    instruments, in preallocated numpy columns: one row per instrument,
+    found through a name -> row map. An update is a few scalar writes,
+    a read is a lookup, or a vectorized copy of whole columns (e.g. an
+    option chain) without iterating on python objects.
+
+    Each row has a sequence number, odd while the row is being written:
+    readers retry the rows written while they were reading them, so a
+    quote is never half updated. Writers hold a lock (the columns are
+    reallocated when full), readers take none: they read the columns
+    and sequences of one allocation, found through a single reference.
+    """
+
+    def __init__(self, instruments=None, capacity: int = BOARD_CAPACITY):
+        self.__rows = {}
+        self.__names = []
+        self.__lock = threading.Lock()
+
+        # Columns, timestamps and sequences (swapped as a whole)
+        self.__capacity = 0
+        self.__store = ({}, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.__grow(max(1, capacity))
+
+        for instrument in instruments or ():
+            self.row(instrument)
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __contains__(self, instrument):
+        return instrument in self.__rows
+
+    @property
+    def instruments(self):
+        return list(self.__names)
+
+    # ##################################################################
+    # ROWS
+    # ##################################################################
+
+    def row(self, instrument):
+        """
+        :return: Row of an instrument (allocated if new).
+        """
+        row = self.__rows.get(instrument, None)
+        if row is not None:
+            return row
+
+        with self.__lock:
+            row = self.__rows.get(instrument, None)
+            if row is None:
+                row = len(self.__names)
+                if row == self.__capacity:
+                    self.__grow(2 * self.__capacity)
+                self.__names.append(instrument)
+                self.__rows[instrument] = row
+        return row
+
+    def rows(self, instruments):
+        """
+        :return: Rows of instruments (numpy array, -1 if never quoted), to read them repeatedly.
+        """
+        rows = self.__rows
+        return np.fromiter((rows.get(i, -1) for i in instruments), dtype=np.int64, count=len(instruments))
+
+    def __grow(self, capacity):
+        # Under the lock: no write meanwhile
+        n = len(self.__names)
+        old_columns, old_timestamps, old_sequences = self.__store
+
+        columns = {}
+        for name in PRICE_COLUMNS:
+            column = np.full(capacity, np.nan, dtype=np.float64)
+            if name in old_columns:
+                column[:n] = old_columns[name][:n]
+            columns[name] = column
+
+        timestamps = np.zeros(capacity, dtype=np.int64)
+        timestamps[:n] = old_timestamps[:n]
+        sequences = np.zeros(capacity, dtype=np.int64)
+        sequences[:n] = old_sequences[:n]
+
+        self.__store = (columns, timestamps, sequences)
+        self.__capacity = capacity
+
+    # ##################################################################
+    # UPDATES
+    # ##################################################################
+
+    def update(self, data):
+        """
+        :param data: 'data' of a quote notification (dict).
+        """
+        row = self.__rows.get(data["instrument_name"], None)
+        if row is None:
+            row = self.row(data["instrument_name"])
+
+        # A missing side has no price
+        bid, ask = data.get(BID_PRICE, None), data.get(ASK_PRICE, None)
+
+        with self.__lock:
+            columns, timestamps, sequences = self.__store
+            sequences[row] += 1
+            columns[BID_PRICE][row] = np.nan if bid is None else bid
+            columns[BID_AMOUNT][row] = data.get(BID_AMOUNT, 0.0) or 0.0
+            columns[ASK_PRICE][row] = np.nan if ask is None else ask
+            columns[ASK_AMOUNT][row] = data.get(ASK_AMOUNT, 0.0) or 0.0
+            timestamps[row] = data.get("timestamp", 0) or 0
+            sequences[row] += 1
+
+    # ##################################################################
+    # READS
+    # ##################################################################
+
+    def quote(self, instrument):
+        """
+        :return: Latest quote (dict, None if never quoted).
+        """
+        row = self.__rows.get(instrument, None)
+        if row is None:
+            return None
+
+        for _ in range(READ_ATTEMPTS):
+            columns, timestamps, sequences = self.__store
+            before = sequences[row]
+            quote = {name: float(column[row]) for name, column in columns.items()}
+            quote["timestamp"] = int(timestamps[row])
+            if before % 2 == 0 and sequences[row] == before:
+                break
+            time.sleep(0)
+
+        if not quote["timestamp"]:
+            return None
+        quote["instrument_name"] = instrument
+        return quote
+
+    def snapshot(self, instruments=None):
+        """
+        Copy of the board (or of some instruments), column by column.
+        :param instruments: Instrument names or rows (default: all).
+        :return: Columns (dict of numpy arrays): best bid/ask price and
+                 amount (NaN if never quoted), timestamp, instrument_name.
+        """
+        names = self.__names
+        if instruments is None:
+            rows = np.arange(len(names))
+        elif isinstance(instruments, np.ndarray):
+            rows = instruments
+        else:
+            instruments = list(instruments)
+            rows = self.rows(instruments)
+
+        # Instruments never quoted: read as row 0, then blanked
+        unknown = rows < 0
+        read = np.where(unknown, 0, rows)
+
+        for _ in range(READ_ATTEMPTS):
+            store_columns, timestamps, sequences = self.__store
+            before = sequences[read]
+            columns = {name: column[read] for name, column in store_columns.items()}
+            columns["timestamp"] = timestamps[read]
+            if not (before % 2).any() and np.array_equal(before, sequences[read]):
+                break
+            time.sleep(0)
+
+        if unknown.any():
+            for name in PRICE_COLUMNS:
+                columns[name][unknown] = np.nan
+            columns["timestamp"][unknown] = 0
+
+        if isinstance(instruments, list):
+            columns["instrument_name"] = instruments
+        else:
+            columns["instrument_name"] = [names[r] for r in rows]
+        return columns
+
+    def mids(self, instruments=None):
+        """
+        :return: Mid prices (numpy array, NaN unless both sides are quoted).
+        """
+        columns = self.snapshot(instruments)
+        return 0.5 * (columns[BID_PRICE] + columns[ASK_PRICE])
@@ -0,0 +1,357 @@
+import os
+import time
+import threading
+import datetime as dt
+
+from utilities import json
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Listings kept by default
+CATALOG_CURRENCIES = ("BTC", "ETH")
+CATALOG_KINDS = ("future", "option")
+
+# Version of the catalog files (older ones are ignored)
+CATALOG_VERSION = 1
+
+# Listings refreshed at least that often (seconds), and at each expiry
+CATALOG_MAX_AGE = 3600.0
+
+# Expiry time of the instruments (UTC)
+EXPIRY_HOUR = 8
+
+# Expiration of the perpetuals (never reached)
+NEVER = 32503680000000
+
+
+# ####################################################################
+# INDEXES
+# ####################################################################
+
+class CatalogIndex(object):
+    """
+    Instruments by name, and names by currency, kind, expiry, strike
+    and option chain (currency, expiry, option type, sorted by strike).
+    Built once, never modified: replaced as a whole on each change.
+    """
+
+    __slots__ = ("instruments", "currencies", "kinds", "expiries", "strikes", "chains", "codes", "next_expiry")
+
+    def __init__(self, instruments: dict):
+        self.instruments = instruments
+        self.currencies, self.kinds, self.expiries, self.strikes = {}, {}, {}, {}
+        self.chains, self.codes = {}, {}
+
+        chains = {}
+        for name, instrument in instruments.items():
+            currency = instrument.get("base_currency", None)
+            kind = instrument.get("kind", None)
+            expiry = instrument.get("expiration_timestamp", NEVER)
+            strike = instrument.get("strike", None)
+
+            self.currencies.setdefault(currency, []).append(name)
+            self.kinds.setdefault(kind, []).append(name)
+            self.expiries.setdefault(expiry, []).append(name)
+            if strike is not None:
+                self.strikes.setdefault(strike, []).append(name)
+
+            # Expiry as in the names (e.g. 27DEC24)
+            if expiry != NEVER:
+                self.codes[name.split("-")[1]] = expiry
+
+            option_type = instrument.get("option_type", None)
+            if option_type is not None:
+                chains.setdefault((currency, expiry, option_type), []).append((strike, name))
+
+        self.chains = {key: [n for _, n in sorted(chain)] for key, chain in chains.items()}
+        self.next_expiry = min(self.expiries) if self.expiries else NEVER
+
+
+# ####################################################################
+# INSTRUMENT CATALOG
+# ####################################################################
+
+class InstrumentCatalog(object):
+    """
+    Instruments listed (active only), persisted to a local file: loaded
+    at startup without a request, refreshed from the exchange when older
+    than max_age or when an expiry has passed. The instruments expired
+    are evicted as soon as their expiry (08:00 UTC) is reached.
+
+    Lookups go through indexes (currency, kind, expiry, strike, option
+    chain), never through the network.
+    """
+
+    def __init__(self, path: str = None,
+                 currencies=CATALOG_CURRENCIES,
+                 kinds=CATALOG_KINDS,
+                 max_age: float = CATALOG_MAX_AGE):
+        """
+        :param path: Catalog file (json), loaded if it exists (optional).
+        :param currencies: Currencies listed.
+        :param kinds: Kinds listed (e.g. future, option).
+        :param max_age: Refresh period (seconds).
+        """
+        self.path = path
+        self.currencies = list(currencies)
+        self.kinds = list(kinds)
+        self.max_age = max_age
+
+        self.__index = CatalogIndex({})
+        self.__lock = threading.Lock()
+
+        # Time of the last refresh (seconds since epoch)
+        self.refreshed_at = None
+
+        if path is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self.__current().instruments)
+
+    def __contains__(self, name):
+        return name in self.__current().instruments
+
+    def __current(self, now=None):
+        # Instruments expired evicted first
+        index = self.__index
+        if (now or time.time()) * 1000 >= index.next_expiry:
+            self.evict(now)
+            index = self.__index
+        return index
+
+    # ##################################################################
+    # PERSISTENCE
+    # ##################################################################
+
+    def load(self):
+        """
+        :return: True if the catalog file was loaded.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "rb") as f:
+            data = json.decode(f.read())
+        if data.get("version", None) != CATALOG_VERSION:
+            return False
+
+        with self.__lock:
+            self.__index = CatalogIndex({i["instrument_name"]: i for i in data["instruments"]})
+            self.refreshed_at = data.get("refreshed_at", None)
+        self.evict()
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+
+        index = self.__index
+        data = {"version": CATALOG_VERSION,
+                "refreshed_at": self.refreshed_at,
+                "instruments": list(index.instruments.values())}
+
+        temp = f"{self.path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(json.encode(data))
+        os.replace(temp, self.path)
+
+    # ##################################################################
+    # UPDATES
+    # ##################################################################
+
+    def update(self, instruments, now=None):
+        """
+        Listings received: instruments added or modified, and those no
+        longer listed removed (within the currencies and kinds received).
+        The catalog is only up to date once every currency and kind has
+        been received: otherwise it stays due for a refresh.
+        :param instruments: Active instruments (list of dict, as returned by public/get_instruments).
+        :return: Names added and removed.
+        """
+        received = {i["instrument_name"]: i for i in instruments}
+        if not received:
+            # Nothing received (e.g. requests timed out): kept as is
+            return [], []
+        groups = {(i.get("base_currency", None), i.get("kind", None)) for i in received.values()}
+
+        with self.__lock:
+            current = self.__index.instruments
+            kept = {n: i for n, i in current.items()
+                    if (i.get("base_currency", None), i.get("kind", None)) not in groups}
+
+            added = [n for n in received if n not in current]
+            removed = [n for n in current if n not in received and n not in kept]
+
+            if added or removed or any(current.get(n, None) != i for n, i in received.items()):
+                self.__index = CatalogIndex({**kept, **received})
+
+            # Some replies missing (e.g. timed out)
+            requested = {(c.upper(), k) for c in self.currencies for k in self.kinds}
+            if requested <= {(c and c.upper(), k) for c, k in groups}:
+                self.refreshed_at = now or time.time()
+
+        self.evict(now)
+        self.save()
+        return added, removed
+
+    def evict(self, now=None):
+        """
+        :return: Names of the instruments expired, removed.
+        """
+        now_ms = (now or time.time()) * 1000
+        if now_ms < self.__index.next_expiry:
+            return []
+
+        with self.__lock:
+            current = self.__index.instruments
+            expired = [n for n, i in current.items() if i.get("expiration_timestamp", NEVER) <= now_ms]
+            if expired:
+                expired_ = set(expired)
+                self.__index = CatalogIndex({n: i for n, i in current.items() if n not in expired_})
+        return expired
+
+    def needs_refresh(self, now=None):
+        """
+        :return: True if older than max_age, or if an expiry passed since the last refresh
+                 (new instruments are listed at expiry).
+        """
+        if self.refreshed_at is None:
+            return True
+
+        now = now or time.time()
+        if now - self.refreshed_at >= self.max_age:
+            return True
+        return last_expiry(now) > self.refreshed_at
+
+    def refresh(self, client, force: bool = False):
+        """
+        :param client: RequestClient (active instruments requested, one request per currency and kind).
+        :param force: Even if not needed.
+        :return: Names added and removed (None if not needed).
+        """
+        if not force and not self.needs_refresh():
+            return None
+        replies = client.instruments(currency=self.currencies, kind=self.kinds, expired=False)
+        return self.update(instruments_from_replies(replies))
+
+    async def refresh_async(self, client, force: bool = False):
+        """
+        :param client: AsyncRequestClient.
+        """
+        if not force and not self.needs_refresh():
+            return None
+        replies = await client.instruments(currency=self.currencies, kind=self.kinds, expired=False)
+        return self.update(instruments_from_replies(replies))
+
+    # ##################################################################
+    # LOOKUPS
+    # ##################################################################
+
+    def get(self, name):
+        """
+        :return: Instrument (dict, None if not listed).
+        """
+        return self.__current().instruments.get(name, None)
+
+    @property
+    def instruments(self):
+        return list(self.__current().instruments)
+
+    def expiries(self, currency: str = None, kind: str = None):
+        """
+        :return: Expiries listed (timestamps in ms), sorted.
+        """
+        index = self.__current()
+        if currency is None and kind is None:
+            return sorted(e for e in index.expiries if e != NEVER)
+        names = self.select(currency=currency, kind=kind)
+        return sorted({index.instruments[n]["expiration_timestamp"] for n in names} - {NEVER})
+
+    def expiry(self, expiry):
+        """
+        :param expiry: Timestamp (ms), code as in the names (e.g. 27DEC24) or date.
+        :return: Expiration timestamp (ms, None if unknown code).
+        """
+        if isinstance(expiry, str):
+            return self.__current().codes.get(expiry.upper(), None)
+        if isinstance(expiry, dt.date):
+            expiry = dt.datetime(expiry.year, expiry.month, expiry.day, EXPIRY_HOUR, tzinfo=dt.timezone.utc)
+            return int(expiry.timestamp() * 1000)
+        return int(expiry)
+
+    def chain(self, currency: str, expiry, option_type: str):
+        """
+        :param option_type: 'call' or 'put'.
+        :return: Options of an expiry, sorted by strike (names).
+        """
+        key = (currency.upper(), self.expiry(expiry), option_type)
+        return list(self.__current().chains.get(key, ()))
+
+    def select(self, currency: str = None, kind: str = None, expiry=None,
+               strike: float = None, option_type: str = None):
+        """
+        :param expiry: Timestamp (ms), code as in the names (e.g. 27DEC24) or date.
+        :return: Names of the instruments matching every criterion given.
+        """
+        index = self.__current()
+        expiry = None if expiry is None else self.expiry(expiry)
+
+        # Option chains: straight from their index
+        if currency is not None and expiry is not None and option_type is not None and kind in (None, "option"):
+            names = index.chains.get((currency.upper(), expiry, option_type), ())
+            if strike is None:
+                return list(names)
+            return [n for n in names if index.instruments[n].get("strike", None) == strike]
+
+        # Otherwise, the smallest index matching, filtered
+        candidates = []
+        if currency is not None:
+            candidates.append(index.currencies.get(currency.upper(), ()))
+        if kind is not None:
+            candidates.append(index.kinds.get(kind, ()))
+        if expiry is not None:
+            candidates.append(index.expiries.get(expiry, ()))
+        if strike is not None:
+            candidates.append(index.strikes.get(strike, ()))
+        if option_type is not None:
+            candidates.append([n for n in index.kinds.get("option", ())
+                               if index.instruments[n].get("option_type", None) == option_type])
+
+        if not candidates:
+            return list(index.instruments)
+
+        candidates.sort(key=len)
+        names = candidates[0]
+        for other in candidates[1:]:
+            other = set(other)
+            names = [n for n in names if n in other]
+        return list(names)
+
+
+# ####################################################################
+# HELPERS
+# ####################################################################
+
+def instruments_from_replies(replies):
+    """
+    :param replies: Replies of public/get_instruments (list).
+    :return: Instruments (list of dict).
+    """
+    instruments = []
+    for reply in replies or ():
+        instruments.extend(reply.get("result", None) or ())
+    return instruments
+
+
+def last_expiry(now: float):
+    """
+    :return: Last 08:00 UTC before now (seconds since epoch).
+    """
+    now = dt.datetime.fromtimestamp(now, tz=dt.timezone.utc)
+    expiry = now.replace(hour=EXPIRY_HOUR, minute=0, second=0, microsecond=0)
+    if expiry > now:
+        expiry -= dt.timedelta(days=1)
+    return expiry.timestamp()
@@ -0,0 +1,274 @@
+from bisect import bisect_left
+
+import numpy as np
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Levels allocated per side, doubled when full
+BOOK_CAPACITY = 256
+
+# Level actions of the book notifications
+NEW = "new"
+CHANGE = "change"
+DELETE = "delete"
+
+SNAPSHOT = "snapshot"
+
+
+# ####################################################################
+# ONE SIDE OF THE BOOK
+# ####################################################################
+
+class BookSide(object):
+    """
+    Price levels of one side, in sorted arrays with the best level last:
+    reading the best level is O(1), finding a level O(log n), and the
+    levels moved by an update are the few behind the best ones.
+
+    Prices are searched in a list of keys (price for the bids, -price
+    for the asks, ascending either way), prices and amounts are stored
+    in numpy arrays in the same order.
+    """
+
+    def __init__(self, bids: bool, capacity: int = BOOK_CAPACITY):
+        self.__sign = 1.0 if bids else -1.0
+        self.__keys = []
+        self.__prices = np.empty(capacity, dtype=np.float64)
+        self.__amounts = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.__keys)
+
+    # ##################################################################
+    # UPDATES
+    # ##################################################################
+
+    def set(self, price: float, amount: float):
+        """
+        Create or update a level (amount 0 deletes it).
+        """
+        if not amount:
+            return self.delete(price)
+
+        keys = self.__keys
+        key = self.__sign * price
+        i = bisect_left(keys, key)
+        n = len(keys)
+
+        # Existing level
+        if i < n and keys[i] == key:
+            self.__amounts[i] = amount
+            return
+
+        if n == len(self.__prices):
+            self.__grow()
+
+        # Levels behind the new one move by one
+        prices, amounts = self.__prices, self.__amounts
+        if i < n:
+            prices[i + 1:n + 1] = prices[i:n]
+            amounts[i + 1:n + 1] = amounts[i:n]
+        keys.insert(i, key)
+        prices[i] = price
+        amounts[i] = amount
+
+    def delete(self, price: float):
+        keys = self.__keys
+        key = self.__sign * price
+        i = bisect_left(keys, key)
+        n = len(keys)
+
+        if i == n or keys[i] != key:
+            return
+
+        if i < n - 1:
+            self.__prices[i:n - 1] = self.__prices[i + 1:n]
+            self.__amounts[i:n - 1] = self.__amounts[i + 1:n]
+        del keys[i]
+
+    def load(self, prices, amounts):
+        """
+        Replace every level.
+        :param prices: Prices (any order).
+        :param amounts: Amounts (levels with a null amount are ignored).
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        kept = amounts != 0
+        prices, amounts = prices[kept], amounts[kept]
+
+        order = np.argsort(self.__sign * prices, kind="stable")
+        n = len(order)
+        while n > len(self.__prices):
+            self.__grow()
+
+        self.__prices[:n] = prices[order]
+        self.__amounts[:n] = amounts[order]
+        self.__keys = (self.__sign * self.__prices[:n]).tolist()
+
+    def clear(self):
+        self.__keys = []
+
+    def __grow(self):
+        n = len(self.__keys)
+        capacity = 2 * max(1, len(self.__prices))
+
+        prices = np.empty(capacity, dtype=np.float64)
+        amounts = np.empty(capacity, dtype=np.float64)
+        prices[:n] = self.__prices[:n]
+        amounts[:n] = self.__amounts[:n]
+        self.__prices, self.__amounts = prices, amounts
+
+    # ##################################################################
+    # QUERIES
+    # ##################################################################
+
+    @property
+    def best(self):
+        """
+        :return: Best level as (price, amount), None if empty.
+        """
+        n = len(self.__keys)
+        if not n:
+            return None
+        return float(self.__prices[n - 1]), float(self.__amounts[n - 1])
+
+    @property
+    def best_price(self):
+        n = len(self.__keys)
+        return float(self.__prices[n - 1]) if n else None
+
+    def amount(self, price: float):
+        keys = self.__keys
+        key = self.__sign * price
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return float(self.__amounts[i])
+        return 0.0
+
+    def top(self, depth: int = None):
+        """
+        Best levels, best first, as views on the storage (no copy): they
+        follow the updates of the book, and are not valid anymore once
+        the side grows beyond its capacity. Copy them to keep them.
+        :param depth: Number of levels (default: all).
+        :return: (prices, amounts) numpy arrays.
+        """
+        n = len(self.__keys)
+        first = 0 if depth is None else max(0, n - depth)
+        return self.__prices[first:n][::-1], self.__amounts[first:n][::-1]
+
+
+# ####################################################################
+# ORDER BOOK
+# ####################################################################
+
+class OrderBook(object):
+    """
+    Order book of one instrument, maintained from the notifications of
+    the book channels: snapshot then changes ('new', 'change', 'delete'
+    levels) for book.{instrument}.{interval}, or the whole (grouped)
+    book at each notification for book.{instrument}.{group}.{depth}.{interval}.
+    """
+
+    def __init__(self, instrument: str = None, capacity: int = BOOK_CAPACITY):
+        self.instrument = instrument
+        self.bids = BookSide(bids=True, capacity=capacity)
+        self.asks = BookSide(bids=False, capacity=capacity)
+
+        self.change_id = None
+        self.timestamp = None
+
+    # ##################################################################
+    # UPDATES
+    # ##################################################################
+
+    def apply(self, data):
+        """
+        Apply a notification of a book channel.
+        :param data: 'data' of the notification (dict).
+        """
+        bids, asks = data.get("bids", ()), data.get("asks", ())
+
+        # Snapshot, or a whole grouped book ([price, amount] levels)
+        if data.get("type", None) == SNAPSHOT or self.__grouped(data):
+            self.load(bids, asks)
+        else:
+            for side, levels in ((self.bids, bids), (self.asks, asks)):
+                for action, price, amount in levels:
+                    if action == DELETE:
+                        side.delete(price)
+                    else:
+                        side.set(price, amount)
+
+        self.change_id = data.get("change_id", self.change_id)
+        self.timestamp = data.get("timestamp", self.timestamp)
+        if self.instrument is None:
+            self.instrument = data.get("instrument_name", None)
+
+    def load(self, bids, asks):
+        """
+        Replace the whole book.
+        :param bids: Levels, as [price, amount] or [action, price, amount].
+        :param asks: Same as bids.
+        """
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            if not levels:
+                side.clear()
+                continue
+            columns = list(zip(*levels))
+            side.load(columns[-2], columns[-1])
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.change_id = None
+        self.timestamp = None
+
+    @staticmethod
+    def __grouped(data):
+        # Grouped books carry neither a type nor a previous change
+        return "type" not in data and "prev_change_id" not in data
+
+    # ##################################################################
+    # QUERIES
+    # ##################################################################
+
+    @property
+    def best_bid(self):
+        return self.bids.best_price
+
+    @property
+    def best_ask(self):
+        return self.asks.best_price
+
+    @property
+    def mid(self):
+        bid, ask = self.bids.best_price, self.asks.best_price
+        if bid is None or ask is None:
+            return None
+        return 0.5 * (bid + ask)
+
+    @property
+    def spread(self):
+        bid, ask = self.bids.best_price, self.asks.best_price
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def top(self, depth: int = None):
+        """
+        Best levels of both sides, as views (see BookSide.top).
+        :return: bid prices, bid amounts, ask prices, ask amounts.
+        """
+        return (*self.bids.top(depth), *self.asks.top(depth))
+
+    def to_dict(self, depth: int = None):
+        bid_prices, bid_amounts, ask_prices, ask_amounts = self.top(depth)
+        return {"instrument_name": self.instrument,
+                "change_id": self.change_id,
+                "timestamp": self.timestamp,
+                "bids": np.column_stack((bid_prices, bid_amounts)).tolist(),
+                "asks": np.column_stack((ask_prices, ask_amounts)).tolist()}
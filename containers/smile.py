@@ -5,6 +5,7 @@ import numpy as np
 from scipy.interpolate import interp1d
 
 from containers.quote import SimpleQuote
+from deribit.parsers.instruments import expiry_timestamp
 
 
 # ####################################################################
@@ -38,7 +39,7 @@ class VolatilitySmile(object):
 
     @classmethod
     def instance(cls, bid, ask, expiry):
-        expiry = dt.datetime.strptime(expiry, "%d%b%y").timestamp()
+        expiry = expiry_timestamp(expiry)
         forward_bid, forward_ask = bid["forward"], ask["forward"]
         forward = SimpleQuote(bid=forward_bid, ask=forward_bid, expiry=expiry)
         bid, ask = bid["smile"], ask["smile"]
@@ -0,0 +1,228 @@
+import threading
+
+import numpy as np
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Trades kept per instrument (the most recent ones)
+TAPE_CAPACITY = 8192
+
+# One trade
+TRADE_DTYPE = np.dtype([("timestamp", np.int64),
+                        ("price", np.float64),
+                        ("amount", np.float64),
+                        ("direction", np.int8),  # 1: buy, -1: sell
+                        ("trade_seq", np.int64),
+                        ("iv", np.float64)])  # NaN unless an option
+
+BUY = 1
+SELL = -1
+
+DIRECTIONS = {"buy": BUY, "sell": SELL}
+
+
+# ####################################################################
+# TRADE TAPE (ONE INSTRUMENT)
+# ####################################################################
+
+class TradeTape(object):
+    """
+    Latest trades of one instrument, in a fixed capacity ring of numpy
+    records. Each trade is written twice, at its slot and at the same
+    slot of a mirror half: the last N trades (N <= capacity) are then
+    always contiguous, and handed out as views, without copy.
+
+    Views follow the writes: once the tape has wrapped around, their
+    oldest trades get overwritten. Copy them to keep them.
+    """
+
+    def __init__(self, instrument: str = None, capacity: int = TAPE_CAPACITY):
+        self.instrument = instrument
+        self.capacity = capacity
+        self.__trades = np.zeros(2 * capacity, dtype=TRADE_DTYPE)
+
+        # Trades appended since the creation of the tape
+        self.count = 0
+
+        # Last sequence number, and the number of trades missed
+        self.trade_seq = None
+        self.missed = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    # ##################################################################
+    # UPDATES
+    # ##################################################################
+
+    def append(self, trade):
+        """
+        :param trade: Trade (dict), as in the trades notifications.
+        :return: False if already on the tape (same or older trade_seq).
+        """
+        seq = trade.get("trade_seq", None)
+        if seq is not None and self.trade_seq is not None:
+            if seq <= self.trade_seq:
+                return False
+            self.missed += seq - self.trade_seq - 1
+
+        record = (trade["timestamp"],
+                  trade["price"],
+                  trade["amount"],
+                  DIRECTIONS.get(trade.get("direction", None), 0),
+                  -1 if seq is None else seq,
+                  trade.get("iv", np.nan))
+
+        n = self.count
+        slot = n % self.capacity
+        trades = self.__trades
+        trades[slot] = record
+        trades[slot + self.capacity] = record
+
+        if seq is not None:
+            self.trade_seq = seq
+        self.count = n + 1
+        return True
+
+    def extend(self, trades):
+        """
+        :param trades: Trades (list of dict), oldest first.
+        :return: Number of trades appended.
+        """
+        return sum(self.append(t) for t in trades)
+
+    # ##################################################################
+    # WINDOWS (VIEWS)
+    # ##################################################################
+
+    def last(self, n: int = None):
+        """
+        :param n: Number of trades (default: all those kept).
+        :return: Last trades, oldest first (view on the tape).
+        """
+        count = self.count
+        kept = min(count, self.capacity)
+        n = kept if n is None else min(n, kept)
+        if not n:
+            return self.__trades[:0]
+
+        end = (count - 1) % self.capacity + self.capacity + 1
+        return self.__trades[end - n:end]
+
+    def since(self, timestamp: int):
+        """
+        :param timestamp: Exchange timestamp (ms).
+        :return: Trades at or after that time, oldest first (view on the tape).
+        """
+        trades = self.last()
+        first = np.searchsorted(trades["timestamp"], timestamp, side="left")
+        return trades[first:]
+
+    # ##################################################################
+    # AGGREGATIONS
+    # ##################################################################
+
+    def window(self, n: int = None, since: int = None):
+        # Last n trades, or those since a time
+        return self.since(since) if since is not None else self.last(n)
+
+    def volume(self, n: int = None, since: int = None):
+        """
+        :return: Amount traded (buy, sell).
+        """
+        trades = self.window(n, since)
+        amounts, directions = trades["amount"], trades["direction"]
+        return float(amounts[directions == BUY].sum()), float(amounts[directions == SELL].sum())
+
+    def vwap(self, n: int = None, since: int = None):
+        """
+        :return: Volume weighted average price (None if no trade).
+        """
+        trades = self.window(n, since)
+        amounts = trades["amount"]
+        total = amounts.sum()
+        if not total:
+            return None
+        return float((trades["price"] * amounts).sum() / total)
+
+    def imbalance(self, n: int = None, since: int = None):
+        """
+        :return: (buy - sell) / (buy + sell) amounts, in [-1, 1] (None if no trade).
+        """
+        buy, sell = self.volume(n, since)
+        if not buy + sell:
+            return None
+        return (buy - sell) / (buy + sell)
+
+    def stats(self, n: int = None, since: int = None):
+        """
+        :return: Count, first/last time, open/high/low/close, volumes and vwap (dict).
+        """
+        trades = self.window(n, since)
+        if not len(trades):
+            return {"count": 0}
+
+        prices = trades["price"]
+        buy, sell = self.volume(n, since)
+        return {"count": len(trades),
+                "first": int(trades["timestamp"][0]),
+                "last": int(trades["timestamp"][-1]),
+                "open": float(prices[0]),
+                "high": float(prices.max()),
+                "low": float(prices.min()),
+                "close": float(prices[-1]),
+                "buy_volume": buy,
+                "sell_volume": sell,
+                "vwap": self.vwap(n, since)}
+
+
+# ####################################################################
+# TRADE TAPES (BY INSTRUMENT)
+# ####################################################################
+
+class TradeTapes(object):
+    """
+    Trade tapes, created on the first trade of each instrument.
+    """
+
+    def __init__(self, capacity: int = TAPE_CAPACITY):
+        self.__capacity = capacity
+        self.__tapes = {}
+        self.__lock = threading.Lock()
+
+    def __getitem__(self, instrument):
+        return self.__tapes[instrument]
+
+    def __contains__(self, instrument):
+        return instrument in self.__tapes
+
+    def __len__(self):
+        return len(self.__tapes)
+
+    @property
+    def instruments(self):
+        return list(self.__tapes)
+
+    def tape(self, instrument):
+        """
+        :return: Tape of an instrument (created if new).
+        """
+        tape = self.__tapes.get(instrument, None)
+        if tape is None:
+            with self.__lock:
+                tape = self.__tapes.get(instrument, None)
+                if tape is None:
+                    tape = self.__tapes[instrument] = TradeTape(instrument, self.__capacity)
+        return tape
+
+    def append(self, trades):
+        """
+        :param trades: Trades (list of dict), of any instruments, oldest first.
+        :return: Number of trades appended.
+        """
+        appended = 0
+        for trade in trades:
+            appended += self.tape(trade["instrument_name"]).append(trade)
+        return appended
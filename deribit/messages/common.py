@@ -89,9 +89,9 @@ def add_rpc_protocol(message):
 
 def add_message_id(message, id=None):
     """
-    Add a alpha ID to the message.
+    Add an ID to the message.
     :param message: Pre-existing message (dict) to be modified and returned.
-    :param id: String representing the alpha ID. Will be returned along in the response.
+    :param id: ID (integer or string), returned along in the response. Default: next message id.
     :return: Message (dict)
     """
     id_ = id
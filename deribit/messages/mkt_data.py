@@ -1,4 +1,5 @@
 from .common import message, add_params_to_message
+from .templates import GET_ORDER_BOOK
 
 from ..support.endpoints import *
 from ..support.sanitizers import *
@@ -10,6 +11,12 @@ from ..support.types import INTERVAL, PUBLIC_CHANNELS
 from utilities.marshal import to_list
 from deribit.standards import DEFAULT_KINDS, DEFAULT_CURRENCIES
 
+# ######################################################################
+# SCHEMAS
+# ######################################################################
+
+validate_orderbook = compile_validator("instrument", "depth")
+
 
 # ######################################################################
 # REQUESTS
@@ -104,14 +111,11 @@ def request_orderbook(instrument: str, depth: int = None):
     :return:
     """
     # Sanitize input arguments
-    data = sanitize(instrument=instrument, depth=depth)
-
-    # Get basic method call
-    msg = message(method=DATA_GET_ORDER_BOOK)
+    data = validate_orderbook(instrument=instrument, depth=depth)
 
-    # Add parameters
+    # Pre-encoded message, parameters spliced in
     params = {"instrument_name": data["instrument"], "depth": data["depth"]}
-    return add_params_to_message(params, msg)
+    return GET_ORDER_BOOK.build(params)
 
 
 def request_orderbooks(instruments: list, depth: int = None):
@@ -161,27 +165,12 @@ def request_index(currency: str):
 
 def request_all_trades(data, chunk_size=250):
     """
-
-    :param data:
-    :param chunk_size:
-    :return:
+    Pages covering the whole history of some instruments.
+    :param data: Replies to a request of the last trade of each instrument.
+    :param chunk_size: Trades per page (at most 1000).
+    :return: Messages, for all instruments.
     """
 
-    import random
-    import string
-    characters_set = string.ascii_letters + string.digits
-
-    def __message(instrument_name, start_seq, end_seq):
-        msg = {'jsonrpc': '2.0',
-               'id': ''.join(random.choice(characters_set) for _ in range(6)),
-               'method': 'public/get_last_trades_by_instrument',
-               'params': {"instrument_name": instrument_name,
-                          "include_old": True,
-                          "start_seq": start_seq,
-                          "end_seq": end_seq,
-                          "count": end_seq - start_seq}}
-        return msg
-
     parsed_data = []
     if not isinstance(data, list):
         data = [data]
@@ -190,7 +179,7 @@ def request_all_trades(data, chunk_size=250):
         try:
             parsed_data.append({"instrument": blob["result"]["trades"][0]["instrument_name"],
                                 "end_seq": blob["result"]["trades"][0]["trade_seq"]})
-        except:
+        except (KeyError, IndexError, TypeError):
             pass
 
     messages = []
@@ -200,17 +189,35 @@ def request_all_trades(data, chunk_size=250):
         end_seq = blob["end_seq"]
         instrument = blob["instrument"]
 
-        chunks = int(math.ceil(end_seq / chunk_size))
-        start_seqs = [chunk_size * i for i in range(chunks)]
-        end_seqs = [min((chunk_size * i) - 1, end_seq) for i in range(1, chunks + 1)]
-
-        messages = [__message(instrument_name=instrument,
-                              start_seq=start_seqs[i],
-                              end_seq=end_seqs[i]) for i in range(chunks)]
+        # Sequence numbers start at 1, ranges are inclusive
+        for start_seq in range(1, end_seq + 1, chunk_size):
+            messages.append(request_trades_by_seq(instrument=instrument,
+                                                  start_seq=start_seq,
+                                                  end_seq=min(start_seq + chunk_size - 1, end_seq)))
 
     return messages
 
 
+def request_trades_by_seq(instrument: str, start_seq: int, end_seq: int):
+    """
+    One page of the history of an instrument, oldest trade first.
+    :param instrument: (str) Instrument's name
+    :param start_seq: (int) First trade seq (included)
+    :param end_seq: (int) Last trade seq (included), at most 999 after start_seq
+    :return: (dict) Message to be sent into the websocket.
+    """
+    start_seq = max(1, start_seq)
+    end_seq = min(end_seq, start_seq + 999)
+    params = {"instrument_name": instrument,
+              "include_old": True,
+              "start_seq": start_seq,
+              "end_seq": end_seq,
+              "count": end_seq - start_seq + 1,
+              "sorting": "asc"}
+    msg = message(method=DATA_LAST_TRADES_BY_INSTRUMENT)
+    return add_params_to_message(params, msg)
+
+
 def request_trades(instruments: list,
                    count: int = None,
                    include_old: bool = True,
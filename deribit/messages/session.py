@@ -1,5 +1,6 @@
 from typing import List
 from .common import message, add_params_to_message
+from .templates import GET_TIME
 from ..support.endpoints import *
 
 
@@ -25,8 +26,7 @@ def test_heartbeat_request_message():
 # ######################################################################
 
 def get_time():
-    msg = message(method=SESSION_GET_TIME)
-    return add_params_to_message(kvp_dict={}, message=msg)
+    return GET_TIME.build()
 
 
 # ######################################################################
@@ -94,6 +94,13 @@ def login_message(key, secret):
     return add_params_to_message({}, msg)
 
 
+def refresh_token_message(refresh_token):
+    msg = message(method=SESSION_LOGIN)
+    msg["params"] = {"grant_type": "refresh_token",
+                     "refresh_token": refresh_token}
+    return add_params_to_message({}, msg)
+
+
 # ######################################################################
 # CANCEL ON DISCONNECT
 # ######################################################################
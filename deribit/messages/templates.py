@@ -0,0 +1,181 @@
+import math
+import timeit
+
+from utilities import json
+from ..support.identification import message_id
+from ..support.networking import *
+from ..support.endpoints import *
+
+# ######################################################################
+# CONSTANTS
+# ######################################################################
+
+# Encoded strings kept (instrument names, order types...): cleared when full
+STRING_CACHE_SIZE = 4096
+
+__strings = {}
+
+
+# ######################################################################
+# PREPARED MESSAGE
+# ######################################################################
+
+class PreparedMessage(dict):
+    """
+    Message (same content as the dict built by common.message) carrying
+    its frame, already encoded: the transports send it as is. Must not
+    be modified once built.
+    """
+
+    __slots__ = ("frame",)
+
+
+def frame(message):
+    """
+    Encoded frame of a message.
+    :param message: Message (dict or PreparedMessage).
+    :return: JSON (bytes)
+    """
+    if type(message) is PreparedMessage:
+        return message.frame
+    return json.encode(message)
+
+
+def frame_str(message):
+    """
+    Same as frame, for the transports accepting text only.
+    """
+    if type(message) is PreparedMessage:
+        return message.frame.decode()
+    return json.encode_str(message)
+
+
+# ######################################################################
+# TEMPLATE
+# ######################################################################
+
+class MessageTemplate(object):
+    """
+    Message of a given method, of which the constant parts are encoded
+    once: at build time only the id and the parameters are spliced in.
+    """
+
+    def __init__(self, method: str):
+        self.method = method
+
+        # {"jsonrpc":"2.0","id":<id>,"method":"<method>","params":{<params>}}
+        # (keys as in common.message)
+        self.__head = b'{"' + PROTOCOL.encode() + b'":' + json.encode(PROTOCOL_VERSION) + b',"id":'
+        self.__body = b',"' + REQ_METHOD.encode() + b'":' + json.encode(method) + b',"' + REQ_PARAMS.encode() + b'":'
+        self.__no_params = self.__body + b"{}}"
+
+    def build(self, params=None):
+        """
+        Build a message.
+        :param params: Parameters (dict), falsy values are left out (as in add_params_to_message).
+        :return: PreparedMessage
+        """
+        id_ = message_id()
+
+        # Only the id (and the parameters) are encoded here
+        if params:
+            kept = {k: v for k, v in params.items() if v}
+            frame_ = b"%s%d%s%s}" % (self.__head, id_, self.__body, encode_params(kept))
+        else:
+            kept = {}
+            frame_ = b"%s%d%s" % (self.__head, id_, self.__no_params)
+
+        msg = PreparedMessage(jsonrpc=PROTOCOL_VERSION, id=id_, method=self.method, params=kept)
+        msg.frame = frame_
+        return msg
+
+
+def encode_params(params):
+    """
+    Encode parameters (dict). The C codecs encode the whole dict faster
+    than it can be spliced in python; with the standard library codec,
+    the keys and the strings (instrument names, order types...) are
+    encoded once and reused.
+    """
+    if json.codec != "json":
+        return json.encode(params)
+
+    return b"{" + b",".join([encode_value(k) + b":" + encode_value(v) for k, v in params.items()]) + b"}"
+
+
+def encode_value(value):
+    t = type(value)
+
+    if t is str:
+        encoded = __strings.get(value, None)
+        if encoded is None:
+            if len(__strings) >= STRING_CACHE_SIZE:
+                __strings.clear()
+            encoded = __strings[value] = json.encode(value)
+        return encoded
+
+    if t is bool:
+        return b"true" if value else b"false"
+
+    if t is int:
+        return str(value).encode()
+
+    if t is float and math.isfinite(value):
+        return repr(value).encode()
+
+    return json.encode(value)
+
+
+# ######################################################################
+# TEMPLATES OF THE HOT REQUESTS
+# ######################################################################
+
+GET_TIME = MessageTemplate(SESSION_GET_TIME)
+GET_ORDER_BOOK = MessageTemplate(DATA_GET_ORDER_BOOK)
+BUY = MessageTemplate(TRADING_BUY)
+SELL = MessageTemplate(TRADING_SELL)
+
+
+# ######################################################################
+# BENCHMARK
+# ######################################################################
+
+if __name__ == "__main__":
+
+    # Run as a script: use the module imported by the builders
+    from deribit.messages import session, mkt_data, trading, templates
+    from deribit.messages.common import message, add_params_to_message
+
+    def per_call(f, number=20000, repeat=5):
+        return min(timeit.repeat(f, number=number, repeat=repeat)) / number
+
+    order = {"instrument_name": "BTC-PERPETUAL", "amount": 10.0, "type": "limit",
+             "time_in_force": "good_til_cancelled", "label": "strategy-1",
+             "limit_price": 5000.5, "post_only": True}
+
+    book = {"instrument_name": "BTC-PERPETUAL", "depth": 5}
+
+    cases = [("get_time", SESSION_GET_TIME, {}, templates.GET_TIME),
+             ("get_order_book", DATA_GET_ORDER_BOOK, book, templates.GET_ORDER_BOOK),
+             ("buy", TRADING_BUY, order, templates.BUY)]
+
+    builders = [("get_time", lambda: templates.frame(session.get_time())),
+                ("get_order_book", lambda: templates.frame(mkt_data.request_orderbook("BTC-PERPETUAL", 5))),
+                ("buy", lambda: templates.frame(trading.buy("BTC-PERPETUAL", 10, limit_price=5000.5,
+                                                            label="strategy-1", post_only=True)))]
+
+    for codec in ("json", "orjson"):
+        if codec not in json.CODECS:
+            continue
+        json.use(codec)
+
+        print(f"JSON codec: {codec}, build + serialize")
+        for name, method, params, template in cases:
+            generic = per_call(lambda: json.encode(add_params_to_message(dict(params), message(method=method))))
+            prepared = per_call(lambda: template.build(params))
+            print(f"{name:>16}: generic {generic * 1e6:6.2f}us, template {prepared * 1e6:6.2f}us "
+                  f"(x{generic / prepared:.1f})")
+
+        print(f"JSON codec: {codec}, request builders (validation included)")
+        for name, builder in builders:
+            print(f"{name:>16}: {per_call(builder) * 1e6:6.2f}us")
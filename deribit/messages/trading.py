@@ -1,10 +1,27 @@
 from typing import Dict
 
-from ..support.sanitizers import sanitize
+from ..support.sanitizers import sanitize, compile_validator
 from ..messages.common import message, add_params_to_message
+from ..messages.templates import BUY, SELL
 from ..support.types import ORDER_TYPE
 from ..support.endpoints import *
 
+# ######################################################################
+# SCHEMAS
+# ######################################################################
+
+ORDER_FIELDS = ("instrument_name", "amount", "type", "label", "limit_price", "time_in_force", "max_show",
+                "post_only", "reduce_only", "stop_price", "trigger", "advanced")
+
+validate_order = compile_validator(*ORDER_FIELDS)
+
+# Order types, as sanitized
+LIMIT = ORDER_TYPE.LIMIT.value
+MARKET = ORDER_TYPE.MARKET.value
+STOP_LIMIT = ORDER_TYPE.STOP_LIMIT.value
+STOP_MARKET = ORDER_TYPE.STOP_MARKET.value
+LIMIT_TYPES = frozenset([LIMIT, STOP_LIMIT])
+
 
 # ######################################################################
 # REQUESTS
@@ -32,37 +49,35 @@ def buy(instrument: str, amount: float, order_type: str = None, label: str = Non
 
     # Implement delta default behaviour
     if not order_type:
-        order_type = ORDER_TYPE.LIMIT.value.lower()
-
-    data = sanitize(instrument_name=instrument,
-                    amount=amount,
-                    type=order_type,
-                    label=label,
-                    limit_price=limit_price,
-                    time_in_force=time_in_force,
-                    max_show=max_show,
-                    post_only=post_only,
-                    reduce_only=reduce_only,
-                    stop_price=stop_price,
-                    trigger=trigger,
-                    advanced=vol_quote)
+        order_type = LIMIT
+
+    data = validate_order(instrument_name=instrument,
+                          amount=amount,
+                          type=order_type,
+                          label=label,
+                          limit_price=limit_price,
+                          time_in_force=time_in_force,
+                          max_show=max_show,
+                          post_only=post_only,
+                          reduce_only=reduce_only,
+                          stop_price=stop_price,
+                          trigger=trigger,
+                          advanced=vol_quote)
 
     # Asset the coherence of a limit order
-    limit_price_ = None if "limit_price" not in data else data["limit_price"]
+    limit_price_ = data.get("limit_price", None)
     assert_limit_order_coherence(order_type=data["type"], limit_price=limit_price_)
 
     # Asset the coherence of a stop order
-    stop_price_ = None if "stop_price" not in data else data["stop_price"]
+    stop_price_ = data.get("stop_price", None)
     assert_stop_order_coherence(order_type=data["type"],
                                 buy_order=True,
                                 data=data,
                                 stop_price=stop_price_,
                                 limit_price=limit_price_)
 
-    # Build basic message
-    msg = message(method=TRADING_BUY)
-    params = {key: value for (key, value) in data.items()}
-    return add_params_to_message(params, msg)
+    # Pre-encoded message, parameters spliced in
+    return BUY.build(data)
 
 
 def sell(instrument: str, amount: float, order_type: str = None, label: str = None,
@@ -87,37 +102,35 @@ def sell(instrument: str, amount: float, order_type: str = None, label: str = No
 
     # Implement delta default behaviour
     if not order_type:
-        order_type = ORDER_TYPE.LIMIT.value.lower()
-
-    data = sanitize(instrument_name=instrument,
-                    amount=amount,
-                    type=order_type,
-                    label=label,
-                    limit_price=limit_price,
-                    time_in_force=time_in_force,
-                    max_show=max_show,
-                    post_only=post_only,
-                    reduce_only=reduce_only,
-                    stop_price=stop_price,
-                    trigger=trigger,
-                    advanced=vol_quote)
+        order_type = LIMIT
+
+    data = validate_order(instrument_name=instrument,
+                          amount=amount,
+                          type=order_type,
+                          label=label,
+                          limit_price=limit_price,
+                          time_in_force=time_in_force,
+                          max_show=max_show,
+                          post_only=post_only,
+                          reduce_only=reduce_only,
+                          stop_price=stop_price,
+                          trigger=trigger,
+                          advanced=vol_quote)
 
     # Asset the coherence of a limit order
-    limit_price_ = None if "limit_price" not in data else data["limit_price"]
+    limit_price_ = data.get("limit_price", None)
     assert_limit_order_coherence(order_type=data["type"], limit_price=limit_price_)
 
     # Asset the coherence of a stop order
-    stop_price_ = None if "stop_price" not in data else data["stop_price"]
+    stop_price_ = data.get("stop_price", None)
     assert_stop_order_coherence(order_type=data["type"],
                                 buy_order=False,
                                 data=data,
                                 stop_price=stop_price_,
                                 limit_price=limit_price_)
 
-    # Build basic message
-    msg = message(method=TRADING_SELL)
-    params = {key: value for (key, value) in data.items()}
-    return add_params_to_message(params, msg)
+    # Pre-encoded message, parameters spliced in
+    return SELL.build(data)
 
 
 def close(instrument: str, order_type: str = None, limit_price: float = None):
@@ -312,14 +325,14 @@ def order_status(order_id: str):
 def assert_limit_order_coherence(order_type, limit_price=None):
     # Check 1: Limit orders
     # If limit_order type, the limit price should be provided
-    if order_type == ORDER_TYPE.LIMIT.value.lower() or order_type == ORDER_TYPE.STOP_LIMIT.value.lower():
+    if order_type in LIMIT_TYPES:
         if not limit_price:
             raise KeyError("Limit price must be provided for limit or stop-limit orders.")
 
     # Check 2: (reverse)
     # If limit price provided, order should be limit order
     if limit_price:
-        if order_type != ORDER_TYPE.LIMIT.value.lower() and order_type != ORDER_TYPE.STOP_LIMIT.value.lower():
+        if order_type not in LIMIT_TYPES:
             raise KeyError(f"Incoherent order. Limit price provided, but order type is {order_type}.")
 
 
@@ -327,13 +340,13 @@ def assert_stop_order_coherence(order_type, buy_order: bool, data: Dict,
                                 stop_price=None, limit_price=None):
     # Check 1: Stop-containers orders
     # If stop_order type, the stop price should be provided
-    if order_type == ORDER_TYPE.STOP_MARKET.value.lower():
+    if order_type == STOP_MARKET:
         if not stop_price:
             raise KeyError("Stop price must be provided for stop-containers orders.")
 
     # Check 2: Stop-limit orders
     # If stop_order type with limit, the stop price should be provided and below limit
-    elif order_type == ORDER_TYPE.STOP_LIMIT.value.lower():
+    elif order_type == STOP_LIMIT:
         if not stop_price:
             raise KeyError("Stop price must be provided for stop-limit orders.")
 
@@ -354,5 +367,5 @@ def assert_stop_order_coherence(order_type, buy_order: bool, data: Dict,
 
 def assert_cancellation_order_type(order_type):
     # Check 1: Order type must be either limit or stop. Default to 'all'
-    if order_type == ORDER_TYPE.MARKET.value.lower():
+    if order_type == MARKET:
         raise KeyError(f"Incoherent cancellation order type ({order_type}).")
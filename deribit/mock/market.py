@@ -0,0 +1,299 @@
+# Core
+import time
+import random
+import datetime as dt
+
+# Local
+from utilities.time import int_to_month
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Currencies listed, with their starting price
+MOCK_PRICES = {"BTC": 50000.0, "ETH": 3000.0}
+
+# Listed expiries (days from today, on Fridays) and option strikes
+# (relative to the starting price)
+MOCK_EXPIRIES = (7, 35, 91)
+MOCK_STRIKES = (0.8, 0.9, 1.0, 1.1, 1.2)
+
+# Price levels on each side of the books, tick size (relative to price)
+BOOK_LEVELS = 50
+TICK = 0.0001
+
+# Random walk of the mid price, per book change (relative)
+PRICE_STEP = 0.00005
+
+# Expiry time of the instruments (UTC)
+EXPIRY_HOUR = 8
+
+# Trades already printed on each instrument, one per second until now
+TRADE_HISTORY = 20000
+
+
+# ####################################################################
+# INSTRUMENTS
+# ####################################################################
+
+def expiry_code(date: dt.date):
+    # e.g. 27DEC30
+    return f"{date.day}{int_to_month(date.month)}{date.strftime('%y')}"
+
+
+def listed_expiries(today: dt.date = None):
+    today = today or dt.datetime.utcnow().date()
+    expiries = []
+    for days in MOCK_EXPIRIES:
+        date = today + dt.timedelta(days=days)
+        expiries.append(date + dt.timedelta(days=(4 - date.weekday()) % 7))
+    return expiries
+
+
+def mock_instruments(prices=None, today: dt.date = None):
+    """
+    Instruments listed by the mock exchange: one perpetual, a few
+    futures and options on each of them, per currency.
+    :return: List of instruments (dict, as returned by public/get_instruments).
+    """
+    prices = prices or MOCK_PRICES
+    now_ms = int(time.time() * 1000)
+    instruments = []
+
+    for currency, price in prices.items():
+        tick_size = round(price * TICK, 2) or 0.01
+
+        def instrument(name, kind, expiry=None, **kwargs):
+            expiration = 32503680000000
+            if expiry is not None:
+                expiration = int(dt.datetime(expiry.year, expiry.month, expiry.day, EXPIRY_HOUR,
+                                             tzinfo=dt.timezone.utc).timestamp() * 1000)
+            return {"instrument_name": name,
+                    "kind": kind,
+                    "base_currency": currency,
+                    "quote_currency": "USD",
+                    "settlement_period": "perpetual" if expiry is None else "month",
+                    "creation_timestamp": now_ms,
+                    "expiration_timestamp": expiration,
+                    "is_active": True,
+                    "tick_size": tick_size if kind == "future" else 0.0005,
+                    "min_trade_amount": 10.0 if kind == "future" else 0.1,
+                    "contract_size": 10.0 if kind == "future" else 1.0,
+                    **kwargs}
+
+        instruments.append(instrument(f"{currency}-PERPETUAL", "future"))
+
+        for expiry in listed_expiries(today):
+            code = expiry_code(expiry)
+            instruments.append(instrument(f"{currency}-{code}", "future", expiry))
+
+            for strike in MOCK_STRIKES:
+                strike = int(round(price * strike, -2))
+                for option_type in ("call", "put"):
+                    name = f"{currency}-{code}-{strike}-{option_type[0].upper()}"
+                    instruments.append(instrument(name, "option", expiry,
+                                                  strike=float(strike), option_type=option_type))
+
+    return instruments
+
+
+# ####################################################################
+# SYNTHETIC ORDER BOOK
+# ####################################################################
+
+class SyntheticBook(object):
+    """
+    Order book of one instrument following a random walk, producing
+    the notifications of the book, quote and trades channels.
+    """
+
+    def __init__(self, instrument: str, price: float, tick_size: float,
+                 levels: int = BOOK_LEVELS, seed=None, history: int = TRADE_HISTORY):
+
+        self.instrument = instrument
+        self.__tick = tick_size
+        self.__levels = levels
+        self.__seed = seed
+        self.__random = random.Random(seed)
+
+        self.__mid = price
+        self.bids, self.asks = {}, {}
+        self.__fill(self.__mid)
+
+        # Sequence numbers
+        self.change_id = self.__random.randint(1, 10 ** 6)
+        self.trade_seq = history
+        self.__trade_id = history
+
+        # Past trades (before the book was created)
+        self.__price = price
+        self.__history = history
+        self.__history_end = int(time.time() * 1000)
+
+    def __round(self, price):
+        return round(round(price / self.__tick) * self.__tick, 8)
+
+    def __amount(self):
+        return float(self.__random.randint(1, 100) * 10)
+
+    def __fill(self, mid):
+        for i in range(1, self.__levels + 1):
+            self.bids[self.__round(mid - i * self.__tick)] = self.__amount()
+            self.asks[self.__round(mid + i * self.__tick)] = self.__amount()
+
+    # ##################################################################
+    # BOOK
+    # ##################################################################
+
+    @property
+    def best_bid(self):
+        return max(self.bids) if self.bids else None
+
+    @property
+    def best_ask(self):
+        return min(self.asks) if self.asks else None
+
+    def snapshot(self, depth: int = None):
+        """
+        :return: Levels as [price, amount] (best first), bids then asks.
+        """
+        bids = sorted(self.bids.items(), reverse=True)[:depth]
+        asks = sorted(self.asks.items())[:depth]
+        return [list(l) for l in bids], [list(l) for l in asks]
+
+    def order_book(self, depth: int = None):
+        # Reply of public/get_order_book
+        bids, asks = self.snapshot(depth)
+        return {"instrument_name": self.instrument,
+                "timestamp": int(time.time() * 1000),
+                "change_id": self.change_id,
+                "bids": bids,
+                "asks": asks,
+                "best_bid_price": bids[0][0] if bids else None,
+                "best_bid_amount": bids[0][1] if bids else 0,
+                "best_ask_price": asks[0][0] if asks else None,
+                "best_ask_amount": asks[0][1] if asks else 0,
+                "mark_price": self.__round(self.__mid),
+                "state": "open"}
+
+    # ##################################################################
+    # NOTIFICATIONS
+    # ##################################################################
+
+    def book_snapshot(self):
+        # First notification of a book channel
+        bids, asks = self.snapshot()
+        return {"type": "snapshot",
+                "timestamp": int(time.time() * 1000),
+                "instrument_name": self.instrument,
+                "change_id": self.change_id,
+                "bids": [["new", p, a] for p, a in bids],
+                "asks": [["new", p, a] for p, a in asks]}
+
+    def book_change(self):
+        """
+        Move the book a little (mid price, a few levels).
+        :return: Notification of the book channel (type 'change').
+        """
+        self.__mid *= 1.0 + self.__random.gauss(0.0, PRICE_STEP)
+        bid_limit, ask_limit = self.__round(self.__mid - self.__tick), self.__round(self.__mid + self.__tick)
+
+        changes = {"bids": [], "asks": []}
+        for side, levels, crossed in (("bids", self.bids, lambda p: p > bid_limit),
+                                      ("asks", self.asks, lambda p: p < ask_limit)):
+
+            # Levels crossed by the new mid price
+            for price in [p for p in levels if crossed(p)]:
+                del levels[price]
+                changes[side].append(["delete", price, 0.0])
+
+            # A few levels updated, created or deleted
+            best = bid_limit if side == "bids" else ask_limit
+            sign = -1 if side == "bids" else 1
+            for _ in range(self.__random.randint(1, 3)):
+                price = self.__round(best + sign * self.__random.randint(0, self.__levels - 1) * self.__tick)
+                if price in levels and self.__random.random() < 0.2 and len(levels) > 1:
+                    del levels[price]
+                    changes[side].append(["delete", price, 0.0])
+                else:
+                    action = "change" if price in levels else "new"
+                    levels[price] = self.__amount()
+                    changes[side].append([action, price, levels[price]])
+
+        prev_change_id = self.change_id
+        self.change_id += 1
+        return {"type": "change",
+                "timestamp": int(time.time() * 1000),
+                "instrument_name": self.instrument,
+                "prev_change_id": prev_change_id,
+                "change_id": self.change_id,
+                "bids": changes["bids"],
+                "asks": changes["asks"]}
+
+    def quote(self):
+        # Notification of the quote channel
+        bid, ask = self.best_bid, self.best_ask
+        return {"instrument_name": self.instrument,
+                "timestamp": int(time.time() * 1000),
+                "best_bid_price": bid,
+                "best_bid_amount": self.bids.get(bid, 0.0),
+                "best_ask_price": ask,
+                "best_ask_amount": self.asks.get(ask, 0.0)}
+
+    def trades(self, count: int = 1):
+        """
+        :return: Notification of the trades channel (list of trades).
+        """
+        trades = []
+        for _ in range(count):
+            self.trade_seq += 1
+            self.__trade_id += 1
+            direction = "buy" if self.__random.random() < 0.5 else "sell"
+            price = self.best_ask if direction == "buy" else self.best_bid
+            trades.append({"trade_seq": self.trade_seq,
+                           "trade_id": f"{self.instrument}-{self.__trade_id}",
+                           "timestamp": int(time.time() * 1000),
+                           "instrument_name": self.instrument,
+                           "direction": direction,
+                           "price": price,
+                           "amount": self.__amount(),
+                           "tick_direction": 0,
+                           "index_price": self.__round(self.__mid)})
+        return trades
+
+    def history(self, start_seq: int, end_seq: int):
+        """
+        Past trades, the same for a given seed whatever the range asked.
+        :return: Trades from start_seq to end_seq (included), oldest first.
+        """
+        trades = []
+        for seq in range(max(1, start_seq), min(end_seq, self.__history) + 1):
+            draw = random.Random(f"{self.__seed}-{self.instrument}-{seq}")
+            direction = "buy" if draw.random() < 0.5 else "sell"
+            trades.append({"trade_seq": seq,
+                           "trade_id": f"{self.instrument}-{seq}",
+                           "timestamp": self.__history_end - (self.__history - seq + 1) * 1000,
+                           "instrument_name": self.instrument,
+                           "direction": direction,
+                           "price": self.__round(self.__price * (1.0 + draw.gauss(0.0, 0.01))),
+                           "amount": float(draw.randint(1, 100) * 10),
+                           "tick_direction": 0,
+                           "index_price": self.__round(self.__price)})
+        return trades
+
+    def last_trades(self, start_seq: int = None, end_seq: int = None, count: int = 10, sorting: str = None):
+        """
+        Reply of public/get_last_trades_by_instrument, over the past
+        trades only (those streamed since are not kept).
+        """
+        last = self.__history
+        end_seq = last if end_seq is None else min(end_seq, last)
+        start_seq = max(1, end_seq - count + 1) if start_seq is None else start_seq
+
+        trades = self.history(start_seq, end_seq)
+        has_more = len(trades) > count
+        if sorting == "asc":
+            trades = trades[:count]
+        else:
+            trades = trades[::-1][:count]
+        return {"trades": trades, "has_more": has_more}
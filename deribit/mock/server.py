@@ -0,0 +1,610 @@
+# Core
+import time
+import asyncio
+import logging
+import secrets
+import argparse
+import threading
+
+# External frameworks
+from aiohttp import web, WSMsgType
+
+# Local apps
+from utilities import json
+from deribit.mock.market import MOCK_PRICES, SyntheticBook, mock_instruments
+from deribit.support.networking import (PROTOCOL,
+                                        PROTOCOL_VERSION,
+                                        RESP_ERROR,
+                                        RESP_ERR_CODE,
+                                        RESP_ERR_MESSAGE,
+                                        RESP_CONTENT,
+                                        RESP_TS_IN,
+                                        RESP_TS_OUT)
+from deribit.support.endpoints import *
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 8765
+MOCK_PATH = "/ws/api/v2"
+
+# Delay before each reply (seconds)
+MOCK_LATENCY = 0.0
+
+# Notifications per second, per channel subscribed
+MOCK_STREAM_RATE = 10.0
+
+# Lifetime of the access tokens (seconds)
+MOCK_TOKEN_LIFETIME = 900
+
+# Price of the options (premium), in currency
+OPTION_PRICE = 0.05
+
+# Error codes (as sent by the exchange)
+ERR_UNAUTHORIZED = 13009
+ERR_INVALID_CREDENTIALS = 13004
+ERR_INVALID_PARAMS = -32602
+ERR_METHOD_NOT_FOUND = -32601
+ERR_INSTRUMENT_NOT_FOUND = 10009
+ERR_TEST_EXCEPTION = 11000
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ####################################################################
+# ERRORS
+# ####################################################################
+
+class MockError(Exception):
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# ####################################################################
+# MARKET (SHARED BY ALL CONNECTIONS)
+# ####################################################################
+
+class MockMarket(object):
+    """
+    State of the mock exchange: instruments, synthetic books, orders
+    and tokens. Not thread safe: used from the server loop only.
+    """
+
+    def __init__(self, prices=None, key=None, secret=None, seed=None):
+        self.instruments = {i["instrument_name"]: i for i in mock_instruments(prices or MOCK_PRICES)}
+        self.__prices = prices or MOCK_PRICES
+        self.__seed = seed
+        self.__books = {}
+
+        # Credentials accepted (any if not provided), refresh tokens issued
+        self.__key = key
+        self.__secret = secret
+        self.__refresh_tokens = set()
+
+        # Orders, by id
+        self.orders = {}
+        self.__order_id = 0
+
+    def book(self, instrument):
+        book = self.__books.get(instrument, None)
+        if book is not None:
+            return book
+
+        spec = self.instruments.get(instrument, None)
+        if spec is None:
+            raise MockError(ERR_INSTRUMENT_NOT_FOUND, "instrument_not_found")
+
+        price = self.__prices[spec["base_currency"]] if spec["kind"] == "future" else OPTION_PRICE
+        book = self.__books[instrument] = SyntheticBook(instrument, price, spec["tick_size"], seed=self.__seed)
+        return book
+
+    def select(self, currency=None, kind=None):
+        return [i for i in self.instruments.values()
+                if (not currency or i["base_currency"] == currency.upper())
+                and (not kind or kind == "any" or i["kind"] == kind)]
+
+    # ##################################################################
+    # TOKENS
+    # ##################################################################
+
+    def login(self, params):
+        grant_type = params.get("grant_type", None)
+
+        if grant_type == "client_credentials":
+            if self.__key is not None and (params.get("client_id", None) != self.__key
+                                           or params.get("client_secret", None) != self.__secret):
+                raise MockError(ERR_INVALID_CREDENTIALS, "invalid_credentials")
+
+        elif grant_type == "refresh_token":
+            refresh_token = params.get("refresh_token", None)
+            if refresh_token not in self.__refresh_tokens:
+                raise MockError(ERR_INVALID_CREDENTIALS, "invalid_token")
+            self.__refresh_tokens.discard(refresh_token)
+
+        else:
+            raise MockError(ERR_INVALID_PARAMS, "Invalid params")
+
+        refresh_token = secrets.token_hex(16)
+        self.__refresh_tokens.add(refresh_token)
+        return {"access_token": secrets.token_hex(16),
+                "refresh_token": refresh_token,
+                "expires_in": MOCK_TOKEN_LIFETIME,
+                "scope": "connection session:mock trade:read_write",
+                "token_type": "bearer"}
+
+    # ##################################################################
+    # ORDERS
+    # ##################################################################
+
+    def order(self, direction, params):
+        instrument = params.get("instrument_name", None)
+        amount = params.get("amount", None)
+        if not instrument or not amount:
+            raise MockError(ERR_INVALID_PARAMS, "Invalid params")
+
+        book = self.book(instrument)
+        order_type = params.get("type", "limit")
+        price = params.get("price", params.get("limit_price", None))
+        market = order_type == "market" or price is None
+
+        self.__order_id += 1
+        order = {"order_id": f"MOCK-{self.__order_id}",
+                 "instrument_name": instrument,
+                 "direction": direction,
+                 "amount": amount,
+                 "price": price if not market else (book.best_ask if direction == "buy" else book.best_bid),
+                 "order_type": order_type,
+                 "order_state": "filled" if market else "open",
+                 "filled_amount": amount if market else 0.0,
+                 "time_in_force": params.get("time_in_force", "good_til_cancelled"),
+                 "post_only": params.get("post_only", False),
+                 "reduce_only": params.get("reduce_only", False),
+                 "label": params.get("label", ""),
+                 "creation_timestamp": int(time.time() * 1000),
+                 "last_update_timestamp": int(time.time() * 1000)}
+
+        trades = []
+        if market:
+            trades = [dict(trade, direction=direction, amount=amount, price=order["price"],
+                           order_id=order["order_id"]) for trade in book.trades(1)]
+        else:
+            self.orders[order["order_id"]] = order
+
+        return {"order": order, "trades": trades}
+
+    def cancel(self, currency=None, instrument=None):
+        cancelled = [id_ for id_, o in self.orders.items()
+                     if (not instrument or o["instrument_name"] == instrument)
+                     and (not currency or self.instruments[o["instrument_name"]]["base_currency"] == currency.upper())]
+        for id_ in cancelled:
+            del self.orders[id_]
+        return len(cancelled)
+
+
+# ####################################################################
+# CONNECTION
+# ####################################################################
+
+class MockConnection(object):
+    """
+    One websocket connection: replies to the requests, sends the
+    heartbeats and the notifications of the channels subscribed.
+    """
+
+    def __init__(self, ws, server):
+        self.__ws = ws
+        self.__server = server
+        self.__market = server.market
+
+        self.authenticated = False
+        self.__heartbeat = None
+        self.__streams = {}
+        self.__replies = set()
+
+        # Frames to send, written in order by a single task
+        self.__outbox = asyncio.Queue()
+
+        self.__handlers = {SESSION_LOGIN: self.__auth,
+                           SESSION_LOGOUT: self.__logout,
+                           SESSION_GET_TIME: lambda p: int(time.time() * 1000),
+                           SESSION_TEST: self.__test,
+                           SESSION_SET_HEARTBEAT: self.__set_heartbeat,
+                           SESSION_DISABLE_HEARTBEAT: self.__disable_heartbeat,
+                           SESSION_ENABLE_CANCEL_ON_DISCONNECT: lambda p: "ok",
+                           SESSION_DISABLE_CANCEL_ON_DISCONNECT: lambda p: "ok",
+                           DATA_GET_ORDER_BOOK: self.__get_order_book,
+                           DATA_GET_INSTRUMENTS: self.__get_instruments,
+                           DATA_LAST_TRADES_BY_INSTRUMENT: self.__get_last_trades,
+                           TRADING_BUY: lambda p: self.__market.order("buy", p),
+                           TRADING_SELL: lambda p: self.__market.order("sell", p),
+                           TRADING_CANCEL_ALL: lambda p: self.__market.cancel(),
+                           TRADING_CANCEL_ALL_BY_CURRENCY: lambda p: self.__market.cancel(currency=p.get("currency")),
+                           TRADING_CANCEL_ALL_BY_INSTRUMENT: lambda p: self.__market.cancel(
+                               instrument=p.get("instrument_name")),
+                           METHOD_SUBSCRIBE: self.__subscribe,
+                           METHOD_PRIVATE_SUBSCRIBE: self.__subscribe,
+                           METHOD_UNSUBSCRIBE: self.__unsubscribe,
+                           METHOD_PRIVATE_UNSUBSCRIBE: self.__unsubscribe}
+
+    async def serve(self):
+        writer = asyncio.ensure_future(self.__write_forever())
+        try:
+            async for frame in self.__ws:
+                if frame.type == WSMsgType.TEXT:
+                    self.__on_request(frame.data)
+                elif frame.type == WSMsgType.ERROR:
+                    break
+        finally:
+            writer.cancel()
+            self.close()
+
+    async def __write_forever(self):
+        while True:
+            message = await self.__outbox.get()
+            if self.__ws.closed:
+                return
+            await self.__ws.send_str(json.encode_str(message))
+
+    def close(self):
+        for task in [self.__heartbeat, *self.__streams.values(), *self.__replies]:
+            if task is not None:
+                task.cancel()
+        self.__heartbeat = None
+        self.__streams = {}
+
+    # ##################################################################
+    # REQUESTS
+    # ##################################################################
+
+    def __on_request(self, data):
+        us_in = int(time.time() * 1e6)
+        try:
+            request = json.decode(data)
+        except ValueError:
+            logger.warning(f"Invalid frame received: {data[:100]}")
+            return
+
+        id_ = request.get("id", None)
+        method = request.get("method", None)
+        reply = {PROTOCOL: PROTOCOL_VERSION, "id": id_}
+
+        try:
+            handler = self.__handlers.get(method, None)
+            if handler is None:
+                raise MockError(ERR_METHOD_NOT_FOUND, "Method not found")
+            if method.startswith("private/") and not self.authenticated:
+                raise MockError(ERR_UNAUTHORIZED, "unauthorized")
+            reply[RESP_CONTENT] = handler(request.get("params", None) or {})
+
+        except MockError as e:
+            reply[RESP_ERROR] = {RESP_ERR_CODE: e.code, RESP_ERR_MESSAGE: e.message}
+
+        reply[RESP_TS_IN] = us_in
+
+        latency = self.__server.latency
+        latency = latency() if callable(latency) else latency
+        if latency > 0:
+            task = asyncio.ensure_future(self.__reply_later(reply, latency))
+            self.__replies.add(task)
+            task.add_done_callback(self.__replies.discard)
+        else:
+            self.__send(reply)
+
+    async def __reply_later(self, reply, latency):
+        await asyncio.sleep(latency)
+        self.__send(reply)
+
+    def __send(self, message):
+        if RESP_TS_IN in message:
+            message[RESP_TS_OUT] = int(time.time() * 1e6)
+        self.__outbox.put_nowait(message)
+
+    # ##################################################################
+    # SESSION
+    # ##################################################################
+
+    def __auth(self, params):
+        result = self.__market.login(params)
+        self.authenticated = True
+        return result
+
+    def __logout(self, params):
+        self.authenticated = False
+        asyncio.ensure_future(self.__ws.close())
+        return "ok"
+
+    def __test(self, params):
+        if params.get("expected_result", None) == "exception":
+            raise MockError(ERR_TEST_EXCEPTION, "Test exception")
+        return {"version": "mock"}
+
+    def __set_heartbeat(self, params):
+        interval = params.get("interval", None)
+        if not interval:
+            return self.__disable_heartbeat(params)
+        if self.__heartbeat is not None:
+            self.__heartbeat.cancel()
+        self.__heartbeat = asyncio.ensure_future(self.__send_heartbeats(float(interval)))
+        return "ok"
+
+    def __disable_heartbeat(self, params):
+        if self.__heartbeat is not None:
+            self.__heartbeat.cancel()
+            self.__heartbeat = None
+        return "ok"
+
+    async def __send_heartbeats(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.__send({PROTOCOL: PROTOCOL_VERSION, "method": "heartbeat", "params": {"type": "test_request"}})
+
+    # ##################################################################
+    # MARKET DATA
+    # ##################################################################
+
+    def __get_order_book(self, params):
+        instrument = params.get("instrument_name", None)
+        if not instrument:
+            raise MockError(ERR_INVALID_PARAMS, "Invalid params")
+        return self.__market.book(instrument).order_book(params.get("depth", None))
+
+    def __get_last_trades(self, params):
+        instrument = params.get("instrument_name", None)
+        if not instrument:
+            raise MockError(ERR_INVALID_PARAMS, "Invalid params")
+        return self.__market.book(instrument).last_trades(start_seq=params.get("start_seq", None),
+                                                          end_seq=params.get("end_seq", None),
+                                                          count=min(1000, params.get("count", 10)),
+                                                          sorting=params.get("sorting", None))
+
+    def __get_instruments(self, params):
+        currency = params.get("currency", None)
+        if not currency:
+            raise MockError(ERR_INVALID_PARAMS, "Invalid params")
+        if str(params.get("expired", False)).lower() == "true":
+            return []
+        return self.__market.select(currency, params.get("kind", None))
+
+    # ##################################################################
+    # SUBSCRIPTIONS
+    # ##################################################################
+
+    def __subscribe(self, params):
+        subscribed = []
+        for channel in params.get("channels", None) or []:
+            if channel not in self.__streams:
+                stream = self.__stream(channel)
+                if stream is None:
+                    continue
+                self.__streams[channel] = asyncio.ensure_future(stream)
+            subscribed.append(channel)
+        return subscribed
+
+    def __unsubscribe(self, params):
+        unsubscribed = []
+        for channel in params.get("channels", None) or []:
+            task = self.__streams.pop(channel, None)
+            if task is not None:
+                task.cancel()
+                unsubscribed.append(channel)
+        return unsubscribed
+
+    def __stream(self, channel):
+        """
+        :return: Coroutine sending the notifications of a channel (None if not supported).
+        """
+        parts = channel.split(".")
+        kind = parts[0]
+
+        try:
+            if kind == "book" and len(parts) >= 3:
+                book = self.__market.book(parts[1])
+                return self.__notify(channel, book.book_change, first=book.book_snapshot)
+
+            if kind == "quote" and len(parts) == 2:
+                return self.__notify(channel, self.__market.book(parts[1]).quote)
+
+            # trades.{instrument}.{interval} or trades.{kind}.{currency}.{interval}
+            if kind == "trades" and len(parts) == 3:
+                return self.__notify(channel, self.__market.book(parts[1]).trades)
+
+            if kind == "trades" and len(parts) == 4:
+                instruments = self.__market.select(parts[2], parts[1])
+                if instruments:
+                    books = [self.__market.book(i["instrument_name"]) for i in instruments]
+                    return self.__notify(channel, lambda: books[int(time.time() * 1e6) % len(books)].trades())
+
+        except MockError:
+            pass
+
+        logger.warning(f"Channel not supported by the mock server: {channel}")
+        return None
+
+    async def __notify(self, channel, data, first=None):
+        loop = asyncio.get_event_loop()
+
+        if first is not None:
+            self.__send(self.__notification(channel, first()))
+
+        # Fixed rate: the deadlines do not drift with the time spent sending
+        deadline = loop.time()
+        while True:
+            deadline += 1.0 / self.__server.rate
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            self.__send(self.__notification(channel, data()))
+
+    @staticmethod
+    def __notification(channel, data):
+        # Keys in the order of the exchange: the envelope comes first
+        return {PROTOCOL: PROTOCOL_VERSION, "method": "subscription",
+                "params": {"channel": channel, "data": data}}
+
+
+# ####################################################################
+# SERVER
+# ####################################################################
+
+class MockServer(object):
+    """
+    Local stand-in for the exchange, speaking the subset of the JSON-RPC
+    API used by deribit/messages (session, order book, instruments,
+    orders, subscriptions), with a configurable reply latency and
+    synthetic book, quote and trades streams.
+
+    Either awaited (start/stop) from a running loop, or run in a
+    background thread (run_in_thread/shutdown) for the threaded clients.
+    """
+
+    def __init__(self, host: str = MOCK_HOST, port: int = MOCK_PORT,
+                 latency=MOCK_LATENCY, rate: float = MOCK_STREAM_RATE,
+                 key=None, secret=None, prices=None, seed=None):
+        """
+        :param latency: Delay before each reply (seconds), or callable returning it.
+        :param rate: Notifications per second, per channel subscribed.
+        :param key: Credentials accepted (default: any).
+        :param prices: Starting price by currency (default: MOCK_PRICES).
+        :param seed: Seed of the random walks (default: random).
+        """
+        self.__host = host
+        self.__port = port
+        self.latency = latency
+        self.rate = rate
+        self.market = MockMarket(prices=prices, key=key, secret=secret, seed=seed)
+
+        self.__runner = None
+        self.__connections = set()
+
+        # Background thread
+        self.__loop = None
+        self.__thread = None
+
+    @property
+    def url(self):
+        return f"ws://{self.__host}:{self.__port}{MOCK_PATH}"
+
+    @property
+    def connections(self):
+        return len(self.__connections)
+
+    # ##################################################################
+    # ASYNCIO
+    # ##################################################################
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get(MOCK_PATH, self.__handle)
+
+        self.__runner = web.AppRunner(app)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, self.__host, self.__port)
+        await site.start()
+
+        # Port picked by the system (port=0)
+        if not self.__port:
+            self.__port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Mock server listening on {self.url}")
+
+    async def stop(self):
+        for ws in list(self.__connections):
+            await ws.close()
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.stop()
+
+    async def drop_connections(self):
+        """
+        Close every connection (e.g. to exercise the reconnections).
+        """
+        for ws in list(self.__connections):
+            await ws.close()
+
+    async def __handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        self.__connections.add(ws)
+        try:
+            await MockConnection(ws, self).serve()
+        finally:
+            self.__connections.discard(ws)
+        return ws
+
+    # ##################################################################
+    # BACKGROUND THREAD
+    # ##################################################################
+
+    def run_in_thread(self):
+        """
+        Start the server on its own loop, in a daemon thread.
+        :return: Url of the server (once listening).
+        """
+        started = threading.Event()
+
+        def run():
+            self.__loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.__loop)
+            self.__loop.run_until_complete(self.start())
+            started.set()
+            self.__loop.run_forever()
+
+        self.__thread = threading.Thread(target=run, name="MOCK-SERVER", daemon=True)
+        self.__thread.start()
+        started.wait()
+        return self.url
+
+    def call(self, coroutine, timeout: float = None):
+        """
+        Run a coroutine (e.g. drop_connections()) on the server loop.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop).result(timeout)
+
+    def shutdown(self):
+        if self.__loop is None:
+            return
+        self.call(self.stop())
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
+        self.__loop, self.__thread = None, None
+
+
+# ####################################################################
+# STANDALONE
+# ####################################################################
+
+if __name__ == "__main__":
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Local mock of the exchange websocket API.")
+    parser.add_argument("--host", default=MOCK_HOST)
+    parser.add_argument("--port", type=int, default=MOCK_PORT)
+    parser.add_argument("--latency", type=float, default=MOCK_LATENCY, help="reply delay (seconds)")
+    parser.add_argument("--rate", type=float, default=MOCK_STREAM_RATE, help="notifications/s per channel")
+    args = parser.parse_args()
+
+    async def main():
+        async with MockServer(host=args.host, port=args.port, latency=args.latency, rate=args.rate):
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,13 +1,14 @@
 import datetime as dt
 
+from deribit.parsers.instruments import expiry_timestamp
+
 DATE_FORMAT = "%d%b%y"
 EXPIRY_HOUR_UTC_AS_TIME_DELTA = dt.timedelta(hours=8.0)
 
 
 def timestamp_from_instrument_name(instrument_name):
-    date_str = string_from_instrument_name(instrument_name)
-    dt_obj = dt.datetime.strptime(date_str, DATE_FORMAT) + EXPIRY_HOUR_UTC_AS_TIME_DELTA
-    return dt_obj.timestamp()
+    # Expiry codes parsed once (08:00 UTC)
+    return expiry_timestamp(string_from_instrument_name(instrument_name))
 
 
 def string_from_instrument_name(instrument_name):
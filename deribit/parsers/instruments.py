@@ -0,0 +1,93 @@
+import calendar
+
+import numpy as np
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Instruments parsed: underlying, expiry (seconds since epoch, 08:00 UTC,
+# NaN if none), strike (NaN unless an option), option type
+INSTRUMENT_DTYPE = np.dtype([("underlying", "U16"),
+                             ("expiry", np.float64),
+                             ("strike", np.float64),
+                             ("option_type", np.int8)])  # 1: call, -1: put, 0: not an option
+
+CALL = 1
+PUT = -1
+
+OPTION_TYPES = {"C": CALL, "P": PUT}
+
+MONTHS = {"JAN": 1, "FEB": 2, "MAR": 3,
+          "APR": 4, "MAY": 5, "JUN": 6,
+          "JUL": 7, "AUG": 8, "SEP": 9,
+          "OCT": 10, "NOV": 11, "DEC": 12}
+
+EXPIRY_HOUR_UTC = 8
+
+# Names kept parsed (the cache is emptied beyond)
+MAX_CACHED_NAMES = 1 << 17
+
+# Expiry codes parsed (e.g. 27DEC24), and names parsed
+__expiries = {}
+__names = {}
+
+
+# ####################################################################
+# EXPIRY CODES
+# ####################################################################
+
+def expiry_timestamp(code: str):
+    """
+    :param code: Expiry as in the instrument names (e.g. 27DEC24).
+    :return: Expiry (seconds since epoch, 08:00 UTC).
+    """
+    timestamp = __expiries.get(code, None)
+    if timestamp is None:
+        timestamp = __expiries[code] = __parse_expiry(code)
+    return timestamp
+
+
+def __parse_expiry(code):
+    try:
+        day, month, year = int(code[:-5]), MONTHS[code[-5:-2].upper()], 2000 + int(code[-2:])
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid expiry code ({code}).")
+    return float(calendar.timegm((year, month, day, EXPIRY_HOUR_UTC, 0, 0)))
+
+
+# ####################################################################
+# INSTRUMENT NAMES
+# ####################################################################
+
+def parse_instrument(name: str):
+    """
+    :param name: e.g. BTC-27DEC24-50000-C, BTC-27DEC24, BTC-PERPETUAL.
+    :return: Underlying, expiry, strike, option type (tuple, see INSTRUMENT_DTYPE).
+    """
+    parsed = __names.get(name, None)
+    if parsed is not None:
+        return parsed
+
+    parts = name.split("-")
+    expiry, strike, option_type = np.nan, np.nan, 0
+
+    if len(parts) > 1 and parts[1][:1].isdigit():
+        expiry = expiry_timestamp(parts[1])
+    if len(parts) == 4:
+        # Decimal strikes are written with a 'd' (e.g. 0d625)
+        strike = float(parts[2].replace("d", "."))
+        option_type = OPTION_TYPES.get(parts[3], 0)
+
+    if len(__names) >= MAX_CACHED_NAMES:
+        __names.clear()
+    parsed = __names[name] = (parts[0], expiry, strike, option_type)
+    return parsed
+
+
+def parse_instruments(names):
+    """
+    :param names: Instrument names (e.g. a whole option chain).
+    :return: Structured array (INSTRUMENT_DTYPE), one record per name, in order.
+    """
+    return np.array([parse_instrument(n) for n in names], dtype=INSTRUMENT_DTYPE)
@@ -115,7 +115,7 @@ class DeltaSyncRequestClient(object):
     def _on_message(self, ws, message):
 
         # Parse the message to python data
-        answer = json_util.loads(message)
+        answer = json_util.decode(message)
 
         # Detect heartbeat request to keep socket alive
         params = answer.get("params")
@@ -130,7 +130,7 @@ class DeltaSyncRequestClient(object):
             # to their heartbeat
             if type_ == "test_request":
                 hb_resp_msg = session.test_heartbeat_request_message()
-                self.ws.send(json_util.dumps(hb_resp_msg))
+                self.ws.send(json_util.encode(hb_resp_msg))
                 return
 
         # Extract id_
@@ -166,7 +166,7 @@ class DeltaSyncRequestClient(object):
         self.__sent_messages[id_] = credentials
         self.__sent_messages_callbacks[id_] = self._on_login
 
-        ws.send(json_util.dumps(credentials))
+        ws.send(json_util.encode(credentials))
 
     def _on_login(self, message):
 
@@ -178,7 +178,7 @@ class DeltaSyncRequestClient(object):
 
             # Enable heartbeat
             enable_heartbeat_msg = session.set_heartbeat_message()
-            self.ws.send(json_util.dumps(enable_heartbeat_msg))
+            self.ws.send(json_util.encode(enable_heartbeat_msg))
 
 
         else:
@@ -279,7 +279,7 @@ class DeltaSyncRequestClient(object):
                 msg, cb = msg_tuple[0], msg_tuple[1]
 
                 id_ = msg["id"]
-                self.ws.send(json_util.dumps(msg))
+                self.ws.send(json_util.encode(msg))
                 self.__sent_messages[id_] = msg
 
                 if cb:
@@ -6,13 +6,9 @@ import string
 import websocket
 import threading
 
-try:
-    import ujson as json
-except ImportError:
-    import json
-
 
 from .monitor import WebsocketMonitor
+from utilities import json
 from utilities.id import  generate_id
 
 # ##################################################################
@@ -65,7 +61,7 @@ class DeltaWebsocketClient(abc.ABC):
         return self.__ws
 
     def on_message(self, ws, message):
-        msg = json.loads(message)
+        msg = json.decode(message)
         return self.monitored_callback(msg)
 
     def on_error(self, ws, message):
@@ -89,7 +85,7 @@ class DeltaWebsocketClient(abc.ABC):
         print("Closing connection to delta.")
 
     def send_message(self, message):
-        return self._ws.send(json.dumps(message))
+        return self._ws.send(json.encode(message))
 
     # ####################################################################
     # SOCKET MANAGEMENT
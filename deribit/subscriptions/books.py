@@ -0,0 +1,237 @@
+import time
+import logging
+
+from containers.orderbook import OrderBook
+from deribit.messages import mkt_data, session
+from deribit.support.networking import RESP_ERROR, RESP_CONTENT
+from deribit.support.types import INTERVAL, PUBLIC_CHANNELS
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Levels requested for a snapshot (the whole book)
+SNAPSHOT_DEPTH = 10000
+
+# Notifications kept while a snapshot is requested, per instrument:
+# beyond that, the oldest are dropped and the snapshot must be newer
+MAX_BUFFERED = 10000
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ####################################################################
+# BOOK STATE (ONE INSTRUMENT)
+# ####################################################################
+
+class BookState(object):
+    """
+    Book of one instrument, and where its synchronization stands.
+    """
+
+    __slots__ = ("book", "channel", "valid", "resyncing", "buffer", "resync_started")
+
+    def __init__(self, instrument, channel):
+        self.book = OrderBook(instrument)
+        self.channel = channel
+
+        # Continuous since the last snapshot
+        self.valid = False
+
+        # Snapshot requested: notifications are buffered meanwhile
+        self.resyncing = False
+        self.buffer = []
+        self.resync_started = None
+
+
+# ####################################################################
+# BOOK SYNCHRONIZATION
+# ####################################################################
+
+class BookSync(object):
+    """
+    Order books maintained from the book channels of a UnifiedClient,
+    checked for continuity: each change must follow the previous one
+    (prev_change_id). On a gap, the book is flagged invalid, the changes
+    received are buffered while a snapshot is requested, then replayed
+    on top of it: no need to resubscribe.
+
+    Everything about one instrument runs on the dispatcher worker of its
+    channel (snapshot replies included), hence in order and without lock.
+    """
+
+    def __init__(self, client, callback=None, depth: int = SNAPSHOT_DEPTH):
+        """
+        :param client: UnifiedClient (e.g. RequestClient) receiving the notifications.
+        :param callback: Invoked with the OrderBook after each update (valid books only).
+        :param depth: Levels requested for the snapshots.
+        """
+        self.__client = client
+        self.__callback = callback
+        self.__depth = depth
+        self.__states = {}
+
+        # Metrics
+        self.gaps = 0
+        self.resyncs = 0
+        self.failed_resyncs = 0
+        self.resync_time = 0.0
+        self.max_resync_time = 0.0
+
+        client.route(f"{PUBLIC_CHANNELS.ORDERBOOK_UPDATES.value}.", self.on_notification)
+
+    # ##################################################################
+    # SUBSCRIPTION
+    # ##################################################################
+
+    def subscribe(self, instruments, interval: str = INTERVAL.RAW.value):
+        """
+        :param instruments: Instrument names.
+        :param interval: 'raw' or '100ms' (changes), see mkt_data.subscribe_orderbooks for grouped books.
+        """
+        channels = [f"{PUBLIC_CHANNELS.ORDERBOOK_UPDATES.value}.{i}.{interval}" for i in instruments]
+        return self.__client.send_request(session.subscription_message(channels))
+
+    # ##################################################################
+    # QUERIES
+    # ##################################################################
+
+    def book(self, instrument):
+        """
+        :return: OrderBook (None if unknown or invalid).
+        """
+        state = self.__states.get(instrument, None)
+        if state is None or not state.valid:
+            return None
+        return state.book
+
+    def is_valid(self, instrument):
+        state = self.__states.get(instrument, None)
+        return state is not None and state.valid
+
+    @property
+    def invalid(self):
+        return [i for i, s in list(self.__states.items()) if not s.valid]
+
+    def metrics(self):
+        return {"books": len(self.__states),
+                "invalid": self.invalid,
+                "buffered": sum(len(s.buffer) for s in list(self.__states.values())),
+                "gaps": self.gaps,
+                "resyncs": self.resyncs,
+                "failed_resyncs": self.failed_resyncs,
+                "mean_resync_time": self.resync_time / self.resyncs if self.resyncs else None,
+                "max_resync_time": self.max_resync_time}
+
+    # ##################################################################
+    # NOTIFICATIONS
+    # ##################################################################
+
+    def on_notification(self, envelope):
+        data = envelope.data
+        instrument = data.get("instrument_name", None)
+
+        state = self.__states.get(instrument, None)
+        if state is None:
+            state = self.__states[instrument] = BookState(instrument, envelope.channel)
+
+        # Waiting for a snapshot
+        if state.resyncing:
+            return self.__buffer(state, data)
+
+        book = state.book
+        prev_change_id = data.get("prev_change_id", None)
+
+        # Snapshot, grouped book, or the change following the last one
+        if data.get("type", None) == "snapshot" or prev_change_id is None or \
+                (state.valid and prev_change_id == book.change_id):
+            book.apply(data)
+            state.valid = True
+            return self.__notify(book)
+
+        # Gap: frames lost, or changes received before any snapshot
+        if state.valid:
+            self.gaps += 1
+            logger.warning(f"Book {instrument}: gap after change {book.change_id} "
+                           f"(next one follows {prev_change_id}), resynchronizing.")
+        self.__resync(state, data)
+
+    def __buffer(self, state, data):
+        state.buffer.append(data)
+        if len(state.buffer) > MAX_BUFFERED:
+            del state.buffer[0]
+
+    def __notify(self, book):
+        if self.__callback is not None:
+            self.__callback(book)
+
+    # ##################################################################
+    # RESYNCHRONIZATION
+    # ##################################################################
+
+    def __resync(self, state, data=None):
+        state.valid = False
+        state.resyncing = True
+        state.buffer = [data] if data is not None else []
+        if state.resync_started is None:
+            state.resync_started = time.monotonic()
+
+        instrument = state.book.instrument
+        msg = mkt_data.request_orderbook(instrument, self.__depth)
+
+        # The reply is handled on the worker of the channel
+        def on_reply(reply):
+            self.__client.submit(state.channel, lambda r: self.__on_snapshot(state, r), reply)
+
+        self.__client.send_request(msg, callback=on_reply)
+
+    def __on_snapshot(self, state, reply):
+        instrument = state.book.instrument
+
+        snapshot = reply.get(RESP_CONTENT, None)
+        if RESP_ERROR in reply or not snapshot:
+            # Retried with the next change received
+            self.failed_resyncs += 1
+            state.resyncing = False
+            state.buffer = []
+            logger.warning(f"Book {instrument}: snapshot request failed ({reply.get(RESP_ERROR, None)}).")
+            return
+
+        book = state.book
+        book.clear()
+        book.apply({"type": "snapshot", **snapshot})
+        change_id = book.change_id
+
+        # Changes buffered, on top of the snapshot
+        buffered, state.buffer = state.buffer, []
+        for i, data in enumerate(buffered):
+            if data.get("change_id", 0) <= change_id:
+                continue
+
+            if data.get("prev_change_id", None) != book.change_id and data.get("type", None) != "snapshot":
+                # Snapshot older than the changes kept, or gap among them
+                self.failed_resyncs += 1
+                logger.warning(f"Book {instrument}: snapshot {change_id} does not join the changes "
+                               f"buffered, requesting a new one.")
+                self.__resync(state)
+                state.buffer = buffered[i:]
+                return
+            book.apply(data)
+
+        # In sync again
+        elapsed = time.monotonic() - state.resync_started
+        self.resyncs += 1
+        self.resync_time += elapsed
+        self.max_resync_time = max(self.max_resync_time, elapsed)
+
+        state.resync_started = None
+        state.resyncing = False
+        state.valid = True
+        logger.info(f"Book {instrument}: resynchronized in {elapsed:.3f}s "
+                    f"({len(buffered)} change(s) buffered).")
+        self.__notify(book)
@@ -1,5 +1,64 @@
-import queue
-import datetime as dt
+import time
+import numpy as np
+
+
+# ##################################################################
+# CONSTANTS
+# ##################################################################
+
+# Arrival times kept per channel (the most recent ones)
+MONITOR_CAPACITY = 4096
+
+# Burst: at least BURST_MIN_MESSAGES messages, each arriving
+# less than BURST_MAX_GAP (nanoseconds) after the previous one
+BURST_MAX_GAP = 1_000_000
+BURST_MIN_MESSAGES = 10
+
+# Key of the messages not coming from a channel
+NO_CHANNEL = "*"
+
+
+# ##################################################################
+# RING BUFFER
+# ##################################################################
+
+class ArrivalRing(object):
+    """
+    Arrival times (time.monotonic_ns) of the messages of one channel,
+    in a preallocated ring. Written by a single thread without locks:
+    the slot is written before the count is published, readers copy
+    the ring and drop the slots overwritten while they were copying.
+    """
+
+    __slots__ = ("times", "count")
+
+    def __init__(self, capacity: int = MONITOR_CAPACITY):
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+
+    def record(self, timestamp):
+        n = self.count
+        self.times[n % len(self.times)] = timestamp
+        self.count = n + 1
+
+    def snapshot(self):
+        """
+        :return: Arrival times kept (oldest first, numpy array).
+        """
+        capacity = len(self.times)
+
+        before = self.count
+        times = self.times.copy()
+        after = self.count
+
+        # Last slots written, minus those (over)written during the copy:
+        # up to the one of message 'after', possibly half written
+        first = max(0, before - capacity, after + 1 - capacity)
+        if before <= first:
+            return times[:0]
+
+        indices = np.arange(first, before) % capacity
+        return times[indices]
 
 
 # ##################################################################
@@ -7,17 +66,93 @@ import datetime as dt
 # ##################################################################
 
 class WebsocketMonitor(object):
+    """
+    Arrival times of the messages received, by channel, and statistics
+    computed on demand from them (rate, gaps between messages, bursts).
+    Recording costs one clock read and one array write.
+    """
 
-    def __init__(self):
-        self.__intervals = queue.Queue(maxsize=10000)
-        self.__timestamp = dt.datetime.utcnow()
+    def __init__(self, capacity: int = MONITOR_CAPACITY):
+        self.__capacity = capacity
+        self.__rings = {}
+        self.__failures = 0
 
     def received(self, message, *args, **kwargs):
-        ts = dt.datetime.utcnow()
-        self.__intervals.put((ts - self.__timestamp).microseconds)
-        self.__timestamp = ts
+        now = time.monotonic_ns()
+
+        channel = NO_CHANNEL
+        if isinstance(message, dict):
+            channel = message.get("params", {}).get("channel", NO_CHANNEL)
+
+        ring = self.__rings.get(channel, None)
+        if ring is None:
+            ring = self.__rings.setdefault(channel, ArrivalRing(self.__capacity))
+        ring.record(now)
         return message
 
     def failed(self, *args, **kwargs):
-        pass
+        self.__failures += 1
+
+    # ##################################################################
+    # QUERIES
+    # ##################################################################
+
+    @property
+    def channels(self):
+        return list(self.__rings)
+
+    @property
+    def failures(self):
+        return self.__failures
+
+    def snapshot(self, channel=NO_CHANNEL):
+        """
+        :param channel: Channel name.
+        :return: Arrival times kept for that channel (ns, oldest first).
+        """
+        ring = self.__rings.get(channel, None)
+        return ring.snapshot() if ring is not None else np.zeros(0, dtype=np.int64)
+
+    def stats(self, channel=None, burst_gap=BURST_MAX_GAP, burst_size=BURST_MIN_MESSAGES):
+        """
+        :param channel: Channel name (default: every channel, by name).
+        :param burst_gap: Maximum gap (ns) between the messages of a burst.
+        :param burst_size: Minimum number of messages of a burst.
+        :return: Statistics of the arrival times kept (dict, times in microseconds).
+        """
+        if channel is None:
+            return {c: self.stats(c, burst_gap, burst_size) for c in self.channels}
+
+        ring = self.__rings.get(channel, None)
+        times = self.snapshot(channel)
+        stats_ = {"received": ring.count if ring else 0,
+                  "window": len(times),
+                  "rate": None,
+                  "gap_p50": None,
+                  "gap_p99": None,
+                  "gap_max": None,
+                  "bursts": 0,
+                  "largest_burst": 0,
+                  "last_age": (time.monotonic_ns() - int(times[-1])) / 1e3 if len(times) else None}
+
+        if len(times) < 2:
+            return stats_
+
+        gaps = np.diff(times)
+        span = times[-1] - times[0]
+        p50, p99 = np.percentile(gaps, (50, 99))
+
+        stats_["rate"] = float((len(times) - 1) * 1e9 / span) if span > 0 else None
+        stats_["gap_p50"] = float(p50 / 1e3)
+        stats_["gap_p99"] = float(p99 / 1e3)
+        stats_["gap_max"] = float(gaps.max() / 1e3)
+
+        # Runs of short gaps: a run of k gaps is a burst of k + 1 messages
+        short = np.concatenate(([0], (gaps < burst_gap).astype(np.int8), [0]))
+        edges = np.diff(short)
+        runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        bursts = runs[runs + 1 >= burst_size]
 
+        stats_["bursts"] = len(bursts)
+        stats_["largest_burst"] = int(bursts.max()) + 1 if len(bursts) else 0
+        return stats_
@@ -68,8 +68,11 @@ class WebsocketClient(ABC):
         # Messages: information about RECEIVED messages
         self._answers_received = {}
 
+        # Messages: replies awaited by blocking callers (id -> future)
+        self._reply_futures = {}
+
         # Startup precautions
-        self._secured_connection = False
+        self._secured_connection = threading.Event()
 
         # Last unexpected disconnect
         self._disconnect_back_off = 0.25
@@ -160,7 +163,7 @@ class WebsocketClient(ABC):
     def _on_login(self, message):
 
         if not "error" in message:
-            self._secured_connection = True
+            self._secured_connection.set()
             print("Web socket opened.")
 
             self._disconnect_back_off = 0.25
@@ -191,6 +194,7 @@ class WebsocketClient(ABC):
         else:
             logger.warning("Connection ended unexpectedly. Reconnecting to web socket server.")
             self.__ws = None
+            self._secured_connection.clear()
 
             # Back off:
             self._disconnect_back_off *= 2
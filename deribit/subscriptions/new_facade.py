@@ -9,8 +9,14 @@ from deribit.subscriptions.new_sub import SubscriptionClient
 # THIS IS SECOND ATTEMPT
 # from deribit.subscriptions.new_mix_both import UnifiedClient
 from deribit.unified.requests import RequestClient
+from deribit.unified.pool import PooledRequestClient
 
 from deribit.subscriptions.clients import *
+from deribit.support.limits import RateLimiter
+from deribit.unified.tokens import TokenStore
+from deribit.unified.dispatch import OrderedDispatcher
+from deribit.unified.latency import LatencyRecorder
+from containers.catalog import InstrumentCatalog
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -18,14 +24,32 @@ logger.setLevel(logging.INFO)
 
 class DeltaApiClient(object):
 
-    def __init__(self, url, key, secret, req_kwargs=None, sub_kwargs=None):
+    def __init__(self, url, key, secret, req_kwargs=None, sub_kwargs=None, pool_sizes=None, catalog_path=None):
 
         self.__url = url
         self.__key = key
         self.__secret = secret
 
-        # Init request client
+        # Request credits, shared by every connection of this client
+        self.__rate_limiter = RateLimiter()
+
+        # Tokens, shared as well: a connection (re)opening logs
+        # in with the refresh token obtained by another one
+        self.__token_store = TokenStore()
+
+        # Worker threads running the callbacks of every connection
+        self.__dispatcher = OrderedDispatcher()
+
+        # Latency histograms of the replies, by endpoint
+        self.__latency = LatencyRecorder()
+
+        # Instruments listed, loaded from a local file if provided
+        self.__catalog = InstrumentCatalog(path=catalog_path)
+
+        # Init request client: pool of connections per category
+        # of request (trading, account, market_data, bulk)
         self.__req_kwargs = req_kwargs
+        self.__pool_sizes = pool_sizes
         self.__request_client = None
 
         # Init sub clients
@@ -36,9 +60,44 @@ class DeltaApiClient(object):
     @property
     def request(self):
         if not self.__request_client:
-            self.__request_client = RequestClient(url=self.__url, key=self.__key, secret=self.__secret)
+            self.__request_client = PooledRequestClient(factory=self.__make_request_client,
+                                                        pool_sizes=self.__pool_sizes)
         return self.__request_client
 
+    def __make_request_client(self, name):
+        return RequestClient(url=self.__url, key=self.__key, secret=self.__secret, name=name,
+                             rate_limiter=self.__rate_limiter, dispatcher=self.__dispatcher,
+                             token_store=self.__token_store, latency=self.__latency,
+                             **(self.__req_kwargs or {}))
+
+    def stop(self):
+        # Connections first: the callbacks of their last messages still run
+        if self.__request_client:
+            self.__request_client.stop()
+        self.__dispatcher.stop()
+
+    @property
+    def catalog(self):
+        # Refreshed only if outdated (or an expiry passed)
+        self.__catalog.refresh(self.request)
+        return self.__catalog
+
+    @property
+    def rate_limits(self):
+        return self.__rate_limiter.metrics()
+
+    @property
+    def token_metrics(self):
+        return self.__token_store.metrics()
+
+    @property
+    def dispatch_metrics(self):
+        return self.__dispatcher.metrics()
+
+    @property
+    def latency_metrics(self):
+        return self.__latency.summary()
+
     @property
     def quotes(self):
         if not self.__quotes_subscription:
@@ -1,5 +1,6 @@
 # Frameworks
 import time
+from concurrent.futures import Future, wait
 
 from websocket._exceptions import WebSocketConnectionClosedException
 
@@ -18,7 +19,6 @@ from deribit.subscriptions.new_base import WebsocketClient
 
 MAX_STARTUP_TIME = 2.0
 REQUEST_MAX_RETRIES = 10
-CHECK_INTERVAL = 0.00001
 STARTUP_SCALING = 10
 REQUEST_TIMEOUT = 5.0
 
@@ -46,10 +46,8 @@ class RequestClient(WebsocketClient):
 
             gentle_delay = 0.05 if len(messages_with_callbacks) > 50 else 0.0
 
-            counter = 0
-            while not self._secured_connection and counter < MAX_STARTUP_TIME:
-                time.sleep(CHECK_INTERVAL)
-                counter += CHECK_INTERVAL
+            # Wait (without spinning) for the login to complete
+            self._secured_connection.wait(timeout=MAX_STARTUP_TIME)
 
             # Send each message
             waiting_ids = []
@@ -57,15 +55,19 @@ class RequestClient(WebsocketClient):
 
                 msg, cb = msg_tuple[0], msg_tuple[1]
 
+                # Register the message before sending it, the reply
+                # may arrive before send() even returns
                 id_ = msg["id"]
-                self.ws.send(json.dumps(msg))
                 self._sent_messages[id_] = msg
 
                 if cb:
                     self._sent_messages_callbacks[id_] = cb
                 else:
+                    self._reply_futures[id_] = Future()
                     waiting_ids.append(id_)
 
+                self.ws.send(json.dumps(msg))
+
                 time.sleep(gentle_delay)
 
             # If not callback provided,
@@ -83,36 +85,19 @@ class RequestClient(WebsocketClient):
     def __wait_blocking(self, ids):
 
         ids = ids if isinstance(ids, list) else [ids]
-        total_number_of_ids = len(ids)
-
-        waiting_time = 0.0
-        result, queue = {}, self._answers_received
-
-        while waiting_time < REQUEST_TIMEOUT:
-
-            # If the number of answers is not even the length of our
-            # messages, leave it be...
-            if len(self._answers_received) >= total_number_of_ids:
-
-                result = {id: queue[id] for id in ids if id in queue}
-
-                if len(result) == total_number_of_ids:
-                    break
+        futures = [self._reply_futures[id] for id in ids if id in self._reply_futures]
 
-            # Some answers are missing, wait a bit...
-            time.sleep(CHECK_INTERVAL)
-            waiting_time += CHECK_INTERVAL
+        # Sleep until every reply has been received or the
+        # deadline (monotonic clock) has passed
+        wait(futures, timeout=REQUEST_TIMEOUT)
 
-        # Clean up
+        # Clean up: late replies will find no future and be dropped
         for id in ids:
-            try:
-                del self._answers_received[id]
-                del self._sent_messages[id]
-            except:
-                pass
+            self._reply_futures.pop(id, None)
+            self._sent_messages.pop(id, None)
 
-        # Return
-        return list(result.values())
+        # Return (in the order of the requests)
+        return [f.result() for f in futures if f.done()]
 
     # ##################################################################
     # EVENT HANDLERS
@@ -123,12 +108,13 @@ class RequestClient(WebsocketClient):
         # Extract message id_
         id_ = message["id"]
 
-        # Add to acknowledged messages
-        self._answers_received[id_] = message
+        # A blocking caller is waiting for this reply: wake it up
+        future = self._reply_futures.get(id_, None)
+        if future is not None and not future.done():
+            return future.set_result(message)
 
         # Invoke the callback if there is one, else do nothing
-        # this assumes that if there is no callback, the method
-        # generating the request is waiting for the reply
+        # (the reply arrived after its blocking caller gave up)
         if id_ in self._sent_messages_callbacks:
             # Grab the callback
             cb = self._sent_messages_callbacks[id_]
@@ -136,7 +122,6 @@ class RequestClient(WebsocketClient):
             # Clean up
             del self._sent_messages[id_]
             del self._sent_messages_callbacks[id_]
-            del self._answers_received[id_]
 
             return cb(message)
 
@@ -20,7 +20,6 @@ from deribit.subscriptions.new_base import WebsocketClient
 
 MAX_STARTUP_TIME = 2.0
 REQUEST_MAX_RETRIES = 10
-CHECK_INTERVAL = 0.00001
 STARTUP_SCALING = 10
 REQUEST_TIMEOUT = 5.0
 
@@ -53,10 +52,8 @@ class SubscriptionClient(WebsocketClient):
 
             gentle_delay = 0.01 if len(messages) > 50 else 0.0
 
-            counter = 0
-            while not self._secured_connection and counter < MAX_STARTUP_TIME:
-                time.sleep(CHECK_INTERVAL)
-                counter += CHECK_INTERVAL
+            # Wait (without spinning) for the login to complete
+            self._secured_connection.wait(timeout=MAX_STARTUP_TIME)
 
             # Send each message
             for msg in messages:
@@ -0,0 +1,45 @@
+from containers.board import QuoteBoard
+from deribit.messages import mkt_data, session
+from deribit.support.types import PUBLIC_CHANNELS
+
+
+# ####################################################################
+# QUOTE FEED
+# ####################################################################
+
+class QuoteFeed(object):
+    """
+    Quote board fed by the quote channels of a UnifiedClient: the
+    notifications are written to the board as they arrive (on the
+    dispatcher workers), the readers query the board.
+    """
+
+    def __init__(self, client, board: QuoteBoard = None, callback=None):
+        """
+        :param client: UnifiedClient (e.g. RequestClient) receiving the notifications.
+        :param board: QuoteBoard (default: new one), size it up front for large chains.
+        :param callback: Invoked with the notification data after each update (optional).
+        """
+        self.__client = client
+        self.__callback = callback
+        self.board = board or QuoteBoard()
+
+        client.route(f"{PUBLIC_CHANNELS.QUOTES.value}.", self.on_notification)
+
+    def subscribe(self, instruments):
+        # Rows allocated before the first notification
+        channels = []
+        for instrument in instruments:
+            self.board.row(instrument)
+            channels.append(mkt_data.subscribe_quotes(instrument))
+        return self.__client.send_request(session.subscription_message(channels))
+
+    def unsubscribe(self, instruments):
+        channels = [mkt_data.subscribe_quotes(i) for i in instruments]
+        return self.__client.send_request(session.unsubscription_message(channels))
+
+    def on_notification(self, envelope):
+        data = envelope.data
+        self.board.update(data)
+        if self.__callback is not None:
+            self.__callback(data)
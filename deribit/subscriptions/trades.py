@@ -0,0 +1,41 @@
+from containers.tape import TradeTapes
+from deribit.messages import mkt_data, session
+from deribit.support.types import PUBLIC_CHANNELS
+
+
+# ####################################################################
+# TRADE FEED
+# ####################################################################
+
+class TradeFeed(object):
+    """
+    Trade tapes fed by the trades channels of a UnifiedClient: the
+    trades of each notification are appended to the tape of their
+    instrument (duplicates dropped on trade_seq).
+    """
+
+    def __init__(self, client, tapes: TradeTapes = None, callback=None):
+        """
+        :param client: UnifiedClient (e.g. RequestClient) receiving the notifications.
+        :param tapes: TradeTapes (default: new one).
+        :param callback: Invoked with the trades of each notification (optional).
+        """
+        self.__client = client
+        self.__callback = callback
+        self.tapes = tapes or TradeTapes()
+
+        client.route(f"{PUBLIC_CHANNELS.TRADES.value}.", self.on_notification)
+
+    def subscribe(self, instruments, interval=None):
+        channels = [mkt_data.subscribe_trades(i, interval) for i in instruments]
+        return self.__client.send_request(session.subscription_message(channels))
+
+    def unsubscribe(self, instruments, interval=None):
+        channels = [mkt_data.subscribe_trades(i, interval) for i in instruments]
+        return self.__client.send_request(session.unsubscription_message(channels))
+
+    def on_notification(self, envelope):
+        trades = envelope.data
+        self.tapes.append(trades)
+        if self.__callback is not None:
+            self.__callback(trades)
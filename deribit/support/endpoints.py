@@ -99,29 +99,27 @@ WALLET_SUBMIT_TRANSFER_TO_SUBACCOUNT = "private/submit_transfer_to_subaccount"
 WALLET_SUBMIT_TRANSFER_TO_USER = "private/submit_transfer_to_user"
 WALLET_WITHDRAW = "private/withdraw"
 
+# ######################################################################
+# RATE LIMITS (REQUEST CREDITS)
+# ######################################################################
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# Methods processed by the matching engine,
+# which are rate limited separately from all others
+MATCHING_ENGINE_METHODS = frozenset([TRADING_BUY,
+                                     TRADING_SELL,
+                                     TRADING_CLOSE,
+                                     TRADING_CANCEL_ALL,
+                                     TRADING_CANCEL_ALL_BY_CURRENCY,
+                                     TRADING_CANCEL_ALL_BY_INSTRUMENT])
+
+# Requests which must not be sent twice: if the connection drops before
+# their reply, whether the exchange received them is unknown
+NON_REPLAYABLE_METHODS = frozenset([TRADING_BUY,
+                                    TRADING_SELL,
+                                    TRADING_CLOSE])
+
+# Credits charged for each request, by engine: the matching engine
+# limits are set per account tier in requests per second (one credit
+# per request), every other request costs 500 credits
+MATCHING_ENGINE_REQUEST_CREDITS = 1
+NON_MATCHING_REQUEST_CREDITS = 500
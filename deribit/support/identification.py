@@ -1,5 +1,10 @@
 import string
 import random
+import itertools
+
+# Message ids: JSON-RPC accepts integers, a counter is enough to
+# match replies and requests (next() on a count is atomic)
+__message_ids = itertools.count(1)
 
 
 def __id(letters=3, numbers=7):
@@ -9,7 +14,7 @@ def __id(letters=3, numbers=7):
 
 
 def message_id():
-    return __id(letters=3, numbers=7)
+    return next(__message_ids)
 
 
 def client_id():
@@ -0,0 +1,160 @@
+# Core
+import time
+import asyncio
+import logging
+import threading
+
+# Local
+from .endpoints import (MATCHING_ENGINE_METHODS,
+                        MATCHING_ENGINE_REQUEST_CREDITS,
+                        NON_MATCHING_REQUEST_CREDITS)
+
+from .settings import (NON_MATCHING_MAX_CREDITS,
+                       NON_MATCHING_REFILL_RATE,
+                       MATCHING_MAX_CREDITS,
+                       MATCHING_REFILL_RATE)
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ####################################################################
+# CREDIT BUCKET
+# ####################################################################
+
+class CreditBucket(object):
+    """
+    Token bucket holding request credits: full at start, refilled
+    continuously, debited by each request. A request is charged at once
+    (the balance may become negative); the caller then waits for the
+    balance to come back to zero, which keeps callers in line.
+    """
+
+    def __init__(self, max_credits: int, refill_rate: float, cost: int = NON_MATCHING_REQUEST_CREDITS):
+        """
+        :param max_credits: Capacity of the bucket.
+        :param refill_rate: Credits per second.
+        :param cost: Credits charged per request.
+        """
+        self.max_credits = max_credits
+        self.refill_rate = refill_rate
+        self.cost = cost
+
+        self.__credits = float(max_credits)
+        self.__last_refill = time.monotonic()
+        self.__lock = threading.Lock()
+
+        # Metrics
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.throttled = 0
+
+    @property
+    def credits(self):
+        with self.__lock:
+            self.__refill(time.monotonic())
+            return self.__credits
+
+    @property
+    def wait_time_for_next(self):
+        credits = self.credits
+        return 0.0 if credits >= 0.0 else -credits / self.refill_rate
+
+    def reserve(self, credits: int = None):
+        """
+        Charge credits for one request.
+        :param credits: Cost of the request (default: the cost of the bucket).
+        :return: Time (seconds) to wait before sending the request.
+        """
+        with self.__lock:
+            self.__refill(time.monotonic())
+            self.__credits -= self.cost if credits is None else credits
+            self.requests += 1
+
+            if self.__credits >= 0.0:
+                return 0.0
+
+            wait = -self.__credits / self.refill_rate
+            self.waits += 1
+            self.wait_time += wait
+            return wait
+
+    def drain(self):
+        # The exchange says we went too fast: start again from empty
+        with self.__lock:
+            self.__credits = min(self.__credits, 0.0)
+            self.__last_refill = time.monotonic()
+            self.throttled += 1
+
+    def metrics(self):
+        return {"credits": self.credits,
+                "max_credits": self.max_credits,
+                "refill_rate": self.refill_rate,
+                "cost": self.cost,
+                "wait_time_for_next": self.wait_time_for_next,
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "throttled": self.throttled}
+
+    def __refill(self, now):
+        elapsed = now - self.__last_refill
+        self.__last_refill = now
+        self.__credits = min(self.max_credits, self.__credits + elapsed * self.refill_rate)
+
+
+# ####################################################################
+# RATE LIMITER (SHARED BY ALL CONNECTIONS OF ONE ACCOUNT)
+# ####################################################################
+
+class RateLimiter(object):
+    """
+    Client side mirror of the exchange's request credits: one bucket for
+    the matching engine (buy, sell, cancel...), charged per request, one
+    for everything else, charged in credits.
+    """
+
+    def __init__(self,
+                 non_matching_max_credits=NON_MATCHING_MAX_CREDITS,
+                 non_matching_refill_rate=NON_MATCHING_REFILL_RATE,
+                 matching_max_credits=MATCHING_MAX_CREDITS,
+                 matching_refill_rate=MATCHING_REFILL_RATE):
+
+        self.non_matching = CreditBucket(max_credits=non_matching_max_credits,
+                                         refill_rate=non_matching_refill_rate,
+                                         cost=NON_MATCHING_REQUEST_CREDITS)
+
+        self.matching = CreditBucket(max_credits=matching_max_credits,
+                                     refill_rate=matching_refill_rate,
+                                     cost=MATCHING_ENGINE_REQUEST_CREDITS)
+
+    def bucket(self, method):
+        if method in MATCHING_ENGINE_METHODS:
+            return self.matching
+        return self.non_matching
+
+    def reserve(self, method):
+        return self.bucket(method).reserve()
+
+    def acquire(self, method):
+        wait = self.reserve(method)
+        if wait > 0.0:
+            time.sleep(wait)
+
+    async def acquire_async(self, method):
+        wait = self.reserve(method)
+        if wait > 0.0:
+            await asyncio.sleep(wait)
+
+    def throttled(self, method):
+        logger.warning(f"Request credits exhausted on the exchange side ({method}).")
+        self.bucket(method).drain()
+
+    def metrics(self):
+        return {"non_matching": self.non_matching.metrics(),
+                "matching": self.matching.metrics()}
@@ -16,6 +16,15 @@ RESP_CONTENT = "result"
 
 RESP_CONT_TOK_EXP = "expires_in"
 
+# Error codes
+RESP_ERR_CODE = "code"
+RESP_ERR_TOO_MANY_REQUESTS = 10028
+
+# Local error codes (never sent by the exchange)
+RESP_ERR_MESSAGE = "message"
+RESP_ERR_CONNECTION_LOST = -1
+RESP_ERR_TIMEOUT = -2
+
 # ######################################################################
 # REQUEST FORMULATION -- REQUEST (REQ)
 # ######################################################################
@@ -1,4 +1,3 @@
-import sys
 import math
 import logging
 
@@ -22,71 +21,73 @@ from .settings import (DEFAULT_CURRENCY,
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# ####################################################################
+# LOOKUP TABLES (BUILT ONCE)
+# ####################################################################
+
+# Fields known to sanitize, in the order of its output
+FIELDS = ("instrument",
+          "instrument_name",
+          "kind",
+          "currency",
+          "depth",
+          "interval",
+          "group",
+          "amount",
+          "max_show",
+          "type",
+          "time_in_force",
+          "trigger",
+          "advanced",
+          "label",
+          "limit_price",
+          "stop_price",
+          "post_only",
+          "reduce_only",
+          "count",
+          "include_old",
+          "order_id",
+          "start_seq",
+          "end_seq",
+          "key_id",
+          "account_id",
+          "password",
+          "email")
+
+# Accepted values (lower case) -> value sent
+KINDS = {k.value.lower(): k.value for k in INSTRUMENT_KIND}
+CURRENCIES = {k.value.lower(): k.value.lower() for k in INSTRUMENT_CURRENCY}
+ORDER_TYPES = {k.value.lower(): k.value for k in ORDER_TYPE}
+TIMES_IN_FORCE = {k.value.lower(): k.value for k in TIME_IN_FORCE}
+TRIGGERS = {k.value.lower(): k.value for k in TRIGGER_PRICE}
+GROUPS = sorted(v.value for v in ORDER_BOOK_GROUP)
+
+# Common mistakes on kinds: value sent, warning
+KIND_ALIASES = {"options": ("option", "WARNING: delta kind is singular (option, not options)."),
+                "futures": ("future", "WARNING: delta kind is singular (future, not futures)."),
+                "perpetual": ("future", "WARNING: delta kinds do not include 'perpetual'. Use 'future' instead.")}
+
 
 # ######################################################################
 # SANITIZERS
 # ######################################################################
 
 def sanitize(**kwargs):
-    output = {}
-
-    fields = ["instrument",
-              "instrument_name",
-              "kind",
-              "currency",
-              "depth",
-              "interval",
-              "group",
-              "amount",
-              "max_show",
-              "type",
-              "time_in_force",
-              "trigger",
-              "advanced",
-              "label",
-              "limit_price",
-              "stop_price",
-              "post_only",
-              "reduce_only",
-              "count",
-              "include_old",
-              "order_id",
-              "start_seq",
-              "end_seq",
-              "key_id",
-              "account_id",
-              "password",
-              "email",
-              ]
-
-    for f in fields:
-        if f in kwargs:
-            method = getattr(sys.modules[__name__], "sanitize_" + f)
-            output[f] = method(kwargs[f])
-
-    return output
+    return {f: SANITIZERS[f](kwargs[f]) for f in FIELDS if f in kwargs}
 
 
 def sanitize_kind(kind: str = None):
     if not kind:
         return DEFAULT_KIND
 
-    kind_ = kind.lower()
-    for k in INSTRUMENT_KIND:
-        if k.value == kind_:
-            return kind_
-
-    if kind_ == "options":
-        print("WARNING: delta kind is singular (option, not options).")
-        return "option"
-
-    if kind_ == "futures":
-        print("WARNING: delta kind is singular (future, not futures).")
-        return "future"
+    kind_ = KINDS.get(kind, None) or KINDS.get(kind.lower(), None)
+    if kind_:
+        return kind_
 
-    if kind_ == "perpetual":
-        print("WARNING: delta kinds do not include 'perpetual'. Use 'future' instead.")
-        return "future"
+    alias = KIND_ALIASES.get(kind.lower(), None)
+    if alias:
+        print(alias[1])
+        return alias[0]
 
     raise Exception(f"Provided instrument kind is not acceptable ({kind}).")
 
@@ -95,11 +96,9 @@ def sanitize_currency(currency: str = None):
     if not currency:
         return DEFAULT_CURRENCY
 
-    currency_ = currency.lower()
-
-    for k in INSTRUMENT_CURRENCY:
-        if k.value.lower() == currency_:
-            return currency_
+    currency_ = CURRENCIES.get(currency, None) or CURRENCIES.get(currency.lower(), None)
+    if currency_:
+        return currency_
 
     raise Exception("Provided instrument currency is not acceptable.")
 
@@ -144,7 +143,7 @@ def sanitize_group(group=None, required=False):
 
     try:
         group_ = int(group)
-        values = [v.value for v in ORDER_BOOK_GROUP]
+        values = GROUPS
 
         if group_ in values:
             return group_
@@ -201,10 +200,9 @@ def sanitize_type(type: str = None):
     if not type:
         return None
 
-    type = type.lower()
-    for k in ORDER_TYPE:
-        if type == k.value.lower():
-            return k.value
+    type_ = ORDER_TYPES.get(type, None) or ORDER_TYPES.get(type.lower(), None)
+    if type_:
+        return type_
 
     raise ValueError(f"Invalid order type received {type}.")
 
@@ -213,10 +211,9 @@ def sanitize_time_in_force(time_in_force: str = None):
     if not time_in_force:
         return TIME_IN_FORCE.GOOD_TIL_CANCELLED.value
 
-    time_in_force = time_in_force.lower()
-    for k in ORDER_TYPE:
-        if time_in_force == k.value.lower():
-            return k.value
+    time_in_force_ = TIMES_IN_FORCE.get(time_in_force, None) or TIMES_IN_FORCE.get(time_in_force.lower(), None)
+    if time_in_force_:
+        return time_in_force_
 
     raise ValueError(f"Invalid time in force received {time_in_force}.")
 
@@ -225,10 +222,9 @@ def sanitize_trigger(trigger=None):
     if not trigger:
         return TRIGGER_PRICE.INDEX.value
 
-    trigger = trigger.lower()
-    for k in TRIGGER_PRICE:
-        if trigger == k.value.lower():
-            return k.value
+    trigger_ = TRIGGERS.get(trigger, None) or TRIGGERS.get(trigger.lower(), None)
+    if trigger_:
+        return trigger_
 
     raise ValueError(f"Invalid trigger type received for stop order {trigger}.")
 
@@ -382,3 +378,61 @@ def sanitize_email(email=None):
     if not "@" in str(email):
         raise ValueError(f"Invalid email format was provided.")
     return str(email)
+
+
+# ######################################################################
+# COMPILED VALIDATORS
+# ######################################################################
+
+# Sanitizer of each field
+SANITIZERS = {f: globals()["sanitize_" + f] for f in FIELDS}
+
+# Sanitizers returning their input as is: skipped by compiled validators
+PASS_THROUGH = frozenset([sanitize_advanced, sanitize_post_only, sanitize_reduce_only, sanitize_order_id])
+
+# Sanitizer refusing None (the value is required)
+NO_DEFAULT = object()
+
+
+def compile_validator(*fields):
+    """
+    Validator of an endpoint's parameters: the sanitizers of its fields
+    are resolved once, as well as the value each of them gives to None
+    (e.g. the default time in force), so that the validator only runs
+    the sanitizers of the values actually provided.
+    :param fields: Fields of the endpoint (names known to sanitize).
+    :return: Function taking the fields as keyword arguments, returning the same dict as sanitize.
+    """
+    unknown = set(fields).difference(FIELDS)
+    if unknown:
+        raise ValueError(f"No sanitizer for field(s): {sorted(unknown)}.")
+
+    steps = []
+    for f in FIELDS:
+        if f not in fields:
+            continue
+
+        sanitizer = SANITIZERS[f]
+        try:
+            default = sanitizer(None)
+        except Exception:
+            default = NO_DEFAULT
+
+        steps.append((f, None if sanitizer in PASS_THROUGH else sanitizer, default))
+
+    steps = tuple(steps)
+
+    def validate(**kwargs):
+        output = {}
+        for f, sanitizer, default in steps:
+            if f in kwargs:
+                value = kwargs[f]
+                if value is None and default is not NO_DEFAULT:
+                    output[f] = default
+                elif sanitizer is None:
+                    output[f] = value
+                else:
+                    output[f] = sanitizer(value)
+        return output
+
+    return validate
@@ -4,3 +4,19 @@ DEFAULT_INTERVAL = 100
 DEFAULT_KIND = "any"
 DEFAULT_INSTRUMENT = "BTC-PERPETUAL"
 DEFAULT_GROUP = 1
+
+# Request credits: non matching engine requests
+NON_MATCHING_MAX_CREDITS = 50000
+NON_MATCHING_REFILL_RATE = 10000  # credits per second
+
+# Request credits: matching engine requests (buy, sell, cancel...),
+# one credit per request (default tier: bursts of 20, 5 per second)
+MATCHING_MAX_CREDITS = 20
+MATCHING_REFILL_RATE = 5  # credits per second
+
+# Access tokens: refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 60
+
+# Token refreshes are run one at a time per account (refresh tokens are
+# single use): a refresh not completed after this long is given up
+TOKEN_REFRESH_LEASE = 15.0
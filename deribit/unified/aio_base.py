@@ -0,0 +1,492 @@
+# Core
+import asyncio
+import logging
+from abc import ABC
+import datetime as dt
+
+# External frameworks
+import aiohttp
+from blinker import Signal
+
+# Local apps
+from utilities import json
+from utilities.id import generate_id
+from deribit.messages import session
+from deribit.messages.templates import frame_str
+from deribit.support.limits import RateLimiter
+from deribit.unified.pending import PendingTable
+from deribit.unified.latency import LatencyRecorder
+from deribit.unified.routing import ChannelRouter, subscription_envelope
+from deribit.support.networking import (RESP_ERROR,
+                                        RESP_ERR_CODE,
+                                        RESP_ERR_MESSAGE,
+                                        RESP_ERR_TIMEOUT,
+                                        RESP_ERR_TOO_MANY_REQUESTS)
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+REQUEST_TIMEOUT = 2.5
+LOGIN_TIMEOUT = 5.0
+
+# Maximum number of requests sent but not yet answered
+MAX_IN_FLIGHT = 50
+
+# Period of the purge of the requests never answered (seconds)
+EXPIRY_INTERVAL = 0.05
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# ####################################################################
+# EVENTS
+# ####################################################################
+
+# Events
+EVENT_AIO_ERROR = Signal(f"EVENT-AIO-ERROR")
+EVENT_AIO_OPEN = Signal(f"EVENT-AIO-OPEN")
+EVENT_AIO_CLOSE = Signal(f"EVENT-AIO-CLOSE")
+
+
+# ####################################################################
+# ASYNCIO CLIENT (FOR PUNCTUAL REQUESTS)
+# ####################################################################
+
+class AsyncUnifiedClient(ABC):
+    """
+    Asyncio counterpart of UnifiedClient: a single aiohttp websocket
+    read by one task, every request is an awaitable resolved by the
+    reply carrying its id. No thread is used, whatever the number
+    of concurrent requests.
+    """
+
+    # ##################################################################
+    # INIT
+    # ##################################################################
+
+    def __init__(self,
+                 url,  # Base url for connection
+                 key=None, secret=None,  # Connection using credentials
+                 name=None,  # Name of this connection
+                 callback=None,  # Default callback (callable)
+                 session=None,  # Optional aiohttp.ClientSession
+                 max_in_flight=MAX_IN_FLIGHT,  # Window of un-acked requests
+                 rate_limiter=None,  # Request credits (shared across connections)
+                 latency=None):  # Latency histograms (may be shared)
+
+        # Default callback (for subscriptions only)
+        self._callback = callback
+
+        # Handlers of subscription notifications, by channel prefix
+        self._router = ChannelRouter()
+
+        # Base url
+        self.__url = url
+
+        # Credentials
+        self.__key = key
+        self.__secret = secret
+
+        # Bool: ok to use credentials
+        self.__authenticate_with_credentials = bool(key and secret)
+
+        # Tokens
+        self.__access_token = None
+        self.__refresh_token = None
+        self.__token_expiry = None
+
+        # Name for events
+        self._name = name or generate_id(4).upper()
+
+        # Messages: sent and not answered yet, with their callback
+        # (or the future of the awaiting coroutine), by id
+        self._pending = PendingTable()
+
+        # Messages: window of requests sent but not yet answered
+        self.__max_in_flight = max_in_flight
+        self.__in_flight = None
+        self._in_flight_ids = set()
+
+        # Request credits, may be shared with other connections
+        self._rate_limiter = rate_limiter or RateLimiter()
+
+        # Latency of the replies, by endpoint, split into components
+        self._latency = latency or LatencyRecorder()
+
+        # Http session (only closed here if created here)
+        self.__session = session
+        self.__owns_session = session is None
+
+        # Websocket and its reader task
+        self.__ws = None
+        self.__reader = None
+        self.__expiry = None
+
+        # Created within the running loop
+        self.__connect_lock = None
+
+    # ##################################################################
+    # CONTEXT MANAGER
+    # ##################################################################
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.disconnect()
+
+    # ##################################################################
+    # PROPERTIES
+    # ##################################################################
+
+    @property
+    def is_connected(self):
+        return self.__ws is not None and not self.__ws.closed
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight_ids)
+
+    # ##################################################################
+    # WEBSOCKET BASIC OPERATIONS
+    # ##################################################################
+
+    async def connect(self):
+        if self.is_connected:
+            return
+
+        if not self.__connect_lock:
+            self.__connect_lock = asyncio.Lock()
+            self.__in_flight = asyncio.Semaphore(self.__max_in_flight)
+
+        async with self.__connect_lock:
+
+            # Another coroutine connected while we were waiting
+            if self.is_connected:
+                return
+
+            if not self.__session:
+                self.__session = aiohttp.ClientSession()
+
+            self.__ws = await self.__session.ws_connect(self.__url)
+            self.__reader = asyncio.ensure_future(self.__read_forever(self.__ws))
+            if self.__expiry is None or self.__expiry.done():
+                self.__expiry = asyncio.ensure_future(self.__expire_forever())
+            await self._on_open()
+
+    async def disconnect(self):
+        ws, reader, expiry = self.__ws, self.__reader, self.__expiry
+        self.__ws, self.__reader, self.__expiry = None, None, None
+
+        if expiry is not None:
+            expiry.cancel()
+
+        if ws is not None:
+            await ws.close()
+        if reader is not None:
+            await reader
+        if self.__owns_session and self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    async def send_request(self, message, callback=None):
+        msg_cb = [(message, callback)]
+        return await self.send_multiple_requests(msg_cb)
+
+    async def send_multiple_requests(self, messages_with_callbacks):
+
+        # Look for broken connections
+        await self.connect()
+
+        loop = asyncio.get_event_loop()
+
+        # Send each message
+        futures = []
+        for msg_tuple in messages_with_callbacks:
+
+            msg, cb = msg_tuple[0], msg_tuple[1]
+
+            # Register the message before sending it
+            id_ = msg["id"]
+            if cb:
+                self._pending.add(msg, callback=cb, timeout=REQUEST_TIMEOUT)
+            else:
+                future = loop.create_future()
+                self._pending.add(msg, future=future, timeout=REQUEST_TIMEOUT)
+                futures.append((id_, future))
+
+            # Wait for a free slot in the window of un-acked requests
+            # and for enough request credits
+            await self.__in_flight.acquire()
+            self._in_flight_ids.add(id_)
+            await self._rate_limiter.acquire_async(msg.get("method", None))
+
+            # Given up meanwhile (e.g. by the caller): never sent
+            if id_ not in self._pending:
+                self.__release_slot(id_)
+                continue
+
+            try:
+                await self.__ws.send_str(frame_str(msg))
+                self._pending.written(id_)
+            except ConnectionError:
+                self.__release_slot(id_)
+                raise
+
+        # If not callback provided,
+        # wait for the answer to arrive
+        if len(futures) > 0:
+            return await self.__wait(futures)
+
+    async def __wait(self, futures):
+
+        # Suspend until every reply has been received or timed out
+        await asyncio.wait([f for _, f in futures], timeout=REQUEST_TIMEOUT)
+
+        # Clean up: late replies will find no future and be dropped
+        for id_, future in futures:
+            self._pending.pop(id_)
+            self.__release_slot(id_)
+            future.cancel()
+
+        # Return (in the order of the requests)
+        return [f.result() for _, f in futures
+                if f.done() and not f.cancelled() and f.exception() is None]
+
+    def __release_slot(self, id):
+        if id in self._in_flight_ids:
+            self._in_flight_ids.discard(id)
+            self.__in_flight.release()
+
+    async def __send_preliminary_request(self, message):
+        id_ = message["id"]
+        future = asyncio.get_event_loop().create_future()
+        self._pending.add(message, future=future)
+        self._rate_limiter.reserve(message.get("method", None))
+
+        try:
+            await self.__ws.send_str(frame_str(message))
+            return await asyncio.wait_for(future, timeout=LOGIN_TIMEOUT)
+        finally:
+            self._pending.pop(id_)
+
+    # ##################################################################
+    # READER
+    # ##################################################################
+
+    async def __read_forever(self, ws):
+        try:
+            async for frame in ws:
+                if frame.type == aiohttp.WSMsgType.TEXT:
+                    self._on_message(frame.data)
+                elif frame.type == aiohttp.WSMsgType.ERROR:
+                    self._on_error(ws.exception())
+                    break
+        finally:
+            self._on_close(ws)
+
+    # ##################################################################
+    # MESSAGE HANDLER
+    # ##################################################################
+
+    def _on_message(self, message):
+
+        # Subscription notification: routed on its channel name,
+        # read from the raw frame, the payload is decoded on demand
+        envelope = subscription_envelope(message)
+        if envelope is not None:
+            return self._on_envelope(envelope)
+
+        # Parse the message to python data
+        message = json.decode(message)
+
+        id = message.get("id", False)
+        if id:
+            return self._on_message_with_id(message, id)
+        else:
+            return self._on_message_without_id(message)
+
+    def _on_message_with_id(self, message, id):
+
+        # Let the next request in
+        self.__release_slot(id)
+
+        # Nobody waits for this reply anymore: drop it
+        pending = self._pending.pop(id)
+        if pending is None:
+            self._pending.late()
+            return
+        self._latency.record(pending, message)
+
+        # The exchange refused the request for lack of credits
+        error = message.get(RESP_ERROR, None)
+        if error and error.get(RESP_ERR_CODE, None) == RESP_ERR_TOO_MANY_REQUESTS:
+            self._rate_limiter.throttled(pending.method)
+
+        # A coroutine is waiting for this reply: wake it up
+        if pending.future is not None:
+            if not pending.future.done():
+                pending.future.set_result(message)
+            return
+
+        # Invoke
+        return self.__invoke(pending.callback, message)
+
+    def _on_message_without_id(self, message):
+
+        method = message.get("method", None)
+
+        # This messages comes from an existing
+        # channel subscription, use provided callback
+        if method == "subscription":
+            return self.on_subscription(message)
+
+        # This is a heartbeat message, NOT to be propagated
+        # to the callback provided by the user
+        if method == "heartbeat":
+            return self._on_heartbeat(message)
+
+        # Message not handled, log this as an error
+        # This is NOT supposed to happen
+        logger.error(f"Got unexpected message: {message}")
+
+    def _on_envelope(self, envelope):
+        handler = self._router.handler(envelope.channel)
+        if handler is not None:
+            return self.__invoke(handler, envelope)
+        return self.on_subscription(envelope.message)
+
+    def on_subscription(self, message):
+        if self._callback:
+            return self.__invoke(self._callback, message)
+
+    def route(self, prefix, handler):
+        """
+        Handle the notifications of the channels starting with a prefix.
+        :param prefix: Channel prefix (e.g. 'book.' or 'book.BTC-PERPETUAL.raw').
+        :param handler: Callable (or coroutine function) receiving an Envelope.
+        """
+        self._router.register(prefix, handler)
+
+    # ##################################################################
+    # EXPIRY
+    # ##################################################################
+
+    async def __expire_forever(self):
+        while True:
+            await asyncio.sleep(EXPIRY_INTERVAL)
+            try:
+                self._expire()
+            except Exception:
+                logger.exception("Unable to purge the expired requests.")
+
+    def _expire(self):
+        for id, pending in self._pending.expire():
+            self.__release_slot(id)
+
+            # Awaiting coroutine: wake it up
+            if pending.future is not None:
+                if not pending.future.done():
+                    pending.future.set_exception(TimeoutError(f"No reply to request {id} ({pending.method})."))
+                continue
+
+            # The user's callback gets a timeout error
+            error = {RESP_ERR_CODE: RESP_ERR_TIMEOUT,
+                     RESP_ERR_MESSAGE: f"No reply within {REQUEST_TIMEOUT}s, "
+                                       f"the request may or may not have been executed."}
+            self.__invoke(pending.callback, {"jsonrpc": "2.0", "id": id, RESP_ERROR: error})
+
+    def pending_metrics(self):
+        return self._pending.metrics()
+
+    def latency_metrics(self, method=None):
+        return self._latency.summary(method)
+
+    @staticmethod
+    def __invoke(callback, message):
+        # Coroutine callbacks are scheduled, not awaited,
+        # so that the reader never stalls on user code
+        result = callback(message)
+        if asyncio.iscoroutine(result):
+            return asyncio.ensure_future(result)
+        return result
+
+    # ##################################################################
+    # ERROR HANDLER
+    # ##################################################################
+
+    def _on_error(self, exception):
+
+        # Warn the system about the event
+        EVENT_AIO_ERROR.send()
+
+        # Log the event
+        logger.error(exception)
+
+    # ##################################################################
+    # OPEN HANDLER
+    # ##################################################################
+
+    async def _on_open(self):
+
+        # Warn the system about the event
+        EVENT_AIO_OPEN.send()
+
+        # Log the event
+        logger.info("Opening web socket connection (asyncio).")
+
+        if self.__authenticate_with_credentials:
+            credentials = session.login_message(key=self.__key, secret=self.__secret)
+            reply = await self.__send_preliminary_request(credentials)
+            self._on_login(reply)
+
+        # Enable heartbeat
+        heartbeat_msg = session.set_heartbeat_message()
+        await self.__send_preliminary_request(heartbeat_msg)
+
+    def _on_login(self, message):
+
+        if "error" in message:
+            EVENT_AIO_ERROR.send()
+            raise ConnectionRefusedError(f"Login failed: {message['error']}")
+
+        result = message["result"]
+        self.__access_token = result["access_token"]
+        self.__refresh_token = result["refresh_token"]
+        self.__token_expiry = result["expires_in"] + dt.datetime.utcnow().timestamp()
+
+        logger.info("Web socket opened (asyncio).")
+
+    # ##################################################################
+    # CLOSE HANDLER
+    # ##################################################################
+
+    def _on_close(self, ws):
+
+        # Warn the system about the event
+        EVENT_AIO_CLOSE.send()
+
+        # The next request will reconnect
+        if self.__ws is ws:
+            self.__ws = None
+            logger.warning("Web socket closed (asyncio).")
+
+    # ##################################################################
+    # HEARTBEAT HANDLERS
+    # ##################################################################
+
+    def _on_heartbeat(self, message, *arg, **kwargs):
+        params = message.get("params")
+        type_ = params.get("type")
+
+        # Exchange asking us for a reply
+        # to their heartbeat, must hit the 'test' api endpoint
+        if type_ == "test_request":
+            reply_msg = session.test_heartbeat_request_message()
+            return asyncio.ensure_future(self.__ws.send_str(frame_str(reply_msg)))
@@ -0,0 +1,40 @@
+from deribit.unified.aio_base import AsyncUnifiedClient, MAX_IN_FLIGHT
+from deribit.unified.requests import RequestEndpoints
+from deribit.messages import mkt_data
+
+
+class AsyncRequestClient(RequestEndpoints, AsyncUnifiedClient):
+    """
+    Asyncio request client: same methods as RequestClient,
+    each returning an awaitable (e.g. await client.server_time()).
+    """
+
+    def __init__(self, url, key, secret, name=None, session=None,
+                 max_in_flight=MAX_IN_FLIGHT, rate_limiter=None, latency=None):
+        super().__init__(url=url,
+                         key=key,
+                         secret=secret,
+                         name=name,
+
+                         # Default callback is used
+                         # for subscriptions only
+                         callback=None,
+                         session=session,
+                         max_in_flight=max_in_flight,
+                         rate_limiter=rate_limiter,
+                         latency=latency)
+
+    # ##################################################################
+    # MARKET DATA
+    # ##################################################################
+
+    # ##############################
+    # TRADES
+    # ##############################
+
+    async def all_trades(self, instruments, callback=None):
+        latest_trades = await self.trades(instruments=instruments, count=1, include_old=True)
+        messages = mkt_data.request_all_trades(latest_trades)
+
+        msg_cb = [(m, callback) for m in messages]
+        return await self.send_multiple_requests(msg_cb)
@@ -0,0 +1,378 @@
+# Core
+import os
+import time
+import asyncio
+import logging
+import argparse
+
+# Local apps
+from utilities import json
+from deribit.messages import mkt_data
+from deribit.support.networking import RESP_ERROR, RESP_CONTENT
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Trades per request (at most 1000 on the exchange side)
+PAGE_SIZE = 1000
+
+# Pages requested concurrently, and fetched ahead of the oldest page
+# not yet written (pages are written in order, per instrument)
+BACKFILL_CONCURRENCY = 16
+BACKFILL_WINDOW = 4 * BACKFILL_CONCURRENCY
+
+# Attempts per request (timeouts, errors), with a growing delay in between
+PAGE_ATTEMPTS = 4
+RETRY_DELAY = 0.5
+
+# Checkpoints saved at most that often (seconds), progress logged as often
+CHECKPOINT_INTERVAL = 1.0
+REPORT_INTERVAL = 5.0
+
+CHECKPOINT_FILE = "checkpoints.json"
+TRADES_SUFFIX = ".jsonl"
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def read_trades(path):
+    """
+    :param path: Trades file written by a backfill.
+    :return: Trades (dict), oldest first (generator).
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            yield json.decode(line)
+
+
+# ####################################################################
+# BACKFILL STATE (ONE INSTRUMENT)
+# ####################################################################
+
+class InstrumentBackfill(object):
+    """
+    Trades of one instrument appended to their file, in trade_seq order:
+    pages received ahead of the next one to write are kept aside until
+    it arrives. The checkpoint (last trade_seq, size of the file) only
+    covers what has been written.
+    """
+
+    __slots__ = ("instrument", "path", "file", "seq", "offset", "end_seq", "pages", "failed")
+
+    def __init__(self, instrument, path, seq=0, offset=0):
+        self.instrument = instrument
+        self.path = path
+        self.file = None
+
+        # Last trade_seq written, and the size of the file up to it
+        self.seq = seq
+        self.offset = offset
+
+        # Last trade_seq to fetch, pages fetched but not written (by first seq)
+        self.end_seq = None
+        self.pages = {}
+        self.failed = False
+
+    @property
+    def done(self):
+        return self.end_seq is not None and self.seq >= self.end_seq
+
+    def checkpoint(self):
+        return {"seq": self.seq, "offset": self.offset, "end_seq": self.end_seq}
+
+    def open(self):
+        # Whatever follows the checkpoint was written after it: dropped
+        if self.file is None:
+            self.file = open(self.path, "r+b" if os.path.exists(self.path) else "wb")
+            self.file.truncate(self.offset)
+            self.file.seek(self.offset)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def store(self, start_seq, end_seq, trades):
+        """
+        :return: Number of pages written (this one, and those it unblocked).
+        """
+        self.pages[start_seq] = (end_seq, trades)
+        written = 0
+        while self.seq + 1 in self.pages:
+            end_seq, trades = self.pages.pop(self.seq + 1)
+            if trades:
+                self.open()
+                data = b"".join(json.encode(t) + b"\n" for t in trades)
+                self.file.write(data)
+                self.offset += len(data)
+            self.seq = end_seq
+            written += 1
+
+        if self.done:
+            self.close()
+        return written
+
+
+# ####################################################################
+# BACKFILL
+# ####################################################################
+
+class TradeBackfill(object):
+    """
+    History of many instruments, paged on trade_seq through an
+    AsyncRequestClient: a fixed number of pages in flight, across
+    instruments (the rate limiter of the client paces the requests).
+    Trades are streamed to one file per instrument (json lines, oldest
+    first), checkpointed as they are written: run again after a stop
+    (or with instruments that have traded since), it resumes from there.
+    """
+
+    def __init__(self, client, directory,
+                 concurrency: int = BACKFILL_CONCURRENCY,
+                 window: int = BACKFILL_WINDOW,
+                 page_size: int = PAGE_SIZE):
+        """
+        :param client: AsyncRequestClient (connected on the first request).
+        :param directory: Directory of the trades files and of the checkpoints.
+        :param concurrency: Requests in flight.
+        :param window: Pages fetched but not written yet (memory bound), at least concurrency.
+        :param page_size: Trades per request (at most 1000).
+        """
+        self.__client = client
+        self.__directory = directory
+        self.__concurrency = concurrency
+        self.__window = max(window, concurrency)
+        self.__page_size = min(page_size, 1000)
+        self.__states = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self.__checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+
+        # Metrics
+        self.rows = 0
+        self.pages = 0
+        self.retries = 0
+        self.started = None
+        self.elapsed = 0.0
+        self.__last_checkpoint = 0.0
+        self.__last_report = 0.0
+
+    # ##################################################################
+    # CHECKPOINTS
+    # ##################################################################
+
+    def checkpoints(self):
+        """
+        :return: Checkpoints saved, by instrument (dict).
+        """
+        if not os.path.exists(self.__checkpoint_path):
+            return {}
+        with open(self.__checkpoint_path, "rb") as f:
+            return json.decode(f.read())
+
+    def __save(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.__last_checkpoint < CHECKPOINT_INTERVAL:
+            return
+        self.__last_checkpoint = now
+
+        # Trades flushed before the checkpoint covering them
+        for state in self.__states.values():
+            if state.file is not None:
+                state.file.flush()
+
+        checkpoints = self.checkpoints()
+        checkpoints.update({i: s.checkpoint() for i, s in self.__states.items()})
+
+        temp = f"{self.__checkpoint_path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(json.encode(checkpoints))
+        os.replace(temp, self.__checkpoint_path)
+
+    # ##################################################################
+    # RUN
+    # ##################################################################
+
+    async def run(self, instruments):
+        """
+        :param instruments: Instrument names.
+        :return: Metrics (dict), see metrics().
+        """
+        self.started = self.__last_report = time.monotonic()
+        checkpoints = self.checkpoints()
+
+        for instrument in instruments:
+            checkpoint = checkpoints.get(instrument, {})
+            self.__states[instrument] = InstrumentBackfill(instrument,
+                                                           os.path.join(self.__directory, instrument + TRADES_SUFFIX),
+                                                           seq=checkpoint.get("seq", 0),
+                                                           offset=checkpoint.get("offset", 0))
+
+        try:
+            # Last trade_seq of each instrument
+            slots = asyncio.Semaphore(self.__concurrency)
+            await asyncio.gather(*[self.__find_end(s, slots) for s in self.__states.values()])
+
+            # Pages, instrument after instrument
+            pages = self.__pages()
+            window = asyncio.Semaphore(self.__window)
+            await asyncio.gather(*[self.__work(pages, window) for _ in range(self.__concurrency)])
+
+        finally:
+            for state in self.__states.values():
+                state.close()
+            self.__save(force=True)
+            self.elapsed = time.monotonic() - self.started
+
+        metrics = self.metrics()
+        logger.info(f"Backfill: {metrics['rows']} trades in {metrics['elapsed']:.1f}s "
+                    f"({metrics['rows_per_second']:.0f}/s), {metrics['done']}/{metrics['instruments']} "
+                    f"instrument(s) complete, {len(metrics['failed'])} failed.")
+        return metrics
+
+    async def __find_end(self, state, slots):
+        async with slots:
+            msg = lambda: mkt_data.request_last_trades_by_instrument(state.instrument, count=1)
+            result = await self.__request(msg)
+
+        if result is None:
+            state.failed = True
+            logger.warning(f"Backfill {state.instrument}: last trade not found.")
+            return
+
+        trades = result.get("trades", [])
+        state.end_seq = trades[0]["trade_seq"] if trades else 0
+
+    def __pages(self):
+        for state in self.__states.values():
+            if state.failed or state.done:
+                continue
+            for start_seq in range(state.seq + 1, state.end_seq + 1, self.__page_size):
+                yield state, start_seq, min(start_seq + self.__page_size - 1, state.end_seq)
+
+    async def __work(self, pages, window):
+        while True:
+
+            # Taken before the page (the oldest page not written always
+            # holds one), released once the page is written or given up
+            await window.acquire()
+
+            # Shared generator: each page is handed out once
+            page = next(pages, None)
+            if page is None:
+                window.release()
+                return
+
+            state, start_seq, end_seq = page
+            if state.failed:
+                window.release()
+                continue
+
+            msg = lambda: mkt_data.request_trades_by_seq(state.instrument, start_seq, end_seq)
+            result = await self.__request(msg)
+
+            if state.failed:
+                window.release()
+                continue
+
+            if result is None:
+                # Nothing written beyond this page: pages kept aside are dropped
+                logger.warning(f"Backfill {state.instrument}: trades {start_seq}-{end_seq} not received, "
+                               f"stopped at {state.seq}.")
+                state.failed = True
+                for _ in range(len(state.pages) + 1):
+                    window.release()
+                state.pages.clear()
+                state.close()
+                continue
+
+            trades = sorted(result.get("trades", []), key=lambda t: t["trade_seq"])
+            self.rows += len(trades)
+            self.pages += 1
+            for _ in range(state.store(start_seq, end_seq, trades)):
+                window.release()
+
+            self.__save()
+            self.__report()
+
+    async def __request(self, make_message):
+        """
+        :param make_message: Builds the request (a new id for each attempt).
+        :return: Result of the request (None if every attempt failed).
+        """
+        for attempt in range(PAGE_ATTEMPTS):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(RETRY_DELAY * attempt)
+
+            replies = await self.__client.send_request(make_message())
+            if not replies:
+                continue
+            reply = replies[0]
+            if RESP_ERROR in reply or RESP_CONTENT not in reply:
+                logger.debug(f"Backfill: request failed ({reply.get(RESP_ERROR, None)}).")
+                continue
+            return reply[RESP_CONTENT]
+
+        return None
+
+    # ##################################################################
+    # METRICS
+    # ##################################################################
+
+    def __report(self):
+        now = time.monotonic()
+        if now - self.__last_report < REPORT_INTERVAL:
+            return
+        self.__last_report = now
+        metrics = self.metrics()
+        logger.info(f"Backfill: {metrics['rows']} trades ({metrics['rows_per_second']:.0f}/s), "
+                    f"{metrics['done']}/{metrics['instruments']} instrument(s) complete.")
+
+    def metrics(self):
+        states = list(self.__states.values())
+        elapsed = self.elapsed or (time.monotonic() - self.started if self.started else 0.0)
+        return {"instruments": len(states),
+                "done": sum(s.done for s in states),
+                "failed": [s.instrument for s in states if s.failed],
+                "rows": self.rows,
+                "pages": self.pages,
+                "retries": self.retries,
+                "elapsed": elapsed,
+                "rows_per_second": self.rows / elapsed if elapsed else 0.0}
+
+
+# ####################################################################
+# STANDALONE
+# ####################################################################
+
+if __name__ == "__main__":
+
+    from deribit.unified.aio_requests import AsyncRequestClient
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Backfill the trades of many instruments.")
+    parser.add_argument("directory", help="trades files and checkpoints")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--currency", default="BTC")
+    parser.add_argument("--kind", default="option")
+    parser.add_argument("--expired", action="store_true", help="expired instruments")
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    args = parser.parse_args()
+
+    async def main():
+        async with AsyncRequestClient(args.url, key=None, secret=None) as client:
+            replies = await client.instruments(currency=args.currency, kind=args.kind, expired=args.expired)
+            instruments = [i["instrument_name"] for r in replies for i in r.get(RESP_CONTENT, [])]
+            backfill = TradeBackfill(client, args.directory, concurrency=args.concurrency,
+                                     window=4 * args.concurrency)
+            await backfill.run(instruments)
+
+    asyncio.run(main())
@@ -1,9 +1,10 @@
 # Core
 import time
+import weakref
 import logging
 import threading
 from abc import ABC
-import datetime as dt
+from concurrent.futures import Future, wait
 
 # External frameworks
 import websocket
@@ -14,6 +15,25 @@ from websocket._exceptions import WebSocketConnectionClosedException
 from utilities import json
 from utilities.id import generate_id
 from deribit.messages import session
+from deribit.messages.templates import frame
+from deribit.support.limits import RateLimiter
+from deribit.unified.tokens import TokenStore
+from deribit.unified.pending import PendingTable
+from deribit.unified.latency import LatencyRecorder
+from deribit.unified.dispatch import OrderedDispatcher
+from deribit.unified.supervisor import ReconnectSupervisor
+from deribit.unified.routing import ChannelRouter, subscription_envelope
+from deribit.support.networking import (RESP_ERROR,
+                                        RESP_ERR_CODE,
+                                        RESP_ERR_MESSAGE,
+                                        RESP_ERR_TOO_MANY_REQUESTS,
+                                        RESP_ERR_CONNECTION_LOST,
+                                        RESP_ERR_TIMEOUT)
+from deribit.support.endpoints import (METHOD_SUBSCRIBE,
+                                       METHOD_UNSUBSCRIBE,
+                                       METHOD_PRIVATE_SUBSCRIBE,
+                                       METHOD_PRIVATE_UNSUBSCRIBE,
+                                       NON_REPLAYABLE_METHODS)
 
 # ####################################################################
 # CONSTANTS
@@ -21,10 +41,30 @@ from deribit.messages import session
 
 MAX_STARTUP_TIME = 2.0
 REQUEST_MAX_RETRIES = 10
-CHECK_INTERVAL = 0.00001
 STARTUP_SCALING = 10
 REQUEST_TIMEOUT = 2.5
 
+# Session requests (login, heartbeat...): purged if never answered
+SESSION_REQUEST_TIMEOUT = 10.0
+
+# Token refresh postponed while another connection refreshes (seconds)
+TOKEN_REFRESH_RETRY_DELAY = 0.5
+
+# Period of the purge of expired requests
+EXPIRY_INTERVAL = 0.05
+
+# Subscription methods: channels added or removed
+SUBSCRIPTION_CHANGES = {METHOD_SUBSCRIBE: (METHOD_SUBSCRIBE, True),
+                        METHOD_UNSUBSCRIBE: (METHOD_SUBSCRIBE, False),
+                        METHOD_PRIVATE_SUBSCRIBE: (METHOD_PRIVATE_SUBSCRIBE, True),
+                        METHOD_PRIVATE_UNSUBSCRIBE: (METHOD_PRIVATE_SUBSCRIBE, False)}
+
+RESUBSCRIPTION_MESSAGES = {METHOD_SUBSCRIBE: session.subscription_message,
+                           METHOD_PRIVATE_SUBSCRIBE: session.private_subscription_message}
+
+# Maximum number of requests sent but not yet answered
+MAX_IN_FLIGHT = 50
+
 PING_INTERVAL = 60
 PING_TIMEOUT = 15
 
@@ -63,11 +103,24 @@ class UnifiedClient(ABC):
                  key=None, secret=None,  # Connection using credentials
                  access_token=None, refresh_token=None, expiry=None,  # Connection using tokens
                  name=None,  # Name of this connection
-                 callback=None):  # Default callback (callable)
+                 callback=None,  # Default callback (callable)
+                 max_in_flight=MAX_IN_FLIGHT,  # Window of un-acked requests
+                 rate_limiter=None,  # Request credits (shared across connections)
+                 dispatcher=None,  # Runs the user's callbacks (may be shared)
+                 token_store=None,  # Tokens (shared across connections)
+                 latency=None):  # Latency histograms (may be shared)
 
         # Default callback (for subscriptions only)
         self._callback = callback
 
+        # User callbacks run on worker threads, in order per channel,
+        # never on the thread reading the socket
+        self._dispatcher = dispatcher or OrderedDispatcher(name=f"DISPATCH-{name or 'WS'}")
+        self.__owns_dispatcher = dispatcher is None
+
+        # Handlers of subscription notifications, by channel prefix
+        self._router = ChannelRouter()
+
         # Base url
         self.__url = url
 
@@ -78,13 +131,12 @@ class UnifiedClient(ABC):
         # Bool: ok to use credentials
         self.__authenticate_with_credentials = bool(key and secret)
 
-        # Tokens: stored at login, but not used... @ TODO
-        self.__access_token = access_token
-        self.__refresh_token = refresh_token
-        self.__token_expiry = expiry
-
-        # Bool: ok to use token
-        self.__authenticate_with_token = bool(access_token)
+        # Tokens: stored at login, used to log in again (reconnections,
+        # other connections of the account) and refreshed before expiry
+        self._tokens = token_store or TokenStore(access_token=access_token,
+                                                 refresh_token=refresh_token,
+                                                 expiry=expiry)
+        self.__refresh_timer = None
 
         # Name for events
         self._name = name or generate_id(4).upper()
@@ -95,18 +147,37 @@ class UnifiedClient(ABC):
         # Properties
         self._is_closing = False
 
-        # Messages: information about SENT messages
-        self._sent_messages = {}
-        self._sent_messages_callbacks = {}
+        # Messages: sent and not answered yet, with their callback
+        # (or the future of the blocking caller), by id. Those written
+        # to the socket are replayed on a new connection if it drops.
+        self._pending = PendingTable()
+
+        # Channels currently subscribed to (resubscribed on reconnection),
+        # by subscription method
+        self._channels = {METHOD_SUBSCRIBE: set(), METHOD_PRIVATE_SUBSCRIBE: set()}
+
+        # Messages: window of requests sent but not yet answered,
+        # a slot is freed as soon as the reply arrives
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._in_flight_ids = set()
+
+        # Request credits, may be shared with other connections
+        self._rate_limiter = rate_limiter or RateLimiter()
 
-        # Messages: information about RECEIVED messages
-        self._answers_received = {}
+        # Raw frames received, logged for replay (see record())
+        self._recorder = None
+
+        # Latency of the replies, by endpoint, split into components
+        self._latency = latency or LatencyRecorder()
 
         # Startup precautions
-        self._secured_connection = False
+        self._secured_connection = threading.Event()
 
-        # Last unexpected disconnect
-        self._disconnect_back_off = 0.25
+        # Unexpected disconnections are handled in the background
+        self._supervisor = ReconnectSupervisor(reconnect=self._reconnect,
+                                               restore=self._restore,
+                                               ready=self._secured_connection,
+                                               name=self._name)
 
         # Handle: on message
         def on_message(ws, message):
@@ -144,8 +215,16 @@ class UnifiedClient(ABC):
 
         self.on_pong = on_pong
 
-        # Websocket
+        # Websocket and the thread reading it
         self.__ws = None
+        self._reader_thread = None
+        self.__connect_lock = threading.Lock()
+
+        # Requests left without reply are completed with a timeout
+        # error (the thread does not keep the client alive)
+        th = threading.Thread(target=expire_forever, args=(weakref.ref(self),),
+                              name=f"{self._name}-EXPIRY", daemon=True)
+        th.start()
 
     # ##################################################################
     # DESTRUCTION
@@ -154,6 +233,39 @@ class UnifiedClient(ABC):
     def __del__(self):
         self._is_closing = True
 
+    def stop(self, timeout: float = MAX_STARTUP_TIME):
+        """
+        Close the connection and stop the threads of this client: reader,
+        expiry, reconnection, token refresh, and the callback workers
+        unless the dispatcher was provided (shared with other clients).
+        Named stop() as close() is the endpoint closing a position.
+        :param timeout: Time given to the reader to close the connection.
+        """
+        # Read by the expiry thread and by the close handler
+        self._is_closing = True
+        self._supervisor.stop()
+        self.__cancel_refresh()
+
+        ws = self.__ws
+        if ws is not None:
+            self.__retire(ws)
+            reader = self._reader_thread
+            if reader is not None and reader is not threading.current_thread():
+                reader.join(timeout)
+
+        if self.__owns_dispatcher:
+            self._dispatcher.stop()
+
+    # ##################################################################
+    # CONTEXT MANAGER
+    # ##################################################################
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.stop()
+
     # ##################################################################
     # PROPERTIES
     # ##################################################################
@@ -164,6 +276,10 @@ class UnifiedClient(ABC):
             self.maybe_reconnect()
         return self.__ws
 
+    @property
+    def in_flight(self):
+        return len(self._in_flight_ids)
+
     # ##################################################################
     # WEBSOCKET BASIC OPERATIONS
     # ##################################################################
@@ -172,125 +288,214 @@ class UnifiedClient(ABC):
 
         # Trying to implement heartbeat
         # kwargs = {"ping_interval": PING_INTERVAL, "ping_timeout": PING_TIMEOUT}
-        kwargs = {}
+        # Frames are handed over as raw bytes, decoded once by the json codec
+        kwargs = {"skip_utf8_validation": True}
         th = threading.Thread(target=ws.run_forever, kwargs=kwargs)
+        self._reader_thread = th
 
         th.start()
         time.sleep(max(0.025, startup_delay / 1000.0))
 
     def maybe_reconnect(self):
-        if not self.__ws:
-            """
-            ws = websocket.WebSocketApp(self.__url,
-                                        on_open=self.on_open,
-                                        on_message=self.on_message,
-                                        on_error=self.on_error,
-                                        on_close=self.on_close,
-                                        on_ping=self.on_ping,
-                                        on_pong=self.on_pong)
-            """
-            ws = websocket.WebSocketApp(self.__url,
-                                        on_message=lambda w, m: self.on_message(w, m),
-                                        on_error=lambda w, m: self.on_error(w, m),
-                                        on_close=lambda w: self.on_close(w),
-                                        on_open=lambda w: self.on_open(w))
-
-            # Set locally
-            self.__ws = ws
-            self.run_forever_on_thread(ws, startup_delay=self._startup_delay)
+        if self.__ws:
+            return
+
+        with self.__connect_lock:
+            if not self.__ws:
+                self.__connect()
+
+    def _reconnect(self):
+        # Replace the connection, whatever its state
+        with self.__connect_lock:
+            self.__connect()
+
+    def __connect(self):
+        """
+        ws = websocket.WebSocketApp(self.__url,
+                                    on_open=self.on_open,
+                                    on_message=self.on_message,
+                                    on_error=self.on_error,
+                                    on_close=self.on_close,
+                                    on_ping=self.on_ping,
+                                    on_pong=self.on_pong)
+        """
+        # Recent versions of websocket-client call on_close(ws, status, reason)
+        ws = websocket.WebSocketApp(self.__url,
+                                    on_data=lambda w, d, opcode, fin: self._on_data(w, d, opcode),
+                                    on_message=lambda w, m: self.on_message(w, m),
+                                    on_error=lambda w, m: self.on_error(w, m),
+                                    on_close=lambda w, *args: self.on_close(w),
+                                    on_open=lambda w: self.on_open(w))
+
+        # Set locally, then retire the connection replaced
+        retired, self.__ws = self.__ws, ws
+        if retired is not None:
+            self.__retire(retired)
+        self.run_forever_on_thread(ws, startup_delay=self._startup_delay)
+
+    @staticmethod
+    def __retire(ws):
+        # Its reader stops and closes the socket (the socket may be dead
+        # already: the closing frame is not waited for), its callbacks no
+        # longer apply to this client (see _on_open, _on_error, _on_close).
+        # Closing the socket from here instead could leave the reader
+        # waiting forever.
+        ws.keep_running = False
+        sock = ws.sock
+        if sock is None:
+            return
+        try:
+            sock.send_close()
+        except Exception as e:
+            logger.debug(f"Unable to send the closing frame: {e}")
+        sock.abort()
 
     def send_request(self, message, callback=None):
         msg_cb = [(message, callback)]
         return self.send_multiple_requests(msg_cb)
 
-    def send_multiple_requests(self, messages_with_callbacks, retry=0):
-        try:
-            if retry > REQUEST_MAX_RETRIES:
-                raise ConnectionAbortedError("Maximum number of retries reached.")
-
-            # Look for broken connections
-            self.maybe_reconnect()
-
-            gentle_delay = 0.05 if len(messages_with_callbacks) > 50 else 0.0
-
-            counter = 0
-            while not self._secured_connection and counter < MAX_STARTUP_TIME:
-                time.sleep(CHECK_INTERVAL)
-                counter += CHECK_INTERVAL
-
-            # Send each message
-            waiting_ids = []
-            for msg_tuple in messages_with_callbacks:
-
-                msg, cb = msg_tuple[0], msg_tuple[1]
-
-                id_ = msg["id"]
-                self.ws.send(json.dumps(msg))
-                self._sent_messages[id_] = msg
-
-                if cb:
-                    self._sent_messages_callbacks[id_] = cb
-                else:
-                    waiting_ids.append(id_)
-
-                time.sleep(gentle_delay)
+    def send_multiple_requests(self, messages_with_callbacks):
+
+        # Look for broken connections
+        self.maybe_reconnect()
+
+        # Wait (without spinning) for the login to complete
+        self._secured_connection.wait(timeout=MAX_STARTUP_TIME)
+
+        # Send each message
+        retry = 0
+        waiting = []
+        for msg_tuple in messages_with_callbacks:
+
+            msg, cb = msg_tuple[0], msg_tuple[1]
+
+            # Register the message before sending it, the reply
+            # may arrive before send() even returns
+            id_ = msg["id"]
+            if cb:
+                self._pending.add(msg, callback=cb, timeout=REQUEST_TIMEOUT)
+            else:
+                # Kept here: the reply may pop the request before the wait
+                future = Future()
+                self._pending.add(msg, future=future, timeout=REQUEST_TIMEOUT)
+                waiting.append((id_, future))
+
+            # Wait for a free slot in the window of un-acked requests
+            # and for enough request credits
+            self.__acquire_slot(id_)
+            self.__acquire_credits(msg)
+
+            # Given up meanwhile (e.g. by the caller): never sent
+            if id_ not in self._pending:
+                self.__release_slot(id_)
+                continue
+            self.__track_channels(msg)
+
+            # Messages already written are replayed by the supervisor
+            # if the connection drops: only this one is retried here
+            while True:
+                try:
+                    self.__write(msg)
+                    break
+                except WebSocketConnectionClosedException:
+                    retry += 1
+                    if retry > REQUEST_MAX_RETRIES:
+                        self.__forget(id_)
+                        raise ConnectionAbortedError("Maximum number of retries reached.")
+                    self._supervisor.notify_disconnect()
+                    self._secured_connection.wait(timeout=MAX_STARTUP_TIME)
+
+        # If not callback provided,
+        # wait for the answer to arrive
+        if len(waiting) > 0:
+            return self.__wait_blocking(waiting)
+
+    def __write(self, message):
+        ws = self.ws
+        ws.send(frame(message))
+        self._pending.written(message["id"])
+
+    def __forget(self, id):
+        self._pending.pop(id)
+        self.__release_slot(id)
+
+    def __track_channels(self, message):
+        change = SUBSCRIPTION_CHANGES.get(message.get("method", None), None)
+        if not change:
+            return
 
-            # If not callback provided,
-            # wait for the answer to arrive
-            if len(waiting_ids) > 0:
-                return self.__wait_blocking(ids=waiting_ids)
+        method, subscribed = change
+        channels = message.get("params", {}).get("channels", [])
+        if subscribed:
+            self._channels[method].update(channels)
+        else:
+            self._channels[method].difference_update(channels)
 
-        except WebSocketConnectionClosedException:
-            self.maybe_reconnect()
-            time.sleep(0.01)
-            retry += 1
-            return self.send_multiple_requests(messages_with_callbacks=messages_with_callbacks,
-                                               retry=retry)
+    def __wait_blocking(self, waiting):
 
-    def __wait_blocking(self, ids):
+        futures = [f for _, f in waiting]
 
-        ids = ids if isinstance(ids, list) else [ids]
-        total_number_of_ids = len(ids)
+        # Sleep until every reply has been received or the
+        # deadline (monotonic clock) has passed
+        wait(futures, timeout=REQUEST_TIMEOUT)
 
-        waiting_time = 0.0
-        result, queue = {}, self._answers_received
+        # Clean up: late replies will find no future and be dropped
+        for id, _ in waiting:
+            self.__forget(id)
 
-        while waiting_time < REQUEST_TIMEOUT:
+        # Return (in the order of the requests), timed out ones left out
+        return [f.result() for f in futures if f.done() and f.exception() is None]
 
-            # If the number of answers is not even the length of our
-            # messages, leave it be...
-            if len(self._answers_received) >= total_number_of_ids:
+    def __acquire_slot(self, id):
 
-                result = {id: queue[id] for id in ids if id in queue}
+        # The reader thread frees the slots: it must never block on them
+        # (e.g. a callback sending a request from within the reader)
+        if threading.current_thread() is self._reader_thread:
+            return
 
-                if len(result) == total_number_of_ids:
-                    break
+        if self._in_flight.acquire(timeout=REQUEST_TIMEOUT):
+            self._in_flight_ids.add(id)
+        else:
+            logger.warning(f"Window of in-flight requests still full after {REQUEST_TIMEOUT}s, sending anyway.")
 
-            # Some answers are missing, wait a bit...
-            time.sleep(CHECK_INTERVAL)
-            waiting_time += CHECK_INTERVAL
+    def __acquire_credits(self, message):
+        method = message.get("method", None)
 
-        # Clean up
-        for id in ids:
-            try:
-                del self._answers_received[id]
-                del self._sent_messages[id]
-            except:
-                pass
+        # Same as above: the reader thread is charged but never waits
+        if threading.current_thread() is self._reader_thread:
+            self._rate_limiter.reserve(method)
+        else:
+            self._rate_limiter.acquire(method)
 
-        # Return
-        return list(result.values())
+    def __release_slot(self, id):
+        try:
+            # Atomic: only one of the reader and the waiter gets here
+            self._in_flight_ids.remove(id)
+        except KeyError:
+            return
+        self._in_flight.release()
 
     # ##################################################################
     # MESSAGE HANDLER
     # ##################################################################
 
+    def _on_data(self, ws, data, opcode):
+        # Called right before _on_message: the opcode tells text frames
+        # (delivered as bytes, see run_forever_on_thread) from binary ones
+        if self._recorder is not None:
+            self._recorder.record(data, opcode=opcode)
+
     def _on_message(self, ws, message):
 
-        # Parse the message to python data
-        message = json.loads(message)
+        # Subscription notification: routed on its channel name,
+        # read from the raw frame, the payload is decoded on demand
+        envelope = subscription_envelope(message)
+        if envelope is not None:
+            self.__notify_data()
+            return self._on_envelope(envelope)
 
-        # print(message)
+        # Parse the message (raw bytes) to python data
+        message = json.decode(message)
 
         # This is a real message:
         # propagate to the user's callback
@@ -300,25 +505,42 @@ class UnifiedClient(ABC):
         else:
             return self._on_message_without_id(message)
 
-    def _on_message_with_id(self, message, id):
+    def __notify_data(self):
+        # Recovery metrics: replies and heartbeats are not data
+        if self._supervisor.awaiting_data:
+            self._supervisor.notify_data()
 
-        # Add to acknowledged messages
-        self._answers_received[id] = message
-
-        # Invoke the callback if there is one, else do nothing
-        # this assumes that if there is no callback, the method
-        # generating the request is waiting for the reply
-        if id in self._sent_messages_callbacks:
-            # Grab the callback
-            cb = self._sent_messages_callbacks[id]
+    def _on_message_with_id(self, message, id):
 
-            # Clean up
-            del self._sent_messages[id]
-            del self._sent_messages_callbacks[id]
-            del self._answers_received[id]
+        # Let the next request in
+        self.__release_slot(id)
+
+        # Nobody waits for this reply anymore (timed out,
+        # or the blocking caller gave up): drop it
+        pending = self._pending.pop(id)
+        if pending is None:
+            return self._pending.late()
+        self._latency.record(pending, message)
+
+        # The exchange refused the request for lack of credits
+        error = message.get(RESP_ERROR, None)
+        if error and error.get(RESP_ERR_CODE, None) == RESP_ERR_TOO_MANY_REQUESTS:
+            self._rate_limiter.throttled(pending.method)
+
+        # A blocking caller is waiting for this reply: wake it up
+        future = pending.future
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return
 
-            # Invoke
+        # Internal callbacks (login, heartbeat) run inline,
+        # the user's ones are queued: replies to the same method
+        # are delivered in order
+        cb = pending.callback
+        if getattr(cb, "__self__", None) is self:
             return cb(message)
+        return self._dispatcher.submit(self.__reply_key(pending.message), cb, message)
 
     def _on_message_without_id(self, message):
 
@@ -327,7 +549,9 @@ class UnifiedClient(ABC):
         # This messages comes from an existing
         # channel subscription, use provided callback
         if method == "subscription":
-            return self.on_subscription(message)
+            self.__notify_data()
+            channel = message.get("params", {}).get("channel", None)
+            return self._dispatcher.submit(channel, self.on_subscription, message)
 
         # This is a heartbeat message, NOT to be propagated
         # to the callback provided by the user
@@ -338,15 +562,81 @@ class UnifiedClient(ABC):
         # This is NOT supposed to happen
         logger.error(f"Got unexpected message: {message}")
 
+    def _on_envelope(self, envelope):
+        # The payload is decoded on the worker thread, not here
+        channel = envelope.channel
+        handler = self._router.handler(channel)
+        if handler is not None:
+            return self._dispatcher.submit(channel, handler, envelope)
+        return self._dispatcher.submit(channel, self._on_envelope_default, envelope,
+                                       label=getattr(self._callback, "__qualname__", None))
+
+    def _on_envelope_default(self, envelope):
+        return self.on_subscription(envelope.message)
+
     def on_subscription(self, message):
         return self._callback(message)
 
+    @staticmethod
+    def __reply_key(sent):
+        params = sent.get("params", None) or {}
+        return params.get("instrument_name", None) or sent.get("method", None)
+
+    def pending_metrics(self):
+        return self._pending.metrics()
+
+    def latency_metrics(self, method=None):
+        return self._latency.summary(method)
+
+    def dispatch_metrics(self):
+        return self._dispatcher.metrics()
+
+    def reconnect_metrics(self):
+        return self._supervisor.metrics()
+
+    def token_metrics(self):
+        return self._tokens.metrics()
+
+    def record(self, recorder):
+        """
+        Log the raw frames received (None to stop).
+        :param recorder: FrameRecorder (may be shared by several clients).
+        """
+        self._recorder = recorder
+
+    def drain(self, timeout: float = None):
+        """
+        Wait until the callbacks of the messages received so far have run.
+        """
+        return self._dispatcher.drain(timeout)
+
+    def submit(self, key, callback, message):
+        """
+        Run a callback on the worker of a key (e.g. a channel), after
+        the messages of that key already queued.
+        :param key: Channel, instrument...
+        :param callback: Callable receiving the message.
+        """
+        self._dispatcher.submit(key, callback, message)
+
+    def route(self, prefix, handler):
+        """
+        Handle the notifications of the channels starting with a prefix.
+        :param prefix: Channel prefix (e.g. 'book.' or 'book.BTC-PERPETUAL.raw').
+        :param handler: Callable receiving an Envelope (channel, data decoded on demand).
+        """
+        self._router.register(prefix, handler)
+
     # ##################################################################
     # ERROR HANDLER
     # ##################################################################
 
     def _on_error(self, ws, message):
 
+        # A connection replaced already
+        if ws is not self.__ws:
+            return
+
         # Warn the system about the event
         EVENT_WS_ERROR.send()
 
@@ -359,19 +649,42 @@ class UnifiedClient(ABC):
 
     def _on_open(self, ws):
 
+        # A connection replaced already
+        if ws is not self.__ws:
+            return
+
         # Warn the system about the event
         EVENT_WS_OPEN.send()
 
         # Log the event
         logger.info("Opening web socket connection.")
 
+        # A refresh token is available (from a previous login of this
+        # or another connection): use it, it spares the credentials login
+        if self._tokens.usable:
+            token = self._tokens.refresh_token
+            self.__login_with_token(lambda m: self._on_token_login(m, token), token)
+
         # The client has been provided with a username and password
         # logging in this way will trigger the retrieval of the tokens
         # which will later be used.
-        if self.__authenticate_with_credentials:
-            # Create message with credentials to retrieve the oauth token
-            credentials = session.login_message(key=self.__key, secret=self.__secret)
-            self.__send_preliminary_request(credentials, credentials["id"], self._on_login)
+        elif self.__authenticate_with_credentials:
+            self.__login_with_credentials(self._on_login)
+
+        # Public connection: usable as soon as it is open
+        else:
+            self._secured_connection.set()
+
+    def __login_with_credentials(self, callback):
+        # Create message with credentials to retrieve the oauth token
+        credentials = session.login_message(key=self.__key, secret=self.__secret)
+        self._tokens.credential_logins += 1
+        self.__send_preliminary_request(credentials, credentials["id"], callback)
+
+    def __login_with_token(self, callback, refresh_token=None):
+        msg = session.refresh_token_message(refresh_token=refresh_token or self._tokens.refresh_token)
+        self._tokens.token_logins += 1
+        self.__send_preliminary_request(msg, msg["id"], callback)
 
     def set_tokens(self, message):
 
@@ -382,29 +695,23 @@ class UnifiedClient(ABC):
             EVENT_WS_ERROR.send()
             raise NotImplementedError()
 
-        # Extract relevant token information
-        access_token = result.get("access_token", False)
-        refresh_token = result.get("refresh_token", False)
-
-        # Validate that we have at least an access token
-        if not access_token or not refresh_token:
+        try:
+            self._tokens.update(result)
+        except ValueError as e:
             EVENT_WS_ERROR.send()
-            raise NotImplementedError("Invalid login reply, unable to extract token information.")
-        else:
-            self.__access_token = access_token
-            self.__refresh_token = refresh_token
-            self.__authenticate_with_token = True
+            raise NotImplementedError(str(e))
 
-        # Compute token expiry
-        expiry_seconds = result.get("expires_in", False)
-        expiry = expiry_seconds + dt.datetime.utcnow().timestamp()
+    def _on_token_login(self, message, refresh_token=None):
 
-        # Validate that we have at least an access token
-        if not access_token or not refresh_token:
-            EVENT_WS_ERROR.send()
-            raise NotImplementedError("Invalid token expiry provided.")
-        else:
-            self.__token_expiry = expiry
+        # Refresh token rejected (expired, revoked...): log in again
+        # with the credentials, if any
+        if RESP_ERROR in message:
+            logger.warning(f"Login with the refresh token failed: {message[RESP_ERROR]}")
+            self._tokens.invalidate(refresh_token)
+            if self.__authenticate_with_credentials:
+                return self.__login_with_credentials(self._on_login)
+
+        return self._on_login(message)
 
     def _on_login(self, message):
 
@@ -413,20 +720,85 @@ class UnifiedClient(ABC):
             raise NotImplementedError()
 
         self.set_tokens(message)
+        self.__schedule_refresh()
 
-        self._secured_connection = True
+        self._secured_connection.set()
         logger.info("Web socket opened.")
 
-        self._disconnect_back_off = 0.25
-
         # Enable heartbeat
         heartbeat_msg = session.set_heartbeat_message()
         self.__send_preliminary_request(heartbeat_msg, heartbeat_msg["id"], self._on_heartbeat)
 
+    # ##################################################################
+    # TOKEN REFRESH
+    # ##################################################################
+
+    def __schedule_refresh(self, delay=None):
+        self.__cancel_refresh()
+
+        delay = delay or self._tokens.refresh_delay()
+        if delay is None:
+            return
+
+        timer = threading.Timer(delay, self.__refresh_tokens)
+        timer.daemon = True
+        timer.start()
+        self.__refresh_timer = timer
+
+    def __cancel_refresh(self):
+        if self.__refresh_timer:
+            self.__refresh_timer.cancel()
+            self.__refresh_timer = None
+
+    def __refresh_tokens(self):
+
+        # Reconnecting: the new login will bring new tokens
+        if not self._secured_connection.is_set():
+            return
+
+        # Another connection sharing the tokens is refreshing:
+        # try again with the refresh token it will leave
+        ticket = self._tokens.begin_refresh()
+        if ticket is None:
+            return self.__schedule_refresh(delay=TOKEN_REFRESH_RETRY_DELAY)
+
+        self._tokens.refreshes += 1
+        if self._tokens.usable:
+            token = self._tokens.refresh_token
+            self.__login_with_token(lambda m: self._on_token_refresh(m, ticket, token), token)
+        elif self.__authenticate_with_credentials:
+            self.__login_with_credentials(lambda m: self._on_token_refresh(m, ticket))
+        else:
+            self._tokens.end_refresh(ticket)
+
+    def _on_token_refresh(self, message, ticket=None, refresh_token=None):
+        self._tokens.end_refresh(ticket)
+
+        if RESP_ERROR in message:
+            logger.warning(f"Token refresh failed: {message[RESP_ERROR]}")
+
+            if refresh_token is not None and self.__authenticate_with_credentials:
+
+                # Fall back to the credentials once
+                if self._tokens.invalidate(refresh_token):
+                    return self.__login_with_credentials(self._on_token_refresh)
+
+                # Replaced meanwhile by another connection: use the new one
+                return self.__schedule_refresh(delay=TOKEN_REFRESH_RETRY_DELAY)
+
+            EVENT_WS_ERROR.send()
+            return
+
+        self.set_tokens(message)
+        self.__schedule_refresh()
+
     def __send_preliminary_request(self, message, id, callback):
-        self._sent_messages[id] = message
-        self._sent_messages_callbacks[id] = callback
-        self.ws.send(json.dumps(message))
+        # Never marked as written: session requests belong
+        # to their connection, they are not replayed
+        self._pending.add(message, callback=callback, timeout=SESSION_REQUEST_TIMEOUT)
+        self._rate_limiter.reserve(message.get("method", None))
+        self.ws.send(frame(message))
+        self._pending.start(id)
 
     # ##################################################################
     # CLOSE HANDLER
@@ -435,31 +807,95 @@ class UnifiedClient(ABC):
     def _on_close(self, ws):
         print("Socket closing.")
 
-        # Was supposed to happen
+        # Was supposed to happen (see stop())
         if self._is_closing:
+            self.__cancel_refresh()
             try:
-                ws.retire()
                 EVENT_WS_CLOSE.send()
             except:
                 pass
         # Not expected
         else:
 
+            # A connection replaced already
+            if ws is not self.__ws:
+                return
+
+            # The tokens are refreshed by the next login
+            self.__cancel_refresh()
+
             # Warn system of a problem.
             EVENT_WS_ERROR.send()
 
             # Log it
             logger.warning("Connection ended unexpectedly. Reconnecting to web socket server.")
 
-            # Delete the actual socket
-            self.__ws = None
+            # Hold the senders until the new connection is ready,
+            # reconnect from the supervisor's thread (never sleep here)
+            self._secured_connection.clear()
+            self._supervisor.notify_disconnect()
+
+    def _restore(self):
+
+        # Subscribe again to every active channel
+        for method, channels in self._channels.items():
+            if channels:
+                msg = RESUBSCRIPTION_MESSAGES[method](sorted(channels))
+                self.__send_preliminary_request(msg, msg["id"], self._on_resubscribed)
+
+        # Send again the requests left without reply (same ids: the
+        # callers keep waiting for them), except those which must
+        # not be executed twice, which fail
+        replayed = 0
+        for id, pending in self._pending.unanswered():
+            method = pending.method
+
+            if method in SUBSCRIPTION_CHANGES:
+                pending.written = False
+            elif method in NON_REPLAYABLE_METHODS:
+                error = "Connection lost before the reply, the request may or may not have been executed."
+                self._on_message_with_id(self.__error_reply(id, RESP_ERR_CONNECTION_LOST, error), id)
+            else:
+                self._rate_limiter.reserve(method)
+                self.ws.send(frame(pending.message))
+                replayed += 1
+
+        logger.info(f"Connection state restored: {replayed} request(s) replayed, "
+                    f"{sum(len(c) for c in self._channels.values())} channel(s) resubscribed.")
+
+    def _on_resubscribed(self, message):
+        if RESP_ERROR in message:
+            logger.error(f"Unable to subscribe again: {message[RESP_ERROR]}")
+
+    @staticmethod
+    def __error_reply(id, code, message):
+        error = {RESP_ERR_CODE: code, RESP_ERR_MESSAGE: message}
+        return {"jsonrpc": "2.0", "id": id, RESP_ERROR: error}
+
+    # ##################################################################
+    # EXPIRY
+    # ##################################################################
 
-            # Back off:
-            self._disconnect_back_off *= 2
-            time.sleep(min(10.0, self._disconnect_back_off))
+    def _expire(self):
+        for id, pending in self._pending.expire():
+            self.__release_slot(id)
 
-            # Reconnect
-            self.maybe_reconnect()
+            # Blocking caller: wake it up
+            if pending.future is not None:
+                if not pending.future.done():
+                    pending.future.set_exception(TimeoutError(f"No reply to request {id} ({pending.method})."))
+                continue
+
+            # Session requests belong to their connection: dropped
+            cb = pending.callback
+            if getattr(cb, "__self__", None) is self:
+                logger.warning(f"No reply to session request {id} ({pending.method}).")
+                continue
+
+            # The user's callback gets a timeout error
+            error = f"No reply within {REQUEST_TIMEOUT}s, the request may or may not have been executed."
+            reply = self.__error_reply(id, RESP_ERR_TIMEOUT, error)
+            self._dispatcher.submit(self.__reply_key(pending.message), cb, reply)
 
     # ##################################################################
     # HEARTBEAT HANDLERS
@@ -485,3 +921,27 @@ class UnifiedClient(ABC):
         if type_ == "test_request":
             reply_msg = session.test_heartbeat_request_message()
             return self.send_request(reply_msg, callback=self._on_heartbeat)
+
+
+# ####################################################################
+# EXPIRY THREAD
+# ####################################################################
+
+def expire_forever(ref):
+    """
+    Purge the expired requests of a client, until it is closed or collected.
+    :param ref: Weak reference to the client.
+    """
+    while True:
+        time.sleep(EXPIRY_INTERVAL)
+
+        client = ref()
+        if client is None or client._is_closing:
+            return
+
+        try:
+            client._expire()
+        except Exception:
+            logger.exception("Unable to purge the expired requests.")
+
+        del client
@@ -0,0 +1,145 @@
+# Core
+import time
+import queue
+import logging
+import threading
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+DISPATCH_WORKERS = 4
+
+# Label of the markers queued by drain()
+DRAIN = object()
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ####################################################################
+# DISPATCHER
+# ####################################################################
+
+class OrderedDispatcher(object):
+    """
+    Runs user callbacks on a pool of worker threads, away from the
+    websocket reader. All the messages of one key (channel, instrument)
+    go to the same worker, hence are processed in order, while
+    different keys are processed in parallel.
+    """
+
+    def __init__(self, workers: int = DISPATCH_WORKERS, name: str = "DISPATCH"):
+
+        self.__queues = [queue.SimpleQueue() for _ in range(max(1, int(workers)))]
+
+        # Latency by callback, one dict per worker (no lock needed):
+        # label -> [count, total seconds, max seconds]
+        self.__stats = [{} for _ in self.__queues]
+        self.__errors = [0 for _ in self.__queues]
+
+        self.__threads = []
+        for i, q in enumerate(self.__queues):
+            th = threading.Thread(target=self.__work, args=(i, q), name=f"{name}-{i}", daemon=True)
+            th.start()
+            self.__threads.append(th)
+
+    # ##################################################################
+    # SUBMISSION
+    # ##################################################################
+
+    def submit(self, key, callback, message, label=None):
+        """
+        Queue a callback invocation.
+        :param key: Messages sharing a key are delivered in order.
+        :param callback: Callable invoked with the message.
+        :param message: Argument of the callback.
+        :param label: Name used in the latency metrics (default: the callback's name).
+        """
+        q = self.__queues[hash(key) % len(self.__queues)]
+        q.put((callback, message, label))
+
+    def stop(self):
+        for q in self.__queues:
+            q.put(None)
+
+    def drain(self, timeout: float = None):
+        """
+        Wait until the callbacks queued so far have run.
+        :return: False if the timeout expired first.
+        """
+        markers = [threading.Event() for _ in self.__queues]
+        for q, marker in zip(self.__queues, markers):
+            q.put((marker.set, None, DRAIN))
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for marker in markers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not marker.wait(remaining):
+                return False
+        return True
+
+    # ##################################################################
+    # WORKERS
+    # ##################################################################
+
+    def __work(self, index, q):
+        stats = self.__stats[index]
+
+        while True:
+            item = q.get()
+            if item is None:
+                return
+
+            callback, message, label = item
+            if label is DRAIN:
+                callback()
+                continue
+
+            start = time.perf_counter()
+
+            try:
+                callback(message)
+            except Exception:
+                self.__errors[index] += 1
+                logger.exception(f"Callback failed: {label or callback}.")
+
+            elapsed = time.perf_counter() - start
+
+            label = label or getattr(callback, "__qualname__", None) or repr(callback)
+            entry = stats.get(label, None)
+            if entry is None:
+                stats[label] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+
+    # ##################################################################
+    # METRICS
+    # ##################################################################
+
+    @property
+    def queue_depths(self):
+        return [q.qsize() for q in self.__queues]
+
+    def metrics(self):
+        callbacks = {}
+        for stats in self.__stats:
+            for label, (count, total, max_) in list(stats.items()):
+                agg = callbacks.setdefault(label, {"count": 0, "total": 0.0, "max": 0.0})
+                agg["count"] += count
+                agg["total"] += total
+                agg["max"] = max(agg["max"], max_)
+
+        for agg in callbacks.values():
+            agg["mean"] = agg["total"] / agg["count"]
+
+        return {"queue_depths": self.queue_depths,
+                "errors": sum(self.__errors),
+                "callbacks": callbacks}
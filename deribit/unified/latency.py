@@ -0,0 +1,116 @@
+# Core
+import time
+import threading
+
+# Local
+from utilities.histogram import Histogram
+from deribit.support.networking import RESP_TS_IN, RESP_TS_OUT
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Components of the latency of a request (microseconds):
+#  - local: registration to frame written (window, credits, serialization)
+#  - wire_out: frame written to received by the exchange (usIn)
+#  - exchange: processing by the exchange (usOut - usIn)
+#  - wire_back: reply sent by the exchange (usOut) to reply read
+#  - round_trip: frame written to reply read (local clock only)
+LOCAL = "local"
+WIRE_OUT = "wire_out"
+EXCHANGE = "exchange"
+WIRE_BACK = "wire_back"
+ROUND_TRIP = "round_trip"
+
+COMPONENTS = (LOCAL, WIRE_OUT, EXCHANGE, WIRE_BACK, ROUND_TRIP)
+
+
+# ####################################################################
+# LATENCY RECORDER
+# ####################################################################
+
+class LatencyRecorder(object):
+    """
+    Latency of the replies received, split into components, in one
+    histogram per endpoint and component: tells whether a slow request
+    was slow in our code, on the network or in the matching engine.
+
+    The wire components compare the local clock with the exchange's:
+    they are only as accurate as the synchronization of the local clock
+    (the exchange and round trip components are not affected).
+    """
+
+    def __init__(self):
+        self.__histograms = {}
+        self.__lock = threading.Lock()
+
+        # Replies without exchange timestamps (round trip only)
+        self.unstamped = 0
+
+    def record(self, pending, reply):
+        """
+        :param pending: PendingRequest answered (written to the socket).
+        :param reply: Reply (dict).
+        """
+        if not pending.written:
+            return
+
+        received = time.monotonic()
+        histograms = self.__histograms_of(pending.method)
+
+        histograms[LOCAL].record((pending.sent_at - pending.created_at) * 1e6)
+        histograms[ROUND_TRIP].record((received - pending.sent_at) * 1e6)
+
+        us_in = reply.get(RESP_TS_IN, None)
+        us_out = reply.get(RESP_TS_OUT, None)
+        if not us_in or not us_out:
+            self.unstamped += 1
+            return
+
+        # Wall clock time of the send, from the monotonic clock
+        received_us = time.time() * 1e6
+        sent_us = received_us - (received - pending.sent_at) * 1e6
+
+        histograms[WIRE_OUT].record(us_in - sent_us)
+        histograms[EXCHANGE].record(us_out - us_in)
+        histograms[WIRE_BACK].record(received_us - us_out)
+
+    def __histograms_of(self, method):
+        histograms = self.__histograms.get(method, None)
+        if histograms is None:
+            with self.__lock:
+                histograms = self.__histograms.setdefault(method, {c: Histogram() for c in COMPONENTS})
+        return histograms
+
+    # ##################################################################
+    # QUERIES
+    # ##################################################################
+
+    @property
+    def methods(self):
+        return list(self.__histograms)
+
+    def histogram(self, method, component=ROUND_TRIP):
+        """
+        :param method: Endpoint (e.g. 'private/buy').
+        :param component: One of COMPONENTS.
+        :return: Histogram (None if nothing recorded for that endpoint).
+        """
+        histograms = self.__histograms.get(method, None)
+        return histograms[component] if histograms else None
+
+    def summary(self, method=None):
+        """
+        :param method: Endpoint (default: all of them).
+        :return: Summaries (count, mean, percentiles...) by component,
+                 by endpoint if no method is given (microseconds).
+        """
+        if method is not None:
+            histograms = self.__histograms.get(method, {})
+            return {c: h.summary() for c, h in histograms.items()}
+        return {m: self.summary(m) for m in self.methods}
+
+    def reset(self):
+        with self.__lock:
+            self.__histograms = {}
+            self.unstamped = 0
@@ -0,0 +1,138 @@
+# Core
+import time
+
+# Local
+from deribit.unified.timer_wheel import TimerWheel
+
+# ####################################################################
+# PENDING REQUEST
+# ####################################################################
+
+
+class PendingRequest(object):
+    """
+    A request sent (or about to be) and not answered yet: what was sent,
+    who is waiting for the reply, and when it was sent. The timeout runs
+    from the send: waiting for a slot or for credits does not count.
+    """
+
+    __slots__ = ("message", "callback", "future", "created_at", "sent_at", "timeout", "deadline", "written")
+
+    def __init__(self, message, callback=None, future=None, timeout=None):
+        self.message = message
+        self.callback = callback
+        self.future = future
+        self.created_at = self.sent_at = time.monotonic()
+        self.timeout = timeout
+        self.deadline = None
+
+        # Written to the socket (else: not sent yet, or sent on a
+        # connection which has been replaced)
+        self.written = False
+
+    @property
+    def method(self):
+        return self.message.get("method", None)
+
+
+# ####################################################################
+# PENDING TABLE
+# ####################################################################
+
+class PendingTable(object):
+    """
+    Pending requests by id, in one place: registered before the send,
+    removed by whoever completes them (reply, timeout, caller). Requests
+    with a timeout are also scheduled in a timer wheel, so that those
+    never answered are purged instead of piling up.
+    """
+
+    def __init__(self, wheel=None):
+        self.__pending = {}
+        self.__wheel = wheel or TimerWheel()
+
+        # Metrics
+        self.expired = 0
+        self.late_replies = 0
+
+    def add(self, message, callback=None, future=None, timeout=None):
+        id_ = message["id"]
+        pending = PendingRequest(message, callback=callback, future=future, timeout=timeout)
+        self.__pending[id_] = pending
+        return pending
+
+    def get(self, id):
+        return self.__pending.get(id, None)
+
+    def pop(self, id):
+        # Atomic: only one of the reader and the waiter gets the entry
+        return self.__pending.pop(id, None)
+
+    def expire(self, now=None):
+        """
+        Remove the requests of which the deadline has passed.
+        :param now: time.monotonic() based (default: now).
+        :return: List of (id, PendingRequest), for the owner to complete.
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+
+        for id in self.__wheel.advance(now):
+            pending = self.__pending.get(id, None)
+
+            # Completed in the meantime (or never sent)
+            if pending is None or pending.deadline is None:
+                continue
+
+            # Id reused by a newer request
+            if pending.deadline > now:
+                self.__wheel.schedule(id, pending.deadline)
+                continue
+
+            if self.__pending.pop(id, None) is pending:
+                expired.append((id, pending))
+
+        self.expired += len(expired)
+        return expired
+
+    def late(self):
+        # A reply arrived for a request completed already (timed out)
+        self.late_replies += 1
+
+    def start(self, id):
+        """
+        Start the timeout of a request, once sent.
+        :return: False if no longer pending (answered, or given up).
+        """
+        pending = self.__pending.get(id, None)
+        if pending is None:
+            return False
+
+        if pending.timeout and pending.deadline is None:
+            pending.deadline = time.monotonic() + pending.timeout
+            self.__wheel.schedule(id, pending.deadline)
+        return True
+
+    def written(self, id):
+        pending = self.__pending.get(id, None)
+        if pending is None:
+            return False
+
+        pending.sent_at = time.monotonic()
+        pending.written = True
+        return self.start(id)
+
+    def unanswered(self):
+        return [(id, p) for id, p in list(self.__pending.items()) if p.written]
+
+    def __contains__(self, id):
+        return id in self.__pending
+
+    def __len__(self):
+        return len(self.__pending)
+
+    def metrics(self):
+        return {"pending": len(self.__pending),
+                "scheduled": len(self.__wheel),
+                "expired": self.expired,
+                "late_replies": self.late_replies}
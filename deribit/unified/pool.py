@@ -0,0 +1,160 @@
+# Core
+import logging
+import threading
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# ####################################################################
+# CATEGORIES
+# ####################################################################
+
+TRADING = "trading"
+ACCOUNT = "account"
+MARKET_DATA = "market_data"
+BULK = "bulk"
+
+# Members which are not endpoints (send_request, metrics...)
+DEFAULT_CATEGORY = MARKET_DATA
+
+DEFAULT_POOL_SIZES = {TRADING: 1,
+                      ACCOUNT: 1,
+                      MARKET_DATA: 1,
+                      BULK: 1}
+
+# Category of each request method (see RequestEndpoints)
+METHOD_CATEGORIES = {
+    # Session
+    "server_time": MARKET_DATA,
+    "test": MARKET_DATA,
+    "test_exception": MARKET_DATA,
+
+    # Market data
+    "index_level": MARKET_DATA,
+    "btc_index": MARKET_DATA,
+    "eth_index": MARKET_DATA,
+    "instruments": MARKET_DATA,
+    "currencies": MARKET_DATA,
+    "orderbooks": MARKET_DATA,
+    "quotes": MARKET_DATA,
+    "book_summary_by_currency": MARKET_DATA,
+    "book_summary_by_instrument": MARKET_DATA,
+
+    # History (large, slow requests)
+    "trades": BULK,
+    "all_trades": BULK,
+
+    # Account
+    "position": ACCOUNT,
+    "all_positions": ACCOUNT,
+    "account_summary": ACCOUNT,
+    "announcements": ACCOUNT,
+    "create_api_key": ACCOUNT,
+    "delete_api_key": ACCOUNT,
+    "list_sub_accounts": ACCOUNT,
+    "create_sub_account": ACCOUNT,
+    "change_name_of_sub_account": ACCOUNT,
+
+    # Trading
+    "buy": TRADING,
+    "sell": TRADING,
+    "close": TRADING,
+    "cancel_all": TRADING,
+    "cancel_all_by_currency": TRADING,
+    "cancel_all_by_instrument": TRADING,
+    "estimate_margins": TRADING,
+    "open_orders_by_currency": TRADING,
+    "open_orders_by_instrument": TRADING,
+    "user_trades_by_currency": TRADING,
+    "user_trades_by_instrument": TRADING,
+    "order_status": TRADING,
+}
+
+
+# ####################################################################
+# CONNECTION POOL (ONE CATEGORY)
+# ####################################################################
+
+class ConnectionPool(object):
+    """
+    Up to 'size' connections, opened on demand: a request goes to an
+    idle connection, to a new one while the pool is not full, or else
+    to the connection with the fewest requests in flight.
+    """
+
+    def __init__(self, factory, size: int, name: str):
+        self.__factory = factory
+        self.__size = max(1, int(size))
+        self.__name = name
+        self.__clients = []
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def clients(self):
+        return list(self.__clients)
+
+    def client(self):
+        clients = self.__clients
+
+        for c in clients:
+            if c.in_flight == 0:
+                return c
+
+        with self.__lock:
+            if len(self.__clients) < self.__size:
+                name = f"{self.__name}-{len(self.__clients)}".upper()
+                c = self.__factory(name)
+                self.__clients.append(c)
+                logger.info(f"Connection {name} added to the pool.")
+                return c
+
+        return min(self.__clients, key=lambda x: x.in_flight)
+
+    def stop(self):
+        with self.__lock:
+            clients, self.__clients = self.__clients, []
+        for c in clients:
+            c.stop()
+
+
+# ####################################################################
+# REQUEST CLIENT BACKED BY ONE POOL PER CATEGORY
+# ####################################################################
+
+class PooledRequestClient(object):
+    """
+    Same methods as RequestClient, each routed to the pool of its
+    category, so that e.g. a large history backfill never delays
+    order placement or cancellation. The other members (send_request,
+    send_multiple_requests, route, drain, metrics...) are those of a
+    connection of the default category.
+    """
+
+    def __init__(self, factory, pool_sizes=None):
+        sizes = {**DEFAULT_POOL_SIZES, **(pool_sizes or {})}
+        self.__pools = {category: ConnectionPool(factory=factory, size=size, name=category)
+                        for category, size in sizes.items()}
+
+    def pool(self, category):
+        return self.__pools[category]
+
+    def stop(self):
+        # Every connection opened, in every pool
+        for pool in self.__pools.values():
+            pool.stop()
+
+    def __getattr__(self, name):
+        # Private names never reach the connections (nor the pools,
+        # e.g. while the object is being built or copied)
+        if name.startswith("_"):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        category = METHOD_CATEGORIES.get(name, DEFAULT_CATEGORY)
+        return getattr(self.__pools[category].client(), name)
@@ -0,0 +1,209 @@
+# Core
+import gzip
+import time
+import struct
+import logging
+import threading
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Header of the frame logs, and of each frame:
+# receive time (ns since epoch), length, type (text or bytes)
+MAGIC = b"DRBFRAMES1\n"
+RECORD = struct.Struct("<qIB")
+
+TEXT = 0
+BINARY = 1
+
+# Type of the frames by websocket opcode: text frames are delivered as
+# bytes when the utf-8 validation is skipped, they are still text
+OPCODE_TYPES = {0x1: TEXT, 0x2: BINARY}
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def open_log(path, mode):
+    # Compressed if the name ends with .gz
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+# ####################################################################
+# RECORDER
+# ####################################################################
+
+class FrameRecorder(object):
+    """
+    Raw frames received, with their receive time, appended to a compact
+    binary log (gzip compressed if the path ends with .gz). May be shared
+    by several connections.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.__file = open_log(path, "wb")
+        self.__file.write(MAGIC)
+        self.__lock = threading.Lock()
+
+        self.frames = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def record(self, frame, timestamp: int = None, opcode: int = None):
+        """
+        :param frame: Raw frame (str or bytes), as received.
+        :param timestamp: Receive time (ns since epoch, default: now).
+        :param opcode: Websocket opcode of the frame (default: text if
+                       the frame is a str, binary otherwise).
+        """
+        timestamp = time.time_ns() if timestamp is None else timestamp
+        if isinstance(frame, str):
+            data, type_ = frame.encode(), TEXT
+        else:
+            data, type_ = bytes(frame), BINARY
+        if opcode is not None:
+            type_ = OPCODE_TYPES.get(opcode, BINARY)
+
+        with self.__lock:
+            if self.__file is None:
+                return
+            self.__file.write(RECORD.pack(timestamp, len(data), type_))
+            self.__file.write(data)
+            self.frames += 1
+            self.bytes += len(data)
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+        logger.info(f"{self.frames} frame(s) ({self.bytes} bytes) recorded to {self.path}.")
+
+
+def read_frames(path):
+    """
+    :param path: Frame log.
+    :return: Generator of (receive time in ns, frame): text frames as str,
+             binary frames as bytes (whatever the type they were delivered as).
+    """
+    with open_log(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a frame log: {path}")
+
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            timestamp, length, type_ = RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                logger.warning(f"Truncated frame at the end of {path}.")
+                return
+            yield timestamp, data.decode() if type_ == TEXT else data
+
+
+# ####################################################################
+# REPLAYER
+# ####################################################################
+
+class FrameReplayer(object):
+    """
+    Frames of a log fed to a message handler, without any socket, in
+    the order received: at their original pace (speed=1), N times
+    faster (speed=N) or as fast as possible (speed=None).
+
+    The target is either a callable (receiving each frame), or a client:
+    UnifiedClient (frames fed to _on_message, callbacks awaited) or a
+    subscription client (frames fed to on_message). The callbacks see
+    the messages of each channel in the same order at every replay;
+    across channels too if the client has a single dispatch worker.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        # Loaded once, so that reading the file is not replayed
+        start = time.thread_time()
+        self.frames = list(read_frames(path))
+        self.read_time = time.thread_time() - start
+
+    def __len__(self):
+        return len(self.frames)
+
+    def replay(self, target, speed: float = None):
+        """
+        :param target: Client or callable.
+        :param speed: Replay speed (1 for the original pace, None for maximum).
+        :return: Report (dict): frames, elapsed, rate (frames/s) and
+                 time per stage (seconds): read (CPU), handle (CPU of the
+                 thread reading the frames: parsing, routing), callbacks
+                 (time in the callbacks run by the dispatcher, if any),
+                 drain (wait for the callbacks after the last frame).
+        """
+        handler = self.__handler(target)
+        drain = getattr(target, "drain", None)
+        callbacks_before = self.__callbacks_time(target)
+
+        frames = self.frames
+        origin = frames[0][0] if frames else 0
+        handle = 0.0
+
+        start = time.perf_counter()
+        for timestamp, frame in frames:
+
+            # Original pace, scaled
+            if speed:
+                delay = start + (timestamp - origin) / 1e9 / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            cpu = time.thread_time()
+            handler(frame)
+            handle += time.thread_time() - cpu
+
+        # Callbacks still queued on the workers
+        drain_start = time.perf_counter()
+        if drain is not None:
+            drain()
+        end = time.perf_counter()
+
+        elapsed = end - start
+        callbacks_after = self.__callbacks_time(target)
+        return {"frames": len(frames),
+                "elapsed": elapsed,
+                "rate": len(frames) / elapsed if elapsed > 0 else None,
+                "stages": {"read": self.read_time,
+                           "handle": handle,
+                           "callbacks": (callbacks_after - callbacks_before
+                                         if callbacks_after is not None else None),
+                           "drain": end - drain_start}}
+
+    @staticmethod
+    def __handler(target):
+        if hasattr(target, "_on_message"):
+            return lambda frame: target._on_message(None, frame)
+        if hasattr(target, "on_message"):
+            return lambda frame: target.on_message(None, frame)
+        if callable(target):
+            return target
+        raise TypeError(f"Unable to replay frames into {target!r}.")
+
+    @staticmethod
+    def __callbacks_time(target):
+        metrics = getattr(target, "dispatch_metrics", None)
+        if metrics is None:
+            return None
+        return sum(c["total"] for c in metrics()["callbacks"].values())
@@ -1,21 +1,20 @@
-from deribit.unified.base import UnifiedClient
+from deribit.unified.base import UnifiedClient, MAX_IN_FLIGHT
 from deribit.messages import (mkt_data,
                                         session,
                                         account,
                                         trading)
 
 
-class RequestClient(UnifiedClient):
+# ####################################################################
+# REQUEST METHODS (SHARED BY THE BLOCKING AND ASYNCIO CLIENTS)
+# ####################################################################
 
-    def __init__(self, url, key, secret, name=None):
-        super().__init__(url=url,
-                         key=key,
-                         secret=secret,
-                         name=name,
-
-                         # Default callback is used
-                         # for subscriptions only
-                         callback=None)
+class RequestEndpoints(object):
+    """
+    Endpoint methods building messages and handing them over to
+    send_request/send_multiple_requests, which are provided by the
+    transport (blocking or asyncio) the class is mixed with.
+    """
 
     # ##################################################################
     # SESSION
@@ -394,3 +393,26 @@ class RequestClient(UnifiedClient):
     def order_status(self, order_id: str, callback=None):
         msg = trading.order_status(order_id=order_id)
         return self.send_request(msg, callback)
+
+
+# ####################################################################
+# CLIENT (FOR PUNCTUAL REQUESTS)
+# ####################################################################
+
+class RequestClient(RequestEndpoints, UnifiedClient):
+
+    def __init__(self, url, key, secret, name=None, max_in_flight=MAX_IN_FLIGHT, rate_limiter=None, dispatcher=None,
+                 token_store=None, latency=None):
+        super().__init__(url=url,
+                         key=key,
+                         secret=secret,
+                         name=name,
+
+                         # Default callback is used
+                         # for subscriptions only
+                         callback=None,
+                         max_in_flight=max_in_flight,
+                         rate_limiter=rate_limiter,
+                         dispatcher=dispatcher,
+                         token_store=token_store,
+                         latency=latency)
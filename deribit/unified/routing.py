@@ -0,0 +1,126 @@
+from utilities import json
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# The envelope of a notification comes before its payload, e.g.
+# {"jsonrpc":"2.0","method":"subscription","params":{"channel":"...","data":{...}}}
+# so it is looked for within the first bytes of the frame only
+HEAD_SIZE = 192
+
+# Markers, for raw frames received as bytes or as text
+MARKERS = {bytes: (b'"method":"subscription"', b'"channel":"', b'"', b'"data":', b"}}"),
+           str: ('"method":"subscription"', '"channel":"', '"', '"data":', "}}")}
+
+
+# ####################################################################
+# ENVELOPE (RAW FRAME, DECODED ON DEMAND)
+# ####################################################################
+
+class Envelope(object):
+    """
+    Subscription notification of which only the channel name has been
+    read: the payload is decoded the first time 'data' is accessed.
+    """
+
+    __slots__ = ("raw", "channel", "_data", "_message")
+
+    def __init__(self, raw, channel):
+        self.raw = raw
+        self.channel = channel
+        self._data = None
+        self._message = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.__decode_data()
+        return self._data
+
+    @property
+    def message(self):
+        if self._message is None:
+            self._message = json.decode(self.raw)
+        return self._message
+
+    def __decode_data(self):
+        raw = self.raw
+        _, _, _, data_key, closing = MARKERS[type(raw)]
+
+        # Decode the payload alone: it is the last value of 'params'
+        body = raw.rstrip()
+        start = body.find(data_key)
+        if start > 0 and body.endswith(closing):
+            try:
+                return json.decode(body[start + len(data_key):-len(closing)])
+            except ValueError:
+                pass
+
+        # Unusual layout: decode everything
+        return self.message["params"]["data"]
+
+
+def subscription_envelope(raw):
+    """
+    Read the channel of a subscription notification without decoding it.
+    :param raw: Frame as received (bytes or str).
+    :return: Envelope, or None if this is not a notification (or its channel could not be read).
+    """
+    markers = MARKERS.get(type(raw), None)
+    if not markers:
+        return None
+
+    subscription, channel_key, quote, _, _ = markers
+
+    if raw.find(subscription, 0, HEAD_SIZE) < 0:
+        return None
+
+    start = raw.find(channel_key, 0, HEAD_SIZE)
+    if start < 0:
+        return None
+
+    start += len(channel_key)
+    end = raw.find(quote, start)
+    if end < 0:
+        return None
+
+    channel = raw[start:end]
+    if not isinstance(channel, str):
+        channel = channel.decode()
+    return Envelope(raw, channel)
+
+
+# ####################################################################
+# ROUTER (HANDLERS BY CHANNEL PREFIX)
+# ####################################################################
+
+class ChannelRouter(object):
+    """
+    Handlers registered by channel prefix (e.g. 'book.' or
+    'quote.BTC-PERPETUAL'), the longest matching prefix wins.
+    The handler of each channel is resolved once, then cached.
+    """
+
+    def __init__(self):
+        self.__handlers = {}
+        self.__resolved = {}
+
+    def register(self, prefix, handler):
+        self.__handlers[prefix] = handler
+        self.__resolved = {}
+
+    def unregister(self, prefix):
+        self.__handlers.pop(prefix, None)
+        self.__resolved = {}
+
+    def handler(self, channel):
+        try:
+            return self.__resolved[channel]
+        except KeyError:
+            pass
+
+        matches = [p for p in self.__handlers if channel.startswith(p)]
+        handler = self.__handlers[max(matches, key=len)] if matches else None
+        self.__resolved[channel] = handler
+        return handler
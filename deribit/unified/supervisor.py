@@ -0,0 +1,170 @@
+# Core
+import time
+import random
+import logging
+import threading
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Back-off between reconnection attempts (seconds), with full jitter
+RECONNECT_BASE_DELAY = 0.25
+RECONNECT_MAX_DELAY = 10.0
+
+# Time given to a new connection to open and log in
+RECONNECT_LOGIN_TIMEOUT = 5.0
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ####################################################################
+# SUPERVISOR
+# ####################################################################
+
+class ReconnectSupervisor(object):
+    """
+    Restores a dropped connection from a background thread, so that the
+    websocket callbacks never sleep: reconnects with a jittered back-off
+    until the new connection is ready (logged in), then lets the client
+    restore its state (subscriptions, unanswered requests).
+    """
+
+    def __init__(self,
+                 reconnect,  # Callable opening a new connection
+                 restore,  # Callable restoring the state once ready
+                 ready: threading.Event,  # Set when the new connection can be used
+                 name: str = "RECONNECT",
+                 base_delay: float = RECONNECT_BASE_DELAY,
+                 max_delay: float = RECONNECT_MAX_DELAY,
+                 login_timeout: float = RECONNECT_LOGIN_TIMEOUT):
+
+        self.__reconnect = reconnect
+        self.__restore = restore
+        self.__ready = ready
+        self.__name = name
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__login_timeout = login_timeout
+
+        self.__dropped = threading.Event()
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__stopped = False
+
+        # State of the connection
+        self.__down = False
+        self.__disconnected_at = None
+        self.awaiting_data = False
+
+        # Metrics
+        self.disconnects = 0
+        self.reconnects = 0
+        self.attempts = 0
+        self.failed_attempts = 0
+        self.time_to_login = None
+        self.time_to_first_data = None
+
+    # ##################################################################
+    # EVENTS
+    # ##################################################################
+
+    def notify_disconnect(self, now=None):
+        """
+        :param now: Time of the disconnection (monotonic clock, default: now).
+        """
+        with self.__lock:
+            # Reported by a sender before the socket's close handler ran:
+            # the connection must not look ready until it is replaced
+            self.__ready.clear()
+
+            if not self.__down:
+                self.__down = True
+                self.__disconnected_at = now or time.monotonic()
+                self.awaiting_data = False
+                self.disconnects += 1
+
+            self.__dropped.set()
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name=f"{self.__name}-RECONNECT", daemon=True)
+                self.__thread.start()
+
+    def notify_data(self, now=None):
+        # First notification received since the connection was restored
+        if self.awaiting_data:
+            self.awaiting_data = False
+            self.time_to_first_data = (now or time.monotonic()) - self.__disconnected_at
+            logger.info(f"First data {self.time_to_first_data:.3f}s after the disconnection.")
+
+    def stop(self):
+        self.__stopped = True
+        self.__dropped.set()
+
+    # ##################################################################
+    # RECONNECTION
+    # ##################################################################
+
+    def __run(self):
+        while True:
+            self.__dropped.wait()
+            if self.__stopped:
+                return
+
+            attempt = 0
+            while not self.__stopped:
+
+                # Full jitter: connections dropped together do not
+                # come back all at once
+                time.sleep(random.uniform(0.0, min(self.__max_delay, self.__base_delay * 2 ** attempt)))
+                attempt += 1
+                self.attempts += 1
+
+                self.__dropped.clear()
+                try:
+                    self.__reconnect()
+                except Exception:
+                    logger.exception("Unable to open a new connection.")
+                    self.failed_attempts += 1
+                    continue
+
+                if self.__ready.wait(timeout=self.__login_timeout) and not self.__dropped.is_set():
+                    break
+                if self.__stopped:
+                    return
+
+                self.failed_attempts += 1
+                logger.warning(f"Reconnection attempt {attempt} failed, backing off.")
+
+            if self.__stopped:
+                return
+
+            self.time_to_login = time.monotonic() - self.__disconnected_at
+            self.reconnects += 1
+            logger.info(f"Connection restored after {self.time_to_login:.3f}s ({attempt} attempt(s)).")
+
+            with self.__lock:
+                self.__down = False
+
+            try:
+                self.awaiting_data = True
+                self.__restore()
+            except Exception:
+                logger.exception("Unable to restore the state of the connection.")
+
+    # ##################################################################
+    # METRICS
+    # ##################################################################
+
+    def metrics(self):
+        return {"disconnects": self.disconnects,
+                "reconnects": self.reconnects,
+                "attempts": self.attempts,
+                "failed_attempts": self.failed_attempts,
+                "time_to_login": self.time_to_login,
+                "time_to_first_data": self.time_to_first_data}
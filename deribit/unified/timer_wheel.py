@@ -0,0 +1,78 @@
+# Core
+import time
+import threading
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Resolution of the wheel (seconds) and number of slots: one
+# revolution covers TICK * SLOTS seconds, later deadlines wait
+# for the following revolutions in their slot
+TICK = 0.05
+SLOTS = 256
+
+
+# ####################################################################
+# HASHED TIMER WHEEL
+# ####################################################################
+
+class TimerWheel(object):
+    """
+    Deadlines hashed by tick into a fixed ring of slots: scheduling is
+    O(1), and advancing the wheel only visits the slots of the ticks
+    elapsed. Entries are never cancelled: the owner ignores the keys
+    it has completed in the meantime.
+    """
+
+    def __init__(self, tick: float = TICK, slots: int = SLOTS):
+        self.__tick = tick
+        self.__slots = [[] for _ in range(slots)]
+        self.__size = 0
+
+        # Next tick to be processed
+        self.__current = int(time.monotonic() / tick)
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return self.__size
+
+    def schedule(self, key, deadline: float):
+        """
+        :param key: Returned by advance once the deadline has passed.
+        :param deadline: time.monotonic() based.
+        """
+        with self.__lock:
+            # First tick starting after the deadline
+            tick = max(int(deadline / self.__tick) + 1, self.__current)
+            self.__slots[tick % len(self.__slots)].append((tick, key))
+            self.__size += 1
+
+    def advance(self, now: float = None):
+        """
+        :param now: time.monotonic() based (default: now).
+        :return: Keys of which the deadline has passed.
+        """
+        target = int((time.monotonic() if now is None else now) / self.__tick)
+        expired = []
+
+        with self.__lock:
+            slots = self.__slots
+
+            # Each slot is visited at most once, even after a long pause
+            last = min(target, self.__current + len(slots) - 1)
+            for tick in range(self.__current, last + 1):
+                index = tick % len(slots)
+                entries = slots[index]
+                if not entries:
+                    continue
+
+                kept = [e for e in entries if e[0] > target]
+                if len(kept) < len(entries):
+                    expired.extend(key for t, key in entries if t <= target)
+                    slots[index] = kept
+
+            self.__current = max(self.__current, target + 1)
+            self.__size -= len(expired)
+
+        return expired
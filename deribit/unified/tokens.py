@@ -0,0 +1,140 @@
+# Core
+import time
+import logging
+import threading
+
+# Local
+from deribit.support.settings import TOKEN_REFRESH_MARGIN, TOKEN_REFRESH_LEASE
+
+# ####################################################################
+# LOGGING
+# ####################################################################
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ####################################################################
+# TOKEN STORE (SHARED BY ALL CONNECTIONS OF ONE ACCOUNT)
+# ####################################################################
+
+class TokenStore(object):
+    """
+    Latest tokens received from the exchange: a (re)connecting client
+    authenticates with the refresh token instead of the credentials,
+    whichever connection obtained it.
+
+    Refresh tokens are single use: the connections sharing a store
+    refresh one after the other, each with the token left by the
+    previous one.
+    """
+
+    def __init__(self, access_token=None, refresh_token=None, expiry=None,
+                 refresh_margin: float = TOKEN_REFRESH_MARGIN,
+                 refresh_lease: float = TOKEN_REFRESH_LEASE):
+
+        self.__access_token = access_token
+        self.__refresh_token = refresh_token
+        self.__expiry = expiry  # POSIX timestamp (seconds)
+        self.__margin = refresh_margin
+        self.__lock = threading.Lock()
+
+        # Refresh in progress (start time, monotonic), if any
+        self.__lease = refresh_lease
+        self.__refreshing = None
+
+        # Metrics
+        self.credential_logins = 0
+        self.token_logins = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def access_token(self):
+        return self.__access_token
+
+    @property
+    def refresh_token(self):
+        return self.__refresh_token
+
+    @property
+    def expiry(self):
+        return self.__expiry
+
+    @property
+    def usable(self):
+        # A refresh token is held, and the session it belongs to is alive
+        with self.__lock:
+            if not self.__refresh_token:
+                return False
+            return self.__expiry is None or self.__expiry > time.time()
+
+    def refresh_delay(self):
+        """
+        :return: Seconds until the tokens should be refreshed (None if unknown).
+        """
+        if self.__expiry is None:
+            return None
+        return max(1.0, self.__expiry - self.__margin - time.time())
+
+    def update(self, result):
+        """
+        Store the tokens of an authentication reply.
+        :param result: 'result' of a public/auth reply.
+        """
+        access_token = result.get("access_token", None)
+        refresh_token = result.get("refresh_token", None)
+        expires_in = result.get("expires_in", None)
+
+        if not access_token or not refresh_token:
+            raise ValueError("Invalid login reply, unable to extract token information.")
+
+        with self.__lock:
+            expiry = time.time() + expires_in if expires_in else None
+
+            # Several connections refresh concurrently: keep the newest
+            if expiry and self.__expiry and expiry < self.__expiry:
+                return
+
+            self.__access_token = access_token
+            self.__refresh_token = refresh_token
+            self.__expiry = expiry
+
+    def begin_refresh(self):
+        """
+        :return: Ticket of the refresh (for end_refresh), None if another
+                 connection is refreshing already.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            if self.__refreshing is not None and now - self.__refreshing < self.__lease:
+                return None
+            self.__refreshing = now
+            return now
+
+    def end_refresh(self, ticket):
+        with self.__lock:
+            if self.__refreshing == ticket:
+                self.__refreshing = None
+
+    def invalidate(self, refresh_token=None):
+        """
+        :param refresh_token: Token rejected: the tokens are only dropped if still
+                              the same (not replaced by another connection meanwhile).
+        :return: True if dropped.
+        """
+        with self.__lock:
+            if refresh_token is not None and refresh_token != self.__refresh_token:
+                return False
+            self.__access_token = None
+            self.__refresh_token = None
+            self.__expiry = None
+        self.failures += 1
+        return True
+
+    def metrics(self):
+        return {"expiry": self.__expiry,
+                "credential_logins": self.credential_logins,
+                "token_logins": self.token_logins,
+                "refreshes": self.refreshes,
+                "failures": self.failures}
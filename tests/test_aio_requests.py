@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from deribit.messages import session, trading
+from deribit.mock.server import MockServer
+from deribit.support.networking import RESP_ERROR
+from deribit.unified.aio_requests import AsyncRequestClient
+
+
+# ####################################################################
+# FIXTURES
+# ####################################################################
+
+@pytest.fixture(scope="module")
+def server():
+    server = MockServer(port=0, latency=0.05, key="key", secret="secret", rate=50)
+    server.run_in_thread()
+    yield server
+    server.shutdown()
+
+
+# ####################################################################
+# REQUESTS
+# ####################################################################
+
+def test_concurrent_requests_share_one_connection(server):
+    async def main():
+        async with AsyncRequestClient(server.url, key=None, secret=None) as client:
+            replies = await asyncio.gather(*[client.server_time() for _ in range(50)])
+            return replies, server.connections
+
+    replies, connections = asyncio.run(main())
+    assert all(len(r) == 1 and RESP_ERROR not in r[0] for r in replies)
+    assert connections == 1
+
+
+def test_private_requests_after_login(server):
+    instrument = list(server.market.instruments)[0]
+
+    async def main():
+        async with AsyncRequestClient(server.url, key="key", secret="secret") as client:
+            return await client.send_request(trading.buy(instrument=instrument, amount=10, order_type="market"))
+
+    replies = asyncio.run(main())
+    assert len(replies) == 1 and RESP_ERROR not in replies[0]
+
+
+# ####################################################################
+# SUBSCRIPTIONS
+# ####################################################################
+
+def test_notifications_routed(server):
+    instrument = list(server.market.instruments)[0]
+
+    async def main():
+        received = asyncio.Queue()
+        async with AsyncRequestClient(server.url, key=None, secret=None) as client:
+            client.route("quote.", received.put_nowait)
+            await client.send_request(session.subscription_message([f"quote.{instrument}"]))
+            return await asyncio.wait_for(received.get(), timeout=2.0)
+
+    envelope = asyncio.run(main())
+    assert envelope.channel == f"quote.{instrument}"
+    assert envelope.data["instrument_name"] == instrument
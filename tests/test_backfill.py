@@ -0,0 +1,93 @@
+import os
+import asyncio
+
+import pytest
+
+from utilities import json
+from deribit.mock.market import TRADE_HISTORY
+from deribit.mock.server import MockServer
+from deribit.unified import backfill
+from deribit.unified.backfill import TradeBackfill, read_trades, TRADES_SUFFIX
+from deribit.unified.aio_requests import AsyncRequestClient
+
+
+# ####################################################################
+# FIXTURES
+# ####################################################################
+
+INSTRUMENTS = ["BTC-PERPETUAL", "ETH-PERPETUAL"]
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = MockServer(port=0, latency=0, seed=1)
+    server.run_in_thread()
+    yield server
+    server.shutdown()
+
+
+def run(server, directory, instruments=INSTRUMENTS):
+    async def main():
+        async with AsyncRequestClient(server.url, key=None, secret=None) as client:
+            return await TradeBackfill(client, directory, concurrency=4, window=8, page_size=1000).run(instruments)
+
+    return asyncio.run(main())
+
+
+def trades_file(directory, instrument):
+    return os.path.join(directory, instrument + TRADES_SUFFIX)
+
+
+# ####################################################################
+# BACKFILL
+# ####################################################################
+
+def test_every_trade_written_in_order(server, tmp_path):
+    metrics = run(server, str(tmp_path))
+
+    assert metrics["done"] == 2 and not metrics["failed"]
+    assert metrics["rows"] == 2 * TRADE_HISTORY
+    for instrument in INSTRUMENTS:
+        trades = list(read_trades(trades_file(str(tmp_path), instrument)))
+        assert [t["trade_seq"] for t in trades] == list(range(1, TRADE_HISTORY + 1))
+        assert {t["instrument_name"] for t in trades} == {instrument}
+
+
+def test_resume_from_a_checkpoint(server, tmp_path):
+    directory = str(tmp_path)
+    run(server, directory, INSTRUMENTS[:1])
+
+    path = trades_file(directory, INSTRUMENTS[0])
+    with open(path, "rb") as f:
+        expected = f.read()
+
+    # Stopped halfway, with a page written after the last checkpoint
+    lines = expected.splitlines(keepends=True)
+    seq, offset = TRADE_HISTORY // 2, sum(len(line) for line in lines[:TRADE_HISTORY // 2])
+    with open(path, "r+b") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(b"".join(lines[seq:seq + 1000]))
+
+    state = TradeBackfill(None, directory)
+    checkpoints = state.checkpoints()
+    checkpoints[INSTRUMENTS[0]] = {"seq": seq, "offset": offset, "end_seq": TRADE_HISTORY}
+    with open(os.path.join(directory, backfill.CHECKPOINT_FILE), "wb") as f:
+        f.write(json.encode(checkpoints))
+
+    metrics = run(server, directory, INSTRUMENTS[:1])
+
+    assert metrics["rows"] == TRADE_HISTORY - seq
+    with open(path, "rb") as f:
+        assert f.read() == expected
+    assert TradeBackfill(None, directory).checkpoints()[INSTRUMENTS[0]]["offset"] == len(expected)
+
+
+def test_unknown_instrument_reported_failed(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill, "RETRY_DELAY", 0.0)
+
+    metrics = run(server, str(tmp_path), ["BTC-PERPETUAL", "XRP-PERPETUAL"])
+
+    assert metrics["failed"] == ["XRP-PERPETUAL"]
+    assert metrics["done"] == 1
+    assert metrics["retries"] == backfill.PAGE_ATTEMPTS - 1
@@ -0,0 +1,47 @@
+import threading
+
+import numpy as np
+
+from containers.board import QuoteBoard
+
+
+def quote(instrument, price, timestamp=1):
+    return {"instrument_name": instrument, "timestamp": timestamp,
+            "best_bid_price": price, "best_bid_amount": 1.0,
+            "best_ask_price": price + 1.0, "best_ask_amount": 1.0}
+
+
+def test_updates_not_lost_while_growing():
+    board = QuoteBoard(["A", "B"], capacity=2)
+    stop = threading.Event()
+
+    def grow():
+        for i in range(20000):
+            board.row(f"X{i}")
+        stop.set()
+
+    thread = threading.Thread(target=grow)
+    thread.start()
+
+    price = 0.0
+    while not stop.is_set():
+        price += 1.0
+        board.update(quote("A", price))
+        assert board.quote("A")["best_bid_price"] == price
+    thread.join()
+
+    assert board.quote("A")["best_bid_price"] == price
+    assert board.quote("B") is None
+
+
+def test_reads_do_not_allocate():
+    board = QuoteBoard(["A"])
+    board.update(quote("A", 10.0))
+
+    columns = board.snapshot(["A", "UNKNOWN"])
+    assert "UNKNOWN" not in board
+    assert len(board) == 1
+    assert columns["instrument_name"] == ["A", "UNKNOWN"]
+    assert columns["best_bid_price"][0] == 10.0
+    assert np.isnan(columns["best_bid_price"][1])
+    assert list(board.rows(["UNKNOWN"])) == [-1]
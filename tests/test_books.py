@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from utilities import json
+
+from deribit.mock.server import MockServer
+from deribit.subscriptions.books import BookSync
+from deribit.unified.requests import RequestClient
+
+
+# ####################################################################
+# FIXTURES
+# ####################################################################
+
+@pytest.fixture(scope="module")
+def server():
+    server = MockServer(port=0, latency=0, rate=50)
+    server.run_in_thread()
+    yield server
+    server.shutdown()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+# ####################################################################
+# RESYNCHRONIZATION
+# ####################################################################
+
+def test_gap_resynchronized_from_a_snapshot(server):
+    instrument = list(server.market.instruments)[0]
+
+    with RequestClient(url=server.url, key=None, secret=None) as client:
+        books = BookSync(client)
+        books.subscribe([instrument])
+        assert wait_for(lambda: books.is_valid(instrument))
+
+        # A change that does not follow the last one
+        change = {"instrument_name": instrument, "type": "change", "prev_change_id": -1, "change_id": 0,
+                  "bids": [], "asks": []}
+        client._on_message(None, json.encode({"jsonrpc": "2.0", "method": "subscription",
+                                              "params": {"channel": f"book.{instrument}.raw", "data": change}}))
+
+        assert wait_for(lambda: books.metrics()["resyncs"] == 1)
+        assert books.metrics()["gaps"] == 1
+        assert wait_for(lambda: books.is_valid(instrument))
+        assert books.book(instrument).best_bid is not None
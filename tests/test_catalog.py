@@ -0,0 +1,16 @@
+from containers.catalog import InstrumentCatalog
+from deribit.mock.market import mock_instruments
+
+
+def test_partial_refresh_stays_due(tmp_path):
+    catalog = InstrumentCatalog(path=str(tmp_path / "catalog.json"))
+    instruments = mock_instruments()
+
+    # BTC options only: the other groups did not answer
+    catalog.update([i for i in instruments if i["base_currency"] == "BTC" and i["kind"] == "option"])
+    assert catalog.needs_refresh()
+    assert InstrumentCatalog(path=str(tmp_path / "catalog.json")).needs_refresh()
+
+    catalog.update(instruments)
+    assert not catalog.needs_refresh()
+    assert len(catalog) == len(instruments)
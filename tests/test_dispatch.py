@@ -0,0 +1,83 @@
+import time
+import threading
+
+from deribit.unified.dispatch import OrderedDispatcher
+
+
+# ####################################################################
+# ORDERING
+# ####################################################################
+
+def test_messages_of_a_key_run_in_order():
+    dispatcher = OrderedDispatcher(workers=4)
+    received = {}
+
+    def on_message(message):
+        key, seq = message
+        received.setdefault(key, []).append(seq)
+
+    try:
+        for seq in range(200):
+            for key in ("book.A", "book.B", "book.C"):
+                dispatcher.submit(key, on_message, (key, seq))
+
+        assert dispatcher.drain(timeout=5.0)
+        assert received == {key: list(range(200)) for key in ("book.A", "book.B", "book.C")}
+    finally:
+        dispatcher.stop()
+
+
+def test_drain_times_out_on_a_busy_worker():
+    dispatcher = OrderedDispatcher(workers=1)
+    release = threading.Event()
+
+    try:
+        dispatcher.submit("k", lambda _: release.wait(), None)
+        assert not dispatcher.drain(timeout=0.1)
+
+        release.set()
+        assert dispatcher.drain(timeout=5.0)
+    finally:
+        dispatcher.stop()
+
+
+# ####################################################################
+# METRICS
+# ####################################################################
+
+def test_metrics_count_callbacks_and_errors():
+    dispatcher = OrderedDispatcher(workers=2)
+
+    def fail(_):
+        raise ValueError("expected")
+
+    try:
+        for i in range(10):
+            dispatcher.submit(i, lambda _: None, i, label="noop")
+        dispatcher.submit(0, fail, None)
+        assert dispatcher.drain(timeout=5.0)
+
+        metrics = dispatcher.metrics()
+        assert metrics["errors"] == 1
+        assert metrics["queue_depths"] == [0, 0]
+        assert metrics["callbacks"]["noop"]["count"] == 10
+        assert metrics["callbacks"]["noop"]["mean"] <= metrics["callbacks"]["noop"]["max"]
+    finally:
+        dispatcher.stop()
+
+
+# ####################################################################
+# TEARDOWN
+# ####################################################################
+
+def test_stop_ends_the_workers():
+    dispatcher = OrderedDispatcher(workers=3, name="STOPPED")
+    dispatcher.stop()
+
+    deadline = time.monotonic() + 5.0
+    while time.monotonic() < deadline:
+        if not [th for th in threading.enumerate() if th.name.startswith("STOPPED-")]:
+            break
+        time.sleep(0.01)
+
+    assert not [th for th in threading.enumerate() if th.name.startswith("STOPPED-")]
@@ -0,0 +1,67 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from deribit.parsers.instruments import (parse_instrument, parse_instruments, expiry_timestamp,
+                                         INSTRUMENT_DTYPE, CALL, PUT)
+
+
+def reference_expiry(code):
+    # Slow path: datetime parsing, at 08:00 UTC
+    date = dt.datetime.strptime(code.title(), "%d%b%y")
+    return date.replace(hour=8, tzinfo=dt.timezone.utc).timestamp()
+
+
+# ####################################################################
+# EXPIRY CODES
+# ####################################################################
+
+@pytest.mark.parametrize("code", ["27DEC24", "1JAN25", "29FEB28", "9MAY25", "31OCT30", "28mar25"])
+def test_expiry_matches_strptime(code):
+    assert expiry_timestamp(code) == reference_expiry(code)
+
+
+@pytest.mark.parametrize("code", ["27XYZ24", "DEC24", "", "27DEC2A"])
+def test_invalid_expiry_code(code):
+    with pytest.raises(ValueError):
+        expiry_timestamp(code)
+
+
+# ####################################################################
+# INSTRUMENT NAMES
+# ####################################################################
+
+def test_option():
+    assert parse_instrument("BTC-27DEC24-50000-C") == ("BTC", reference_expiry("27DEC24"), 50000.0, CALL)
+    assert parse_instrument("ETH-27DEC24-3000-P")[3] == PUT
+
+
+def test_decimal_strike():
+    underlying, expiry, strike, option_type = parse_instrument("XRP_USDC-30MAY25-0d625-C")
+
+    assert underlying == "XRP_USDC"
+    assert expiry == reference_expiry("30MAY25")
+    assert strike == 0.625 and option_type == CALL
+
+
+def test_future_and_perpetual():
+    underlying, expiry, strike, option_type = parse_instrument("BTC-27DEC24")
+    assert (underlying, expiry, option_type) == ("BTC", reference_expiry("27DEC24"), 0)
+    assert np.isnan(strike)
+
+    underlying, expiry, strike, option_type = parse_instrument("BTC-PERPETUAL")
+    assert underlying == "BTC" and option_type == 0
+    assert np.isnan(expiry) and np.isnan(strike)
+
+
+def test_chain_parsed_in_order():
+    names = ["BTC-PERPETUAL", "BTC-27DEC24", "BTC-27DEC24-50000-C", "ETH-28MAR25-0d5-P"]
+    parsed = parse_instruments(names)
+
+    assert parsed.dtype == INSTRUMENT_DTYPE
+    assert parsed["underlying"].tolist() == ["BTC", "BTC", "BTC", "ETH"]
+    assert parsed["option_type"].tolist() == [0, 0, CALL, PUT]
+    assert parsed["strike"][2:].tolist() == [50000.0, 0.5]
+    assert parsed["expiry"][3] == reference_expiry("28MAR25")
+    assert len(parse_instruments([])) == 0
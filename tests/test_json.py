@@ -0,0 +1,60 @@
+import pytest
+
+from utilities import json
+
+
+# ####################################################################
+# FIXTURES
+# ####################################################################
+
+@pytest.fixture(params=sorted(json.CODECS))
+def codec(request):
+    # Codec selected for the test, the previous one restored after
+    previous = json.codec
+    json.use(request.param)
+    yield request.param
+    json.use(previous)
+
+
+# ####################################################################
+# FAST PATH
+# ####################################################################
+
+def test_codecs_agree(codec):
+    expected = json.CODECS["json"][0](json.SAMPLE_FRAME)
+
+    assert json.decode(json.SAMPLE_FRAME) == expected
+    assert json.decode(json.SAMPLE_FRAME.decode()) == expected
+    assert json.decode(json.encode(expected)) == expected
+
+
+def test_encoded_frames_are_compact(codec):
+    # The subscription envelope is located on its compact layout
+    message = {"jsonrpc": "2.0", "method": "subscription", "params": {"channel": "ticker.BTC-PERPETUAL.raw"}}
+
+    encoded = json.encode(message)
+    assert isinstance(encoded, bytes)
+    assert b'"method":"subscription"' in encoded
+    assert json.encode_str(message) == encoded.decode()
+
+
+def test_fastest_codec_selected():
+    previous = json.codec
+    try:
+        assert json.select_fastest(number=10) in json.CODECS
+        assert set(json.benchmark(number=10)) == set(json.CODECS)
+    finally:
+        json.use(previous)
+
+
+# ####################################################################
+# TOLERANT PATH
+# ####################################################################
+
+def test_tolerant_path_passes_through(codec):
+    assert json.loads('{"a":1}') == {"a": 1}
+    assert json.loads({"a": 1}) == {"a": 1}
+    assert json.loads("not json") == "not json"
+
+    assert json.dumps({"a": 1}) == '{"a":1}'
+    assert json.dumps(b'{"a":1}') == b'{"a":1}'
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from utilities.histogram import Histogram
+from deribit.unified.pending import PendingRequest
+from deribit.unified.latency import LatencyRecorder, LOCAL, WIRE_OUT, EXCHANGE, WIRE_BACK, ROUND_TRIP
+
+
+# ####################################################################
+# HISTOGRAM
+# ####################################################################
+
+def test_small_values_are_exact():
+    histogram = Histogram()
+    for v in range(1, 101):
+        histogram.record(v)
+
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.summary()["p50"] == 50
+    assert (histogram.min, histogram.max, histogram.mean) == (1, 100, 50.5)
+
+
+def test_large_values_within_precision():
+    histogram = Histogram()
+    for v in range(1000, 1000001, 1000):
+        histogram.record(v)
+
+    for p, expected in ((50, 500000), (90, 900000), (99.9, 999000)):
+        assert histogram.percentile(p) == pytest.approx(expected, rel=0.016)
+
+
+def test_merge_adds_the_counts():
+    first, second = Histogram(), Histogram()
+    first.record(10, count=3)
+    second.record(1000000)
+
+    first.merge(second)
+    assert (first.count, first.min, first.max) == (4, 10, 1000000)
+
+    with pytest.raises(ValueError):
+        first.merge(Histogram(sub_bucket_bits=5))
+
+
+# ####################################################################
+# LATENCY COMPONENTS
+# ####################################################################
+
+def pending_request(queued, in_flight, method="private/buy"):
+    # Request queued then in flight for the given durations (seconds)
+    now = time.monotonic()
+    pending = PendingRequest({"jsonrpc": "2.0", "id": 1, "method": method})
+    pending.created_at = now - queued - in_flight
+    pending.sent_at = now - in_flight
+    pending.written = True
+    return pending
+
+
+def test_reply_split_into_components():
+    recorder = LatencyRecorder()
+
+    # 10ms locally, 40ms in flight: 15ms out, 5ms in the engine, 20ms back
+    sent_us = (time.time() - 0.040) * 1e6
+    reply = {"id": 1, "result": {}, "usIn": int(sent_us + 15000), "usOut": int(sent_us + 20000)}
+    recorder.record(pending_request(0.010, 0.040), reply)
+
+    summary = recorder.summary("private/buy")
+    assert summary[LOCAL]["mean"] == pytest.approx(10000, abs=1000)
+    assert summary[ROUND_TRIP]["mean"] == pytest.approx(40000, abs=2000)
+    assert summary[EXCHANGE]["mean"] == pytest.approx(5000, abs=100)
+    assert summary[WIRE_OUT]["mean"] == pytest.approx(15000, abs=2000)
+    assert summary[WIRE_BACK]["mean"] == pytest.approx(20000, abs=2000)
+    assert recorder.methods == ["private/buy"]
+
+
+def test_unstamped_replies_give_the_round_trip_only():
+    recorder = LatencyRecorder()
+    recorder.record(pending_request(0.0, 0.010, "public/get_time"), {"id": 1, "result": 0})
+
+    assert recorder.unstamped == 1
+    assert recorder.histogram("public/get_time", ROUND_TRIP).count == 1
+    assert recorder.histogram("public/get_time", EXCHANGE).count == 0
+
+
+def test_requests_never_written_are_ignored():
+    recorder = LatencyRecorder()
+    pending = pending_request(0.0, 0.010)
+    pending.written = False
+
+    recorder.record(pending, {"id": 1, "result": {}, "usIn": 1, "usOut": 2})
+    assert recorder.histogram("private/buy") is None
+
+    recorder.record(pending_request(0.0, 0.010), {"id": 1, "result": {}})
+    recorder.reset()
+    assert recorder.summary() == {} and recorder.unstamped == 0
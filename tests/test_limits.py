@@ -0,0 +1,48 @@
+import pytest
+
+from deribit.support.endpoints import SESSION_GET_TIME, TRADING_BUY, TRADING_CANCEL_ALL
+from deribit.support.limits import CreditBucket, RateLimiter
+
+
+# ####################################################################
+# BUCKETS
+# ####################################################################
+
+def test_bucket_waits_once_empty():
+    bucket = CreditBucket(max_credits=1000, refill_rate=1000, cost=500)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+
+    # Charged at once, then waits for the balance to come back to zero
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+    assert bucket.metrics()["waits"] == 1
+
+
+def test_bucket_drained_when_throttled():
+    bucket = CreditBucket(max_credits=1000, refill_rate=1000, cost=500)
+    bucket.drain()
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+    assert bucket.metrics()["throttled"] == 1
+
+
+# ####################################################################
+# RATE LIMITER
+# ####################################################################
+
+def test_engines_charged_their_own_costs():
+    limiter = RateLimiter(non_matching_max_credits=50000, non_matching_refill_rate=0.001,
+                          matching_max_credits=20, matching_refill_rate=0.001)
+
+    # Matching engine: counted in requests
+    for _ in range(20):
+        assert limiter.reserve(TRADING_BUY) == 0.0
+    assert limiter.reserve(TRADING_CANCEL_ALL) > 0.0
+
+    # Every other request: 500 credits, on its own bucket
+    for _ in range(100):
+        assert limiter.reserve(SESSION_GET_TIME) == 0.0
+    assert limiter.reserve(SESSION_GET_TIME) > 0.0
+
+    metrics = limiter.metrics()
+    assert metrics["matching"]["cost"] == 1
+    assert metrics["non_matching"]["cost"] == 500
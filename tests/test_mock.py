@@ -0,0 +1,157 @@
+import asyncio
+import datetime as dt
+
+import aiohttp
+
+from utilities import json
+from deribit.messages import session, mkt_data, trading
+from deribit.mock.market import SyntheticBook, mock_instruments, listed_expiries, EXPIRY_HOUR
+from deribit.mock.server import MockServer, ERR_UNAUTHORIZED, ERR_INVALID_CREDENTIALS, ERR_METHOD_NOT_FOUND
+from deribit.support.networking import RESP_CONTENT, RESP_ERROR, RESP_ERR_CODE, RESP_TS_IN, RESP_TS_OUT
+
+
+# ####################################################################
+# HELPERS
+# ####################################################################
+
+def run(scenario, **kwargs):
+    """
+    Run a scenario (coroutine function taking the server and a websocket) against a mock server.
+    """
+    async def main():
+        async with MockServer(port=0, **kwargs) as server:
+            async with aiohttp.ClientSession() as http:
+                async with http.ws_connect(server.url) as ws:
+                    return await scenario(server, ws)
+
+    return asyncio.run(main())
+
+
+async def request(ws, message):
+    await ws.send_str(json.encode_str(message))
+    while True:
+        reply = json.decode((await ws.receive(timeout=5.0)).data)
+        if reply.get("id", None) == message["id"]:
+            return reply
+
+
+async def notifications(ws, count):
+    received = []
+    while len(received) < count:
+        message = json.decode((await ws.receive(timeout=5.0)).data)
+        if message.get("method", None) == "subscription":
+            received.append(message["params"])
+    return received
+
+
+# ####################################################################
+# INSTRUMENTS
+# ####################################################################
+
+def test_instruments_expire_on_fridays_at_eight():
+    today = dt.date(2026, 10, 17)
+    instruments = mock_instruments(today=today)
+
+    assert {i["base_currency"] for i in instruments} == {"BTC", "ETH"}
+    assert all(e.weekday() == 4 and e > today for e in listed_expiries(today))
+
+    for i in instruments:
+        if i["settlement_period"] != "perpetual":
+            expiry = dt.datetime.fromtimestamp(i["expiration_timestamp"] / 1000, tz=dt.timezone.utc)
+            assert expiry.weekday() == 4 and expiry.hour == EXPIRY_HOUR
+
+
+def test_instruments_by_currency_and_kind():
+    async def scenario(server, ws):
+        messages = mkt_data.request_instruments(currency="eth", kind="option", expired=False)
+        return await request(ws, messages[0])
+
+    reply = run(scenario)
+    assert reply[RESP_CONTENT]
+    assert all(i["base_currency"] == "ETH" and i["kind"] == "option" for i in reply[RESP_CONTENT])
+
+
+# ####################################################################
+# REQUESTS
+# ####################################################################
+
+def test_replies_are_stamped():
+    async def scenario(server, ws):
+        return await request(ws, session.get_time())
+
+    reply = run(scenario)
+    assert RESP_ERROR not in reply
+    assert reply[RESP_TS_IN] <= reply[RESP_TS_OUT]
+
+
+def test_unknown_method_refused():
+    async def scenario(server, ws):
+        return await request(ws, {"jsonrpc": "2.0", "id": 1, "method": "public/unknown", "params": {}})
+
+    assert run(scenario)[RESP_ERROR][RESP_ERR_CODE] == ERR_METHOD_NOT_FOUND
+
+
+def test_private_requests_need_valid_credentials():
+    async def scenario(server, ws):
+        order = trading.buy("BTC-PERPETUAL", 10, order_type="market")
+        before = await request(ws, order)
+        rejected = await request(ws, session.login_message("key", "wrong"))
+        accepted = await request(ws, session.login_message("key", "secret"))
+        after = await request(ws, trading.buy("BTC-PERPETUAL", 10, order_type="market"))
+        return before, rejected, accepted, after
+
+    before, rejected, accepted, after = run(scenario, key="key", secret="secret")
+    assert before[RESP_ERROR][RESP_ERR_CODE] == ERR_UNAUTHORIZED
+    assert rejected[RESP_ERROR][RESP_ERR_CODE] == ERR_INVALID_CREDENTIALS
+    assert accepted[RESP_CONTENT]["access_token"]
+    assert after[RESP_CONTENT]["order"]["order_state"] == "filled"
+
+
+# ####################################################################
+# STREAMS
+# ####################################################################
+
+def test_book_stream_starts_with_a_snapshot():
+    async def scenario(server, ws):
+        await request(ws, session.subscription_message(["book.BTC-PERPETUAL.raw"]))
+        return await notifications(ws, 5)
+
+    received = run(scenario, rate=100)
+    data = [n["data"] for n in received]
+
+    assert {n["channel"] for n in received} == {"book.BTC-PERPETUAL.raw"}
+    assert data[0]["type"] == "snapshot"
+    assert all(d["type"] == "change" for d in data[1:])
+    assert all(d["prev_change_id"] == p["change_id"] for p, d in zip(data, data[1:]))
+
+
+def test_trades_stream_by_kind_and_currency():
+    async def scenario(server, ws):
+        await request(ws, session.subscription_message(["trades.future.BTC.raw"]))
+        return await notifications(ws, 3)
+
+    received = run(scenario, rate=100)
+    assert all(t["instrument_name"].startswith("BTC-") for n in received for t in n["data"])
+
+
+def test_drop_connections():
+    async def scenario(server, ws):
+        assert server.connections == 1
+        await server.drop_connections()
+        message = await ws.receive(timeout=5.0)
+        return message.type
+
+    assert run(scenario) in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING)
+
+
+# ####################################################################
+# SYNTHETIC BOOK
+# ####################################################################
+
+def test_history_is_the_same_whatever_the_range():
+    book = SyntheticBook("BTC-PERPETUAL", 50000.0, 5.0, seed=1, history=100)
+
+    assert book.history(41, 60)[5:10] == book.history(46, 50)
+    assert [t["trade_seq"] for t in book.last_trades(count=5)["trades"]] == [100, 99, 98, 97, 96]
+    assert [t["trade_seq"] for t in book.last_trades(start_seq=1, end_seq=10, sorting="asc", count=3)["trades"]] \
+        == [1, 2, 3]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from deribit.subscriptions import monitor
+from deribit.subscriptions.monitor import ArrivalRing, WebsocketMonitor, NO_CHANNEL
+
+
+# ####################################################################
+# RING BUFFER
+# ####################################################################
+
+def test_ring_keeps_the_most_recent_times():
+    ring = ArrivalRing(capacity=8)
+    for t in range(20):
+        ring.record(t)
+
+    # The oldest slot is the next one written: left out of the snapshots
+    assert ring.count == 20
+    assert ring.snapshot().tolist() == list(range(13, 20))
+
+
+def test_ring_partially_filled():
+    ring = ArrivalRing(capacity=8)
+    assert len(ring.snapshot()) == 0
+
+    for t in range(3):
+        ring.record(t)
+    assert ring.snapshot().tolist() == [0, 1, 2]
+
+
+# ####################################################################
+# STATISTICS
+# ####################################################################
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Arrival times set by the test (ns)
+    times = []
+    monkeypatch.setattr(monitor.time, "monotonic_ns", lambda: times.pop(0) if times else 10 ** 12)
+    return times
+
+
+def notification(channel):
+    return {"jsonrpc": "2.0", "method": "subscription", "params": {"channel": channel, "data": {}}}
+
+
+def test_stats_by_channel(clock):
+    ws_monitor = WebsocketMonitor(capacity=64)
+
+    # One message every 10ms, then a burst of 12 messages 100us apart
+    clock.extend([i * 10_000_000 for i in range(10)])
+    clock.extend([100_000_000 + i * 100_000 for i in range(12)])
+    for _ in range(22):
+        ws_monitor.received(notification("quote.BTC-PERPETUAL"))
+
+    clock.append(5)
+    ws_monitor.received({"id": 1, "result": {}})
+
+    assert sorted(ws_monitor.channels) == sorted(["quote.BTC-PERPETUAL", NO_CHANNEL])
+
+    stats = ws_monitor.stats("quote.BTC-PERPETUAL")
+    assert stats["received"] == stats["window"] == 22
+    assert stats["gap_max"] == pytest.approx(10_000)
+    assert stats["gap_p50"] == pytest.approx(100)
+    assert stats["rate"] == pytest.approx(21 * 1e9 / 101_100_000)
+    assert stats["bursts"] == 1
+    assert stats["largest_burst"] == 12
+
+    assert ws_monitor.stats()[NO_CHANNEL]["rate"] is None
+
+
+def test_stats_over_the_window_only(clock):
+    ws_monitor = WebsocketMonitor(capacity=5)
+
+    clock.extend([i * 1_000_000 for i in range(10)])
+    for _ in range(10):
+        ws_monitor.received(notification("trades.BTC-PERPETUAL.raw"))
+
+    stats = ws_monitor.stats("trades.BTC-PERPETUAL.raw")
+    assert stats["received"] == 10
+    assert stats["window"] == 4
+    assert ws_monitor.snapshot("trades.BTC-PERPETUAL.raw").tolist() == [6_000_000, 7_000_000, 8_000_000, 9_000_000]
+
+
+def test_unknown_channel_and_failures():
+    ws_monitor = WebsocketMonitor()
+    ws_monitor.failed(Exception("dropped"))
+
+    assert ws_monitor.failures == 1
+    assert ws_monitor.stats("book.X.raw")["received"] == 0
+    assert isinstance(ws_monitor.snapshot("book.X.raw"), np.ndarray)
@@ -0,0 +1,25 @@
+from containers.orderbook import OrderBook
+
+
+def test_changes_on_a_snapshot():
+    book = OrderBook("BTC-PERPETUAL")
+    book.apply({"type": "snapshot", "change_id": 1,
+                "bids": [["new", 1.0, 2.0], ["new", 0.5, 1.0]],
+                "asks": [["new", 2.0, 1.0]]})
+    book.apply({"type": "change", "change_id": 2, "prev_change_id": 1,
+                "bids": [["delete", 1.0, 0.0]],
+                "asks": [["change", 2.0, 3.0]]})
+
+    assert book.best_bid == 0.5
+    assert book.best_ask == 2.0
+    assert book.change_id == 2
+
+
+def test_grouped_book_replaced_even_if_empty():
+    book = OrderBook("BTC-PERPETUAL")
+    book.apply({"change_id": 1, "bids": [[1.0, 2.0]], "asks": [[2.0, 1.0]]})
+    assert book.best_bid == 1.0
+
+    book.apply({"change_id": 2, "bids": [], "asks": []})
+    assert book.best_bid is None
+    assert book.best_ask is None
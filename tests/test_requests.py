@@ -0,0 +1,265 @@
+import time
+import threading
+
+import pytest
+
+from deribit.messages import session, trading
+from deribit.mock.server import MockServer
+from deribit.support.networking import RESP_ERROR
+from deribit.support.limits import RateLimiter
+from deribit.unified.pending import PendingTable
+from deribit.unified.base import REQUEST_TIMEOUT
+from deribit.unified.requests import RequestClient
+from deribit.subscriptions.new_facade import DeltaApiClient
+
+
+# ####################################################################
+# FIXTURES
+# ####################################################################
+
+@pytest.fixture(scope="module")
+def server():
+    server = MockServer(port=0, latency=0)
+    server.run_in_thread()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def client(server):
+    # No throttling on the client side
+    limiter = RateLimiter(non_matching_max_credits=10 ** 9, non_matching_refill_rate=10 ** 9)
+    with RequestClient(url=server.url, key=None, secret=None, rate_limiter=limiter) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def slow_server():
+    # Replies sent 200ms after the requests
+    server = MockServer(port=0, latency=0.2)
+    server.run_in_thread()
+    yield server
+    server.shutdown()
+
+
+# ####################################################################
+# BLOCKING REQUESTS
+# ####################################################################
+
+def test_blocking_request_wakes_on_reply(slow_server):
+    with RequestClient(url=slow_server.url, key=None, secret=None) as client:
+        assert client.server_time()
+
+        start = time.monotonic()
+        replies = client.server_time()
+        elapsed = time.monotonic() - start
+
+    assert len(replies) == 1 and RESP_ERROR not in replies[0]
+    assert 0.2 <= elapsed < 0.3
+
+
+def test_late_reply_dropped():
+    slow = MockServer(port=0, latency=REQUEST_TIMEOUT + 0.5)
+    slow.run_in_thread()
+    try:
+        with RequestClient(url=slow.url, key=None, secret=None) as client:
+            assert client.server_time() == []
+
+            # Nobody waits for it anymore
+            time.sleep(1.0)
+            assert client.pending_metrics()["pending"] == 0
+            assert client.pending_metrics()["late_replies"] == 1
+    finally:
+        slow.shutdown()
+
+
+def test_batch_returns_every_reply(server, client):
+    # Replies arriving before the wait starts must not be dropped
+    instruments = list(server.market.instruments)[:30]
+    for _ in range(30):
+        replies = client.orderbooks(instruments, depth=1)
+        assert sorted(r["result"]["instrument_name"] for r in replies) == sorted(instruments)
+
+
+# ####################################################################
+# IN-FLIGHT WINDOW
+# ####################################################################
+
+def test_window_bounds_the_requests_in_flight(slow_server):
+    with RequestClient(url=slow_server.url, key=None, secret=None, max_in_flight=2) as client:
+        assert client.server_time()
+
+        # Six requests, two at a time: three round trips
+        start = time.monotonic()
+        replies = client.send_multiple_requests([(session.get_time(), None) for _ in range(6)])
+        elapsed = time.monotonic() - start
+
+        assert len(replies) == 6
+        assert 0.6 <= elapsed < 0.9
+        assert client.in_flight == 0
+
+
+# ####################################################################
+# POOLED CONNECTIONS
+# ####################################################################
+
+def test_pooled_client_keeps_the_request_client_members(server):
+    api = DeltaApiClient(url=server.url, key=None, secret=None)
+    try:
+        replies = api.request.send_request(session.get_time())
+        assert len(replies) == 1 and RESP_ERROR not in replies[0]
+
+        replies = api.request.send_multiple_requests([(session.get_time(), None), (session.get_time(), None)])
+        assert len(replies) == 2
+        assert api.request.pending_metrics()["pending"] == 0
+        assert api.request.drain(timeout=1.0)
+
+        with pytest.raises(AttributeError):
+            api.request.no_such_member
+    finally:
+        api.stop()
+
+
+# ####################################################################
+# TIMEOUTS
+# ####################################################################
+
+def test_timeout_starts_once_written():
+    # Two orders, one slot, replies after 2s: the second waits for the
+    # slot, its timeout must not run meanwhile
+    slow = MockServer(port=0, latency=2.0)
+    slow.run_in_thread()
+    client = RequestClient(url=slow.url, key="key", secret="secret", max_in_flight=1)
+    try:
+        instrument = list(slow.market.instruments)[0]
+
+        replies = []
+        done = threading.Event()
+
+        def on_reply(reply):
+            replies.append(reply)
+            if len(replies) == 2:
+                done.set()
+
+        client.send_multiple_requests([(trading.buy(instrument=instrument, amount=10, order_type="market"), on_reply),
+                                       (trading.buy(instrument=instrument, amount=10, order_type="market"), on_reply)])
+
+        assert done.wait(timeout=10)
+        assert all(RESP_ERROR not in r for r in replies)
+        assert client.pending_metrics()["expired"] == 0
+        assert client.pending_metrics()["late_replies"] == 0
+    finally:
+        client.stop()
+        slow.shutdown()
+
+
+def test_pending_table_deadline_from_send():
+    table = PendingTable()
+    message = {"id": 1, "method": "public/test"}
+    table.add(message, callback=lambda r: None, timeout=0.01)
+
+    # Not sent: never expires
+    assert table.expire(now=time.monotonic() + 1.0) == []
+
+    assert table.written(1)
+    assert [id for id, _ in table.expire(now=time.monotonic() + 2.0)] == [1]
+
+    # Given up: not written
+    assert not table.written(1)
+
+
+# ####################################################################
+# RECONNECTION
+# ####################################################################
+
+def test_reconnect_retires_the_previous_connection(server):
+    with RequestClient(url=server.url, key=None, secret=None) as client:
+        assert client.server_time()
+
+        ws, reader = client.ws, client._reader_thread
+        client._reconnect()
+
+        # The old reader stops, its close is not taken for a disconnection
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+        assert client.ws is not ws
+        assert client.server_time()
+        assert client.reconnect_metrics()["disconnects"] == 0
+
+
+def test_write_on_a_dropped_socket_waits_for_the_new_connection(server):
+    with RequestClient(url=server.url, key=None, secret=None) as client:
+        assert client.server_time()
+
+        # Socket gone before the close handler ran (as during a teardown):
+        # the next write fails while the connection still looks ready
+        ws = client.ws
+        sock, ws.sock = ws.sock, None
+        try:
+            replies = client.server_time()
+        finally:
+            # Wakes the reader of the orphan socket up
+            sock.abort()
+            sock.close()
+
+        assert len(replies) == 1 and RESP_ERROR not in replies[0]
+        assert client.ws is not ws
+        assert client.reconnect_metrics()["disconnects"] == 1
+
+
+# ####################################################################
+# TEARDOWN
+# ####################################################################
+
+def threads_left(before, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        left = [t for t in threading.enumerate() if t not in before]
+        if not left or time.monotonic() > deadline:
+            return left
+        time.sleep(0.05)
+
+
+def test_stop_ends_every_thread(server):
+    before = set(threading.enumerate())
+    client = RequestClient(url=server.url, key=None, secret=None)
+    assert client.server_time()
+
+    client.stop()
+    assert threads_left(before) == []
+
+
+def test_facade_stop_ends_every_thread(server):
+    before = set(threading.enumerate())
+    api = DeltaApiClient(url=server.url, key=None, secret=None)
+    assert api.request.server_time()
+    assert api.request.trades(list(server.market.instruments)[0], count=1)
+
+    api.stop()
+    assert threads_left(before) == []
+
+
+# ####################################################################
+# RECOVERY METRICS
+# ####################################################################
+
+def test_first_data_is_a_notification(server):
+    with RequestClient(url=server.url, key=None, secret=None) as client:
+        client.route("ticker.", lambda envelope: None)
+        assert client.server_time()
+
+        # Disconnection a second ago, restored since
+        client._supervisor.notify_disconnect(now=time.monotonic() - 1.0)
+        deadline = time.monotonic() + 5.0
+        while client.reconnect_metrics()["reconnects"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.reconnect_metrics()["reconnects"] == 1
+
+        # Replies (e.g. the login) and heartbeats are not data
+        client._on_message(None, b'{"jsonrpc": "2.0", "id": 987654321, "result": {}}')
+        client._on_message(None, b'{"jsonrpc": "2.0", "method": "heartbeat", "params": {"type": "heartbeat"}}')
+        assert client.reconnect_metrics()["time_to_first_data"] is None
+
+        client._on_message(None, b'{"jsonrpc": "2.0", "method": "subscription", '
+                                 b'"params": {"channel": "ticker.BTC-PERPETUAL.raw", "data": {}}}')
+        assert client.reconnect_metrics()["time_to_first_data"] >= 1.0
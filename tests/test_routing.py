@@ -0,0 +1,71 @@
+import pytest
+
+from utilities import json
+from deribit.unified.routing import ChannelRouter, Envelope, subscription_envelope
+
+
+# ####################################################################
+# ENVELOPE
+# ####################################################################
+
+NOTIFICATION = {"jsonrpc": "2.0", "method": "subscription",
+                "params": {"channel": "book.BTC-PERPETUAL.raw", "data": {"change_id": 7, "bids": [], "asks": []}}}
+
+
+@pytest.mark.parametrize("raw", [json.encode(NOTIFICATION), json.encode_str(NOTIFICATION)])
+def test_envelope_reads_the_channel(raw):
+    envelope = subscription_envelope(raw)
+
+    assert isinstance(envelope, Envelope)
+    assert envelope.channel == "book.BTC-PERPETUAL.raw"
+    assert envelope.data == NOTIFICATION["params"]["data"]
+    assert envelope.message == NOTIFICATION
+
+
+def test_envelope_data_decoded_on_demand():
+    envelope = subscription_envelope(json.encode(NOTIFICATION))
+
+    assert envelope._data is None
+    assert envelope.data is envelope.data
+    assert envelope._message is None
+
+
+def test_envelope_falls_back_on_unusual_layout():
+    # Payload first, so it is not the last value of 'params'
+    raw = b'{"jsonrpc":"2.0","method":"subscription","params":{"channel":"quote.X","data":{"a":1},"extra":2}}'
+
+    assert subscription_envelope(raw).data == {"a": 1}
+
+
+@pytest.mark.parametrize("raw", [json.encode({"jsonrpc": "2.0", "id": 1, "result": {"channel": "x"}}),
+                                 b'{"method":"subscription"}',
+                                 {"method": "subscription"}])
+def test_not_a_notification(raw):
+    assert subscription_envelope(raw) is None
+
+
+# ####################################################################
+# ROUTER
+# ####################################################################
+
+def test_longest_prefix_wins():
+    router = ChannelRouter()
+    router.register("book.", "books")
+    router.register("book.BTC-PERPETUAL", "perpetual")
+
+    assert router.handler("book.BTC-PERPETUAL.raw") == "perpetual"
+    assert router.handler("book.ETH-PERPETUAL.raw") == "books"
+    assert router.handler("trades.BTC-PERPETUAL.raw") is None
+
+
+def test_registration_clears_the_cache():
+    router = ChannelRouter()
+    router.register("book.", "books")
+    assert router.handler("book.BTC-PERPETUAL.raw") == "books"
+
+    router.register("book.BTC", "btc")
+    assert router.handler("book.BTC-PERPETUAL.raw") == "btc"
+
+    router.unregister("book.BTC")
+    router.unregister("book.")
+    assert router.handler("book.BTC-PERPETUAL.raw") is None
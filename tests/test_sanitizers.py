@@ -0,0 +1,72 @@
+import pytest
+
+from deribit.support.sanitizers import sanitize, compile_validator, FIELDS
+from deribit.support.types import TIME_IN_FORCE, ORDER_TYPE, TRIGGER_PRICE
+
+
+# ####################################################################
+# ENUM FIELDS
+# ####################################################################
+
+@pytest.mark.parametrize("value", [t.value for t in TIME_IN_FORCE] + [t.value.upper() for t in TIME_IN_FORCE])
+def test_time_in_force_checked_against_its_own_values(value):
+    assert sanitize(time_in_force=value)["time_in_force"] == value.lower()
+
+
+@pytest.mark.parametrize("value", [t.value for t in ORDER_TYPE] + [t.value for t in TRIGGER_PRICE])
+def test_time_in_force_refuses_other_enums(value):
+    with pytest.raises(ValueError):
+        sanitize(time_in_force=value)
+
+
+def test_enum_fields_are_case_insensitive():
+    assert sanitize(kind="FUTURE", currency="BTC", type="LIMIT", trigger="Mark_Price") == \
+        {"kind": "future", "currency": "btc", "type": "limit", "trigger": "mark_price"}
+
+
+def test_enum_fields_refuse_unknown_values():
+    with pytest.raises(ValueError):
+        sanitize(type="iceberg")
+    with pytest.raises(ValueError):
+        sanitize(trigger="bid_price")
+    with pytest.raises(Exception):
+        sanitize(kind="swap")
+
+
+# ####################################################################
+# COMPILED VALIDATORS
+# ####################################################################
+
+ORDER = dict(instrument_name="btc-perpetual", amount=10, type="limit", label="strategy-1", limit_price=5000.5,
+             time_in_force=None, max_show=None, post_only=True, reduce_only=False, stop_price=None, trigger=None,
+             advanced=False)
+
+
+def test_validator_matches_sanitize():
+    validate = compile_validator(*ORDER)
+
+    assert validate(**ORDER) == sanitize(**ORDER)
+    assert validate(**ORDER)["time_in_force"] == TIME_IN_FORCE.GOOD_TIL_CANCELLED.value
+    assert validate(**ORDER)["trigger"] == TRIGGER_PRICE.INDEX.value
+
+
+def test_validator_keeps_the_field_order():
+    validate = compile_validator("limit_price", "amount", "instrument")
+
+    assert list(validate(limit_price=1, amount=2, instrument="x")) == ["instrument", "amount", "limit_price"]
+    assert list(validate(amount=2)) == ["amount"]
+
+
+def test_validator_keeps_required_fields_required():
+    validate = compile_validator("account_id", "email")
+
+    with pytest.raises(ValueError):
+        validate(account_id=None)
+    with pytest.raises(ValueError):
+        validate(email="no-at-sign")
+
+
+def test_validator_refuses_unknown_fields():
+    assert "instrument" in FIELDS
+    with pytest.raises(ValueError):
+        compile_validator("instrument", "colour")
@@ -0,0 +1,97 @@
+import time
+
+import numpy as np
+import pytest
+
+from containers.tape import TradeTape, TradeTapes, BUY, SELL
+from deribit.mock.server import MockServer
+from deribit.subscriptions.trades import TradeFeed
+from deribit.unified.requests import RequestClient
+
+
+# ####################################################################
+# HELPERS
+# ####################################################################
+
+def trade(seq, price=100.0, amount=10.0, direction="buy", instrument="BTC-PERPETUAL"):
+    return {"trade_seq": seq, "timestamp": 1000 * seq, "price": price, "amount": amount,
+            "direction": direction, "instrument_name": instrument}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+# ####################################################################
+# TAPE
+# ####################################################################
+
+def test_last_trades_are_contiguous_views():
+    tape = TradeTape(capacity=8)
+    tape.extend([trade(seq) for seq in range(1, 20)])
+
+    last = tape.last()
+    assert len(tape) == 8 and tape.count == 19
+    assert last["trade_seq"].tolist() == list(range(12, 20))
+    assert tape.last(3)["trade_seq"].tolist() == [17, 18, 19]
+    assert not last.flags["OWNDATA"]
+
+
+def test_duplicates_dropped_and_gaps_counted():
+    tape = TradeTape(capacity=8)
+
+    assert tape.extend([trade(1), trade(2), trade(2), trade(1), trade(5)]) == 3
+    assert tape.missed == 2
+    assert tape.trade_seq == 5
+    assert np.isnan(tape.last()["iv"]).all()
+
+
+def test_aggregations():
+    tape = TradeTape(capacity=16)
+    tape.extend([trade(1, 100.0, 10.0, "buy"), trade(2, 110.0, 30.0, "sell"), trade(3, 105.0, 20.0, "buy")])
+
+    assert tape.volume() == (30.0, 30.0)
+    assert tape.imbalance(n=1) == 1.0
+    assert tape.vwap() == pytest.approx((1000.0 + 3300.0 + 2100.0) / 60.0)
+    assert tape.since(2000)["trade_seq"].tolist() == [2, 3]
+
+    stats = tape.stats(since=2000)
+    assert (stats["count"], stats["open"], stats["high"], stats["low"], stats["close"]) == (2, 110.0, 110.0, 105.0, 105.0)
+    assert tape.last()["direction"].tolist() == [BUY, SELL, BUY]
+    assert TradeTape().stats() == {"count": 0} and TradeTape().vwap() is None
+
+
+def test_tapes_by_instrument():
+    tapes = TradeTapes(capacity=4)
+
+    assert tapes.append([trade(1), trade(1, instrument="ETH-PERPETUAL"), trade(2)]) == 3
+    assert sorted(tapes.instruments) == ["BTC-PERPETUAL", "ETH-PERPETUAL"]
+    assert len(tapes["BTC-PERPETUAL"]) == 2 and "SOL-PERPETUAL" not in tapes
+
+
+# ####################################################################
+# FEED
+# ####################################################################
+
+def test_feed_fills_the_tapes():
+    server = MockServer(port=0, latency=0, rate=50)
+    server.run_in_thread()
+
+    received = []
+    try:
+        with RequestClient(url=server.url, key=None, secret=None) as client:
+            feed = TradeFeed(client, callback=received.append)
+            feed.subscribe(["BTC-PERPETUAL"])
+
+            assert wait_for(lambda: "BTC-PERPETUAL" in feed.tapes and len(feed.tapes["BTC-PERPETUAL"]) >= 5)
+            feed.unsubscribe(["BTC-PERPETUAL"])
+
+        tape = feed.tapes["BTC-PERPETUAL"]
+        assert tape.missed == 0
+        assert np.all(np.diff(tape.last()["trade_seq"]) == 1)
+        assert received
+    finally:
+        server.shutdown()
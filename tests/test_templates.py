@@ -0,0 +1,78 @@
+import pytest
+
+from utilities import json
+from deribit.messages import session, mkt_data, trading, templates
+from deribit.messages.common import message, add_params_to_message
+from deribit.support.endpoints import SESSION_GET_TIME, DATA_GET_ORDER_BOOK, TRADING_BUY, TRADING_SELL
+
+
+# ####################################################################
+# FIXTURES
+# ####################################################################
+
+@pytest.fixture(params=sorted(json.CODECS))
+def codec(request):
+    previous = json.codec
+    json.use(request.param)
+    yield request.param
+    json.use(previous)
+
+
+def generic(method, params, id_):
+    # Message as built before the templates
+    msg = add_params_to_message(dict(params), message(method=method))
+    msg["id"] = id_
+    return msg
+
+
+# ####################################################################
+# TEMPLATES VS GENERIC MESSAGES
+# ####################################################################
+
+ORDER = {"instrument_name": "BTC-PERPETUAL", "amount": 10.0, "type": "limit", "label": "strategy-1",
+         "limit_price": 5000.5, "time_in_force": "good_til_cancelled", "post_only": True,
+         "reduce_only": False, "advanced": False}
+
+CASES = [(session.get_time, (), {}, SESSION_GET_TIME, {}),
+         (mkt_data.request_orderbook, ("btc-perpetual", 5), {}, DATA_GET_ORDER_BOOK,
+          {"instrument_name": "BTC-PERPETUAL", "depth": 5}),
+         (trading.buy, ("btc-perpetual", 10), {"limit_price": 5000.5, "label": "strategy-1", "post_only": True},
+          TRADING_BUY, ORDER),
+         (trading.sell, ("btc-perpetual", 10), {"limit_price": 5000.5, "label": "strategy-1", "post_only": True},
+          TRADING_SELL, ORDER)]
+
+
+@pytest.mark.parametrize("builder, args, kwargs, method, params", CASES, ids=[c[3] for c in CASES])
+def test_template_matches_the_generic_message(codec, builder, args, kwargs, method, params):
+    prepared = builder(*args, **kwargs)
+    expected = generic(method, params, prepared["id"])
+
+    assert isinstance(prepared, templates.PreparedMessage)
+    assert dict(prepared) == expected
+    assert json.decode(templates.frame(prepared)) == expected
+    assert templates.frame_str(prepared) == templates.frame(prepared).decode()
+
+
+def test_ids_are_spliced_in():
+    first, second = session.get_time(), session.get_time()
+
+    assert first["id"] != second["id"]
+    assert json.decode(templates.frame(first))["id"] == first["id"]
+    assert json.decode(templates.frame(second))["id"] == second["id"]
+
+
+def test_plain_messages_are_encoded():
+    msg = generic(SESSION_GET_TIME, {}, 1)
+    assert json.decode(templates.frame(msg)) == msg
+    assert json.decode(templates.frame_str(msg)) == msg
+
+
+def test_spliced_values_are_valid_json():
+    # Standard library path: keys and values encoded one by one
+    previous = json.codec
+    json.use("json")
+    try:
+        params = {"label": 'quote "A"', "amount": 0.1, "count": 3, "flag": True, "nested": {"a": [1, 2]}}
+        assert json.decode(templates.encode_params(params)) == params
+    finally:
+        json.use(previous)
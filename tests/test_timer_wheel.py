@@ -0,0 +1,59 @@
+import time
+
+from deribit.unified.timer_wheel import TimerWheel
+
+
+# ####################################################################
+# EXPIRATIONS
+# ####################################################################
+
+def test_keys_expire_once_their_deadline_passed():
+    wheel = TimerWheel(tick=0.1, slots=8)
+    now = time.monotonic()
+    wheel.advance(now)
+
+    wheel.schedule("a", now + 0.25)
+    wheel.schedule("b", now + 0.55)
+    assert len(wheel) == 2
+
+    assert wheel.advance(now + 0.2) == []
+    assert wheel.advance(now + 0.35) == ["a"]
+    assert wheel.advance(now + 0.45) == []
+    assert wheel.advance(now + 0.65) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_deadlines_beyond_one_revolution():
+    # One revolution is 0.8s: the key waits for the second one in its slot
+    wheel = TimerWheel(tick=0.1, slots=8)
+    now = time.monotonic()
+    wheel.advance(now)
+
+    wheel.schedule("late", now + 1.25)
+    wheel.schedule("early", now + 0.45)
+
+    assert wheel.advance(now + 0.95) == ["early"]
+    assert wheel.advance(now + 1.15) == []
+    assert wheel.advance(now + 1.35) == ["late"]
+
+
+def test_long_pause_expires_everything_due():
+    wheel = TimerWheel(tick=0.1, slots=8)
+    now = time.monotonic()
+    wheel.advance(now)
+
+    for i in range(20):
+        wheel.schedule(i, now + 0.1 * i)
+    wheel.schedule("later", now + 100.0)
+
+    assert sorted(wheel.advance(now + 10.0)) == list(range(20))
+    assert wheel.advance(now + 100.15) == ["later"]
+
+
+def test_past_deadlines_expire_on_next_advance():
+    wheel = TimerWheel(tick=0.1, slots=8)
+    now = time.monotonic()
+    wheel.advance(now)
+
+    wheel.schedule("past", now - 5.0)
+    assert wheel.advance(now + 0.1) == ["past"]
@@ -0,0 +1,59 @@
+import time
+import threading
+
+from deribit.mock.server import MockServer
+from deribit.unified.requests import RequestClient
+from deribit.unified.tokens import TokenStore
+
+
+def test_refresh_single_flight():
+    store = TokenStore()
+    ticket = store.begin_refresh()
+    assert ticket is not None
+    assert store.begin_refresh() is None
+
+    store.end_refresh(ticket)
+    assert store.begin_refresh() is not None
+
+
+def test_invalidate_only_the_token_rejected():
+    store = TokenStore()
+    store.update({"access_token": "a1", "refresh_token": "r1", "expires_in": 900})
+    store.update({"access_token": "a2", "refresh_token": "r2", "expires_in": 900})
+
+    # Rejected after another connection replaced it: kept
+    assert not store.invalidate("r1")
+    assert store.refresh_token == "r2"
+
+    assert store.invalidate("r2")
+    assert not store.usable
+
+
+def test_pooled_connections_refresh_in_turn():
+    server = MockServer(port=0, latency=0.2, key="key", secret="secret")
+    server.run_in_thread()
+
+    # Logged in together, hence refreshed together, about a
+    # second after the login (refresh tokens are single use)
+    store = TokenStore(refresh_margin=899)
+    clients = [RequestClient(url=server.url, key="key", secret="secret", token_store=store)
+               for _ in range(4)]
+    try:
+        def connect(client):
+            client.server_time()
+
+        threads = [threading.Thread(target=connect, args=(c,)) for c in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        time.sleep(3.5)
+        metrics = store.metrics()
+        assert metrics["refreshes"] >= 4
+        assert metrics["failures"] == 0
+        assert metrics["credential_logins"] == 4
+    finally:
+        for client in clients:
+            client.stop()
+        server.shutdown()
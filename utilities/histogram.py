@@ -0,0 +1,144 @@
+import math
+
+# ####################################################################
+# CONSTANTS
+# ####################################################################
+
+# Values below 2 ** SUB_BUCKET_BITS are recorded exactly, larger ones
+# with a relative error below 2 ** -(SUB_BUCKET_BITS - 1) (~1.6%)
+SUB_BUCKET_BITS = 7
+
+# Percentiles of the summaries
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+# ####################################################################
+# HISTOGRAM (HDR STYLE)
+# ####################################################################
+
+class Histogram(object):
+    """
+    Histogram of non-negative integer values (e.g. microseconds), with
+    log-linear buckets as in HdrHistogram: constant relative precision
+    over any range, recording is O(1) and the memory grows with the
+    logarithm of the largest value only.
+    """
+
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.__bits = sub_bucket_bits
+        self.__sub_count = 1 << sub_bucket_bits
+        self.__half_count = self.__sub_count >> 1
+        self.__counts = []
+
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    # ##################################################################
+    # BUCKETS
+    # ##################################################################
+
+    def __index(self, value):
+        if value < self.__sub_count:
+            return value
+
+        # Top bits of the value, shifted to its magnitude
+        shift = value.bit_length() - self.__bits
+        return (shift << (self.__bits - 1)) + (value >> shift)
+
+    def __highest(self, index):
+        # Highest value recorded in a bucket
+        if index < self.__sub_count:
+            return index
+
+        shift = index // self.__half_count - 1
+        mantissa = index - shift * self.__half_count
+        return ((mantissa + 1) << shift) - 1
+
+    # ##################################################################
+    # RECORDING
+    # ##################################################################
+
+    def record(self, value, count: int = 1):
+        """
+        :param value: Value (int, negative values are recorded as 0).
+        :param count: Number of occurrences.
+        """
+        value = int(value) if value > 0 else 0
+        index = self.__index(value)
+
+        counts = self.__counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += count
+
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """
+        Add the values recorded by another histogram (same precision).
+        """
+        if other.__bits != self.__bits:
+            raise ValueError("Unable to merge histograms of different precisions.")
+        if not other.count:
+            return
+
+        counts = self.__counts
+        if len(other.__counts) > len(counts):
+            counts.extend([0] * (len(other.__counts) - len(counts)))
+        for index, count in enumerate(other.__counts):
+            counts[index] += count
+
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def reset(self):
+        self.__counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    # ##################################################################
+    # QUERIES
+    # ##################################################################
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile: float):
+        """
+        :param percentile: In [0, 100].
+        :return: Value below or equal to which that percentage of the values are.
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * percentile / 100.0))
+        seen = 0
+        for index, count in enumerate(self.__counts):
+            seen += count
+            if seen >= rank:
+                return min(self.__highest(index), self.max)
+        return self.max
+
+    def summary(self, percentiles=PERCENTILES):
+        """
+        :return: Count, min, mean, max and percentiles (dict).
+        """
+        summary_ = {"count": self.count, "min": self.min, "mean": self.mean, "max": self.max}
+        for p in percentiles:
+            summary_[f"p{p:g}"] = self.percentile(p)
+        return summary_
+
+    def __len__(self):
+        return self.count
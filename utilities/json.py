@@ -1,10 +1,113 @@
+import json as stdlib_json
+import timeit
+import logging
 from typing import Dict
 
 try:
-    import ujson as json
-except:
-    import json
+    import orjson
+except ImportError:
+    orjson = None
 
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# ######################################################################
+# CODECS
+# ######################################################################
+
+def __stdlib_decode(data):
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return stdlib_json.loads(data)
+
+
+def __stdlib_encode(data):
+    return stdlib_json.dumps(data, separators=(",", ":")).encode()
+
+
+def __stdlib_encode_str(data):
+    return stdlib_json.dumps(data, separators=(",", ":"))
+
+
+# Available codecs: name -> (decode, encode to bytes, encode to str)
+CODECS = {"json": (__stdlib_decode, __stdlib_encode, __stdlib_encode_str)}
+
+if ujson:
+    CODECS["ujson"] = (ujson.loads, lambda data: ujson.dumps(data).encode(), ujson.dumps)
+
+if orjson:
+    CODECS["orjson"] = (orjson.loads, orjson.dumps, lambda data: orjson.dumps(data).decode())
+
+# Typical frame used to compare the codecs
+SAMPLE_FRAME = (b'{"jsonrpc":"2.0","method":"subscription","params":{"channel":"book.BTC-PERPETUAL.raw",'
+                b'"data":{"type":"change","timestamp":1554373911330,"prev_change_id":297217,'
+                b'"instrument_name":"BTC-PERPETUAL","change_id":297218,'
+                b'"bids":[["delete",5042.64,0],["change",5042.34,10.0],["new",5041.9,2300.0]],'
+                b'"asks":[["new",5043.3,40.0],["change",5043.95,120.0],["delete",5044.5,0]]}}}')
+
+
+# ######################################################################
+# FAST PATH (HOT LOOPS: NO TYPE CHECKS, NO FALLBACK)
+# ######################################################################
+
+# Name of the codec in use
+codec = "json"
+
+# Bytes (or str) in, python data out
+decode = __stdlib_decode
+
+# Python data in, bytes out
+encode = __stdlib_encode
+
+# Python data in, str out (for transports accepting text only)
+encode_str = __stdlib_encode_str
+
+
+def use(name):
+    """
+    Select the codec used by decode/encode/encode_str (and loads/dumps).
+    :param name: One of CODECS ('orjson', 'ujson' or 'json').
+    """
+    global codec, decode, encode, encode_str
+    decode, encode, encode_str = CODECS[name]
+    codec = name
+
+
+def benchmark(sample=SAMPLE_FRAME, number=2000):
+    """
+    Time a decode + encode round trip of the sample frame with every available codec.
+    :param sample: Raw JSON frame (bytes).
+    :param number: Number of round trips.
+    :return: Dict {codec name: seconds per round trip}
+    """
+    results = {}
+    for name, (decode_, encode_, _) in CODECS.items():
+        seconds = timeit.timeit(lambda: encode_(decode_(sample)), number=number)
+        results[name] = seconds / number
+    return results
+
+
+def select_fastest(sample=SAMPLE_FRAME, number=200):
+    timings = benchmark(sample=sample, number=number)
+    fastest = min(timings, key=timings.get)
+    use(fastest)
+    logger.debug(f"JSON codec selected: {fastest} ({timings}).")
+    return fastest
+
+
+# Pick the fastest codec available at import
+select_fastest()
+
+
+# ######################################################################
+# TOLERANT PATH
+# ######################################################################
 
 def loads(data):
     if isinstance(data, list):
@@ -12,7 +115,7 @@ def loads(data):
     if isinstance(data, Dict):
         return data
     try:
-        return json.loads(data)
+        return decode(data)
     except:
         return data
 
@@ -23,6 +126,6 @@ def dumps(data):
     if isinstance(data, bytearray):
         return data
     try:
-        return json.dumps(data)
+        return encode_str(data)
     except:
-        return data
\ No newline at end of file
+        return data